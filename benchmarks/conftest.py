@@ -0,0 +1,52 @@
+"""
+Shared setup for the unit tests: the handler module imported without AWS
+resources, and a fixture that swaps in the benchmark stand-ins.
+"""
+import os
+import sys
+
+import pytest
+
+# No AWS resources: every table and model is left unset, as in the benchmarks
+for name in ('DDB_PIPELINES_TABLE', 'DDB_CONVERSATIONS_TABLE', 'DDB_CACHE_TABLE', 'OPENAI_API_KEY', 'BEDROCK_MODEL_ID'):
+    os.environ[name] = ''
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lambda'))
+
+import handler  # noqa: E402
+import standins  # noqa: E402
+from run_benchmarks import TABLE_NAMES  # noqa: E402
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """Install stand-in clients for a scenario (see standins.build_clients), without latency.
+
+    The pipelines, conversations and cache tables are configured, the
+    module-level caches start empty and conversation writes go to a fresh
+    queue, drained before the stand-ins are removed.
+    """
+    queues = []
+
+    def install(**scenario):
+        clients = standins.build_clients(scenario, TABLE_NAMES, latency_scale=0)
+        monkeypatch.setattr(handler, 'clients', clients)
+        monkeypatch.setattr(handler, 'PIPELINES_TABLE', TABLE_NAMES['pipelines'])
+        monkeypatch.setattr(handler, 'CONVERSATIONS_TABLE', TABLE_NAMES['conversations'])
+        monkeypatch.setattr(handler, 'CACHE_TABLE', TABLE_NAMES['cache'])
+        monkeypatch.setattr(handler, 'api_governors', {})
+        monkeypatch.setattr(handler, 'noisy_log_groups', handler.TTLCache(100, 3600))
+        monkeypatch.setattr(handler, 'catalog_cache', handler.TTLCache(100, 300))
+        monkeypatch.setattr(handler, 'execution_failure_cache', handler.TTLCache(100, float('inf')))
+        monkeypatch.setattr(handler, 'llm_cache', handler.TTLCache(100, 3600))
+        queues.append(handler.PersistQueue(TABLE_NAMES['conversations'], 100))
+        monkeypatch.setattr(handler, 'persist_queue', queues[-1])
+        return clients
+
+    yield install
+    for queue in queues:
+        queue.flush(2)
+
+
+def pipeline_info(clients, index: int = 0):
+    """The catalog item of bench-pipeline-<index>, as a plain dict."""
+    return dict(clients['dynamodb'].Table(TABLE_NAMES['pipelines']).items[f'bench-pipeline-{index}'])
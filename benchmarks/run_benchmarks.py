@@ -0,0 +1,482 @@
+"""
+Offline benchmarks for the agent Lambda.
+
+Drives lambda_handler with API Gateway v2 events against the local
+stand-ins in standins.py, one subprocess per scenario so every scenario
+gets its own cold start and peak RSS. Results are written as JSON and can
+be compared with a saved baseline to catch regressions.
+
+    python benchmarks/run_benchmarks.py                       # all scenarios
+    python benchmarks/run_benchmarks.py -s small_logs -n 50   # one scenario, 50 requests
+    python benchmarks/run_benchmarks.py --save-baseline       # record benchmarks/baselines/default.json
+    python benchmarks/run_benchmarks.py --compare             # exit 1 on regression
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DIR = os.path.join(os.path.dirname(BENCH_DIR), 'lambda')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baselines', 'default.json')
+
+TABLE_NAMES = {
+    'pipelines': 'bench-pipelines',
+    'conversations': 'bench-conversations',
+    'cache': 'bench-cache',
+}
+
+# Typical in-region latencies (ms) for warm connections
+AWS_LATENCY_MS = {'dynamodb': 6, 'logs': 60, 'stepfunctions': 40}
+LLM_LATENCY_MS = {'openai': 1200, 'bedrock': 1500}
+
+# Client-side API limits for an account whose quotas were raised for heavy use;
+# without them the governor paces calls at the default AWS quotas
+RAISED_RATE_LIMITS = json.dumps({
+    'logs:FilterLogEvents': [200, 200], 'states:ListExecutions': [200, 200], 'states:GetExecutionHistory': [200, 200]
+})
+
+# Environment every scenario starts from; scenarios override individual keys
+BASE_ENV = {
+    'DDB_PIPELINES_TABLE': TABLE_NAMES['pipelines'],
+    'DDB_CONVERSATIONS_TABLE': TABLE_NAMES['conversations'],
+    'DDB_CACHE_TABLE': '',
+    'OPENAI_API_KEY': '',
+    'OPEN_AI_AGENT': '',
+    'BEDROCK_MODEL_ID': '',
+    'LLM_CACHE_ENABLED': 'false',
+}
+
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    'small_logs': {
+        'description': 'Deterministic report over 2k log events and 3 failed executions, no LLM',
+        'pipelines': 20,
+        'log_events': 2000,
+        'failed_executions': 3,
+        'log_backend': 'filter',
+        'latency_ms': AWS_LATENCY_MS,
+    },
+    'large_logs_filter': {
+        'description': '1M log events scanned with filter_log_events until the scan budget stops it',
+        'pipelines': 5,
+        'log_events': 1000000,
+        'log_backend': 'filter',
+        'latency_ms': AWS_LATENCY_MS,
+    },
+    'large_logs_insights': {
+        'description': '1M log events aggregated by Logs Insights',
+        'pipelines': 5,
+        'log_events': 1000000,
+        'log_backend': 'insights',
+        'latency_ms': AWS_LATENCY_MS,
+    },
+    'incremental_logs': {
+        'description': '15k log events with checkpointed incremental scans (resumed after the first pass)',
+        'pipelines': 5,
+        'log_events': 15000,
+        'log_backend': 'filter',
+        'latency_ms': AWS_LATENCY_MS,
+        'env': {'DDB_CACHE_TABLE': TABLE_NAMES['cache']},
+    },
+    'incremental_week': {
+        'description': 'Week-long window in auto mode: Logs Insights seeds the checkpoint, later scans read the delta',
+        'pipelines': 5,
+        'log_events': 500000,
+        'log_hours': 168,
+        'request': {'hours_back': 168},
+        'latency_ms': AWS_LATENCY_MS,
+        'env': {'DDB_CACHE_TABLE': TABLE_NAMES['cache']},
+    },
+    'openai': {
+        'description': 'Small report refined by OpenAI on every request (LLM cache off)',
+        'pipelines': 20,
+        'log_events': 2000,
+        'failed_executions': 3,
+        'log_backend': 'filter',
+        'latency_ms': {**AWS_LATENCY_MS, **LLM_LATENCY_MS},
+        'env': {'OPENAI_API_KEY': 'bench'},
+        'requests': 10,
+    },
+    'openai_cached': {
+        'description': 'OpenAI refinement with the LLM response cache on',
+        'pipelines': 5,
+        'log_events': 2000,
+        'failed_executions': 3,
+        'log_backend': 'filter',
+        'latency_ms': {**AWS_LATENCY_MS, **LLM_LATENCY_MS},
+        'env': {'OPENAI_API_KEY': 'bench', 'LLM_CACHE_ENABLED': 'true'},
+    },
+    'openai_slow_tail': {
+        'description': 'OpenAI only, with 1 call in 20 five times slower than usual',
+        'pipelines': 20,
+        'log_events': 2000,
+        'failed_executions': 3,
+        'log_backend': 'filter',
+        'latency_ms': {**AWS_LATENCY_MS, **LLM_LATENCY_MS},
+        'latency_tails': {'openai': (0.05, 5)},
+        'env': {'OPENAI_API_KEY': 'bench'},
+        'requests': 60,
+    },
+    'llm_hedged': {
+        'description': 'openai_slow_tail with Bedrock configured too, so slow OpenAI calls are hedged',
+        'pipelines': 20,
+        'log_events': 2000,
+        'failed_executions': 3,
+        'log_backend': 'filter',
+        'latency_ms': {**AWS_LATENCY_MS, **LLM_LATENCY_MS},
+        'latency_tails': {'openai': (0.05, 5)},
+        'env': {
+            'OPENAI_API_KEY': 'bench', 'BEDROCK_MODEL_ID': 'anthropic.claude-3-haiku-20240307-v1:0',
+            # Trust observed latency after a few calls, and hedge below the 1-in-20 tail
+            'LLM_STATS_MIN_SAMPLES': '5', 'LLM_HEDGE_PERCENTILE': '90',
+        },
+        'requests': 60,
+    },
+    'bedrock_stream': {
+        'description': 'Streaming (SSE) response refined by Bedrock',
+        'pipelines': 20,
+        'log_events': 2000,
+        'failed_executions': 3,
+        'log_backend': 'filter',
+        'latency_ms': {**AWS_LATENCY_MS, **LLM_LATENCY_MS},
+        'env': {'BEDROCK_MODEL_ID': 'anthropic.claude-3-haiku-20240307-v1:0'},
+        'request': {'stream': True},
+        'requests': 10,
+    },
+    'precomputed': {
+        'description': 'small_logs answered from reports stored by a scheduled sweep run first',
+        'pipelines': 20,
+        'log_events': 2000,
+        'failed_executions': 3,
+        'log_backend': 'filter',
+        'latency_ms': AWS_LATENCY_MS,
+        'sweep': True,
+        'env': {'DDB_CACHE_TABLE': TABLE_NAMES['cache'], 'GOVERNOR_RATE_LIMITS': RAISED_RATE_LIMITS},
+    },
+    'batch': {
+        'description': '25 pipelines per request through the batch path',
+        'pipelines': 25,
+        'log_events': 5000,
+        'failed_executions': 2,
+        'log_backend': 'filter',
+        'latency_ms': AWS_LATENCY_MS,
+        'batch_size': 25,
+        'requests': 10,
+        'env': {'GOVERNOR_RATE_LIMITS': RAISED_RATE_LIMITS},
+    },
+    'server_concurrent': {
+        'description': 'small_logs served by the ASGI server with 30 requests in flight',
+        'pipelines': 20,
+        'log_events': 2000,
+        'failed_executions': 3,
+        'log_backend': 'filter',
+        'latency_ms': AWS_LATENCY_MS,
+        'server_concurrency': 30,
+        'requests': 120,
+        'env': {'GOVERNOR_RATE_LIMITS': RAISED_RATE_LIMITS},
+    },
+    'throttled_load': {
+        'description': 'Sustained server load against account quotas below the configured client limits',
+        'pipelines': 20,
+        'log_events': 2000,
+        'failed_executions': 3,
+        'log_backend': 'filter',
+        'latency_ms': AWS_LATENCY_MS,
+        'server_concurrency': 30,
+        'requests': 120,
+        # Calls per second the stand-in account allows; the governor starts at twice these
+        'api_quotas': {'FilterLogEvents': 10, 'ListExecutions': 10, 'GetExecutionHistory': 10},
+        'env': {
+            'GOVERNOR_RATE_LIMITS': json.dumps({
+                'logs:FilterLogEvents': [20, 20], 'states:ListExecutions': [20, 20], 'states:GetExecutionHistory': [20, 20]
+            }),
+        },
+    },
+}
+
+DEFAULT_REQUESTS = 30
+# Relative change in a metric that counts as a regression when comparing
+DEFAULT_TOLERANCE = 0.2
+# Metric name -> True when higher is better
+COMPARED_METRICS = {
+    'throughput_rps': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'peak_rss_mb': False,
+    'cold_start_ms': False,
+}
+
+
+class BenchContext:
+    """Minimal Lambda context with a fixed timeout."""
+
+    def __init__(self, timeout_ms: int = 30000):
+        self.aws_request_id = str(uuid.uuid4())
+        self.deadline = time.monotonic() + timeout_ms / 1000
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int((self.deadline - time.monotonic()) * 1000)
+
+
+def api_gateway_event(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an API Gateway HTTP API (payload v2.0) POST event."""
+    return {
+        'version': '2.0',
+        'routeKey': 'POST /chat',
+        'rawPath': '/chat',
+        'headers': {'content-type': 'application/json'},
+        'requestContext': {
+            'http': {'method': 'POST', 'path': '/chat', 'sourceIp': '127.0.0.1'},
+            'requestId': str(uuid.uuid4()),
+            'stage': '$default'
+        },
+        'body': json.dumps(body),
+        'isBase64Encoded': False
+    }
+
+
+def request_body(scenario: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """Body of the index-th request, rotating over the scenario's pipelines."""
+    pipelines = scenario.get('pipelines', 1)
+    body = {'message': 'What is wrong with this pipeline?', 'hours_back': 24}
+    body.update(scenario.get('request', {}))
+    if scenario.get('batch_size'):
+        body['pipeline_names'] = [f'bench-pipeline-{(index + i) % pipelines}' for i in range(scenario['batch_size'])]
+    else:
+        body['pipeline_name'] = f'bench-pipeline-{index % pipelines}'
+    return body
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+async def asgi_request(app, event: Dict[str, Any]) -> Dict[str, Any]:
+    """Send event's request through an ASGI app in-process; return status and body."""
+    messages = [{'type': 'http.request', 'body': event['body'].encode('utf-8'), 'more_body': False}]
+    response: Dict[str, Any] = {'body': b''}
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['statusCode'] = message['status']
+        else:
+            response['body'] += message.get('body', b'')
+
+    scope = {
+        'type': 'http',
+        'method': event['requestContext']['http']['method'],
+        'path': event['rawPath'],
+        'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in event['headers'].items()],
+        'client': ('127.0.0.1', 0)
+    }
+    await app(scope, receive, send)
+    return response
+
+
+async def run_server_requests(app, scenario: Dict[str, Any], requests: int) -> Tuple[List[float], Dict[str, int]]:
+    """Issue requests against app with scenario['server_concurrency'] in flight.
+
+    The first request runs alone so it measures the cold start. Returns the
+    latencies (first request first) and a count per status code.
+    """
+    semaphore = asyncio.Semaphore(scenario['server_concurrency'])
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+
+    async def one(index: int):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await asgi_request(app, api_gateway_event(request_body(scenario, index)))
+            latencies.append((time.perf_counter() - started) * 1000)
+            code = str(response.get('statusCode'))
+            status_codes[code] = status_codes.get(code, 0) + 1
+
+    await one(0)
+    await asyncio.gather(*(one(index) for index in range(1, requests)))
+    return latencies, status_codes
+
+
+def run_worker(name: str, requests: int, latency_scale: float) -> Dict[str, Any]:
+    """Run one scenario in this (fresh) process and return its measurements."""
+    scenario = SCENARIOS[name]
+    os.environ.update(BASE_ENV)
+    os.environ.update(scenario.get('env', {}))
+    sys.path.insert(0, LAMBDA_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    import standins
+
+    import_started = time.perf_counter()
+    if scenario.get('server_concurrency'):
+        # First, so the server sizes the handler's pools before they are created
+        import server
+    import handler
+    import_ms = (time.perf_counter() - import_started) * 1000
+    # Pre-registered clients stand in for the SDK, so boto3 and openai are never imported
+    handler.clients.update(standins.build_clients(scenario, TABLE_NAMES, latency_scale))
+    sweep = None
+    if scenario.get('sweep'):
+        # Not timed as a request: the schedule runs it ahead of the chat traffic
+        sweep = handler.lambda_handler({'source': 'aws.events', 'detail-type': 'Scheduled Event'}, BenchContext(300000))
+
+    latencies: List[float] = []
+    status_codes: Dict[str, int] = {}
+    wall_started = time.perf_counter()
+    # EMF records go to stdout; keep them out of the worker's result
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if scenario.get('server_concurrency'):
+            latencies, status_codes = asyncio.run(run_server_requests(server.app, scenario, requests))
+        for index in range(len(latencies), requests):
+            event = api_gateway_event(request_body(scenario, index))
+            started = time.perf_counter()
+            response = handler.lambda_handler(event, BenchContext())
+            latencies.append((time.perf_counter() - started) * 1000)
+            code = str(response.get('statusCode'))
+            status_codes[code] = status_codes.get(code, 0) + 1
+    wall_s = time.perf_counter() - wall_started
+
+    # The first request pays for lazy initialization; percentiles cover warm requests
+    warm = latencies[1:] or latencies
+    result = {
+        'description': scenario['description'],
+        'requests': requests,
+        'status_codes': status_codes,
+        'throughput_rps': round(requests / wall_s, 2),
+        'mean_ms': round(sum(warm) / len(warm), 2),
+        'p50_ms': round(percentile(warm, 50), 2),
+        'p95_ms': round(percentile(warm, 95), 2),
+        'p99_ms': round(percentile(warm, 99), 2),
+        'max_ms': round(max(warm), 2),
+        'module_import_ms': round(import_ms, 2),
+        'first_request_ms': round(latencies[0], 2),
+        'cold_start_ms': round(import_ms + latencies[0], 2),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    if sweep:
+        result['sweep_ms'] = sweep['duration_ms']
+        result['sweep_stored'] = sweep['stored']
+    if scenario.get('api_quotas'):
+        # Logs and Step Functions stand-ins share one quota
+        quota = handler.clients['logs'].quota
+        result['api_calls_allowed'] = quota.allowed
+        result['api_calls_throttled'] = quota.throttled
+    return result
+
+
+def run_scenario(name: str, requests: int, latency_scale: float) -> Dict[str, Any]:
+    """Run a scenario in a subprocess and parse its JSON result."""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', name,
+         '--requests', str(requests), '--latency-scale', str(latency_scale)],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Scenario {name} failed:\n{completed.stderr[-4000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return one line per metric that regressed by more than tolerance."""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{name}.{metric}: {before} -> {after} ({change:+.0%})")
+    return regressions
+
+
+def print_table(results: Dict[str, Any]):
+    columns = ['throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'peak_rss_mb', 'cold_start_ms']
+    print(f"{'scenario':<22}" + ''.join(f'{column:>16}' for column in columns))
+    for name, result in results['scenarios'].items():
+        print(f'{name:<22}' + ''.join(f'{result[column]:>16}' for column in columns))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='scenario to run (repeatable; default: all)')
+    parser.add_argument('-n', '--requests', type=int, help='requests per scenario (overrides the scenario default)')
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help='multiplier for simulated service latency (0 measures CPU cost only)')
+    parser.add_argument('-o', '--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, metavar='PATH',
+                        help='also write the results as the baseline')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, metavar='PATH',
+                        help='compare with a baseline and exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='relative change that counts as a regression (default: %(default)s)')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        requests = args.requests or SCENARIOS[args.worker].get('requests', DEFAULT_REQUESTS)
+        print(json.dumps(run_worker(args.worker, requests, args.latency_scale)))
+        return 0
+
+    results: Dict[str, Any] = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'latency_scale': args.latency_scale,
+        'scenarios': {}
+    }
+    for name in args.scenario or list(SCENARIOS):
+        requests = args.requests or SCENARIOS[name].get('requests', DEFAULT_REQUESTS)
+        print(f"Running {name} ({requests} requests)...", file=sys.stderr)
+        results['scenarios'][name] = run_scenario(name, requests, args.latency_scale)
+    print_table(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ') + '.json')
+    paths = [output] + ([args.save_baseline] if args.save_baseline else [])
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {path}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('latency_scale') != args.latency_scale:
+            print(f"Warning: baseline was recorded with latency scale {baseline.get('latency_scale')}", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,618 @@
+"""
+Local stand-ins for the services the agent calls.
+
+Each stand-in implements only the SDK calls handler.py makes, with a
+configurable per-call latency. Log events are synthesized on demand from
+their index, so a log group can hold millions of events without keeping
+them in memory.
+"""
+import io
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+
+# Error lines the synthetic log groups are made of; {n} and {id} vary per event
+LOG_TEMPLATES = [
+    'ERROR Task {id} failed: connection timeout after {n} ms',
+    'ERROR Exception in stage load_orders: duplicate key value violates unique constraint "orders_pkey" (id={n})',
+    'ERROR Job run {id} failed with exit code {n}',
+    'ERROR Throttling: Rate exceeded for shard shardId-{n}',
+    'ERROR failed to read s3://bench-bucket/input/part-{n}.parquet: Access Denied',
+]
+
+
+class Latency:
+    """Simulated per-call service latency in milliseconds, with +/- jitter.
+
+    tails maps a service to (probability, multiplier): that share of its
+    calls is multiplier times slower, like a provider's slow tail.
+    """
+
+    def __init__(
+        self,
+        latencies_ms: Dict[str, float],
+        jitter: float = 0.2,
+        scale: float = 1.0,
+        seed: int = 7,
+        tails: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        self.latencies_ms = latencies_ms
+        self.jitter = jitter
+        self.tails = tails or {}
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def seconds(self, service: str) -> float:
+        base = self.latencies_ms.get(service, 0) * self.scale
+        if base <= 0:
+            return 0.0
+        probability, multiplier = self.tails.get(service, (0.0, 1.0))
+        with self.lock:
+            factor = self.random.uniform(1 - self.jitter, 1 + self.jitter)
+            if self.random.random() < probability:
+                factor *= multiplier
+        return base * factor / 1000
+
+    def wait(self, service: str):
+        delay = self.seconds(service)
+        if delay:
+            time.sleep(delay)
+
+
+def wire_format(value: Any) -> Dict[str, Any]:
+    """A Python value as a raw DynamoDB AttributeValue, as the wire protocol carries it."""
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': str(value)}
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, (bytes, bytearray, Binary)):
+        return {'B': bytes(value)}
+    if isinstance(value, dict):
+        return {'M': {key: wire_format(item) for key, item in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [wire_format(item) for item in value]}
+    return {'NULL': True}
+
+
+class Binary:
+    """Like boto3.dynamodb.types.Binary: how the resource API returns binary attributes."""
+
+    def __init__(self, value: bytes):
+        self.value = bytes(value)
+
+    def __bytes__(self) -> bytes:
+        return self.value
+
+    def __eq__(self, other: Any) -> bool:
+        return bytes(self) == bytes(other) if isinstance(other, (Binary, bytes, bytearray)) else NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+
+def stored_value(value: Any) -> Any:
+    """A value as the resource API stores and returns it.
+
+    Numbers come back as Decimal and binary as Binary; floats are rejected
+    with the same TypeError boto3 raises.
+    """
+    if isinstance(value, float):
+        raise TypeError('Float types are not supported. Use Decimal types instead.')
+    if isinstance(value, bool) or value is None or isinstance(value, (str, Binary)):
+        return value
+    if isinstance(value, (int, Decimal)):
+        return Decimal(value)
+    if isinstance(value, (bytes, bytearray)):
+        return Binary(value)
+    if isinstance(value, dict):
+        return {key: stored_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [stored_value(item) for item in value]
+    raise TypeError(f'Unsupported type "{type(value)}" for value "{value}"')
+
+
+class ConditionalCheckFailed(Exception):
+    """Shaped like botocore's ClientError for a failed condition.
+
+    Like the real resource API, the old item (when requested) is left in
+    raw AttributeValue form: error responses are not deserialized.
+    """
+
+    def __init__(self, item: Optional[Dict[str, Any]]):
+        super().__init__('ConditionalCheckFailedException')
+        self.response: Dict[str, Any] = {'Error': {'Code': 'ConditionalCheckFailedException'}}
+        if item is not None:
+            self.response['Item'] = {name: wire_format(value) for name, value in item.items()}
+
+
+class Throttled(Exception):
+    """Shaped like botocore's ClientError for a throttled call."""
+
+    def __init__(self, operation: str):
+        super().__init__(f'ThrottlingException: Rate exceeded ({operation})')
+        self.response = {'Error': {'Code': 'ThrottlingException'}, 'ResponseMetadata': {'HTTPStatusCode': 400}}
+
+
+class ServiceQuota:
+    """Account-wide calls-per-second limits, enforced like AWS does.
+
+    Each operation listed in limits gets a token bucket holding one second
+    of calls; a call that finds it empty is throttled. Operations not listed
+    are unlimited.
+    """
+
+    def __init__(self, limits: Dict[str, float]):
+        self.limits = limits
+        self.tokens = dict(limits)
+        self.refilled_at = {operation: time.monotonic() for operation in limits}
+        self.throttled: Dict[str, int] = {}
+        self.allowed: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def check(self, operation: str):
+        rate = self.limits.get(operation)
+        if rate is None:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens[operation] = min(rate, self.tokens[operation] + (now - self.refilled_at[operation]) * rate)
+            self.refilled_at[operation] = now
+            if self.tokens[operation] < 1:
+                self.throttled[operation] = self.throttled.get(operation, 0) + 1
+                raise Throttled(operation)
+            self.tokens[operation] -= 1
+            self.allowed[operation] = self.allowed.get(operation, 0) + 1
+
+
+class FakeTable:
+    """In-memory DynamoDB Table keyed on a hash key and an optional range key.
+
+    Items are kept in the types the resource API returns (see stored_value).
+
+    Condition and key condition expressions are not parsed; the only
+    conditional write the handler makes (the coalescing lease) is evaluated
+    by its meaning, and query matches the hash key only.
+    """
+
+    def __init__(self, name: str, key: str, latency: Latency, range_key: Optional[str] = None):
+        self.name = name
+        self.key = key
+        self.range_key = range_key
+        self.latency = latency
+        self.items: Dict[Any, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def item_key(self, item: Dict[str, Any]) -> Any:
+        return (item[self.key], item[self.range_key]) if self.range_key else item[self.key]
+
+    def get_item(self, Key: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self.latency.wait('dynamodb')
+        item = self.items.get(self.item_key(Key))
+        return {'Item': dict(item)} if item is not None else {}
+
+    def put_item(
+        self,
+        Item: Dict[str, Any],
+        ConditionExpression: Optional[str] = None,
+        ExpressionAttributeValues: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        self.latency.wait('dynamodb')
+        with self.lock:
+            current = self.items.get(self.item_key(Item))
+            if ConditionExpression and current and current.get('lease_expires', 0) >= ExpressionAttributeValues[':now']:
+                returned = current if kwargs.get('ReturnValuesOnConditionCheckFailure') == 'ALL_OLD' else None
+                raise ConditionalCheckFailed(returned)
+            self.items[self.item_key(Item)] = stored_value(Item)
+        return {}
+
+    def update_item(self, Key: Dict[str, Any], UpdateExpression: str, ExpressionAttributeValues: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Apply a 'SET a = :x, b = :y' update."""
+        self.latency.wait('dynamodb')
+        with self.lock:
+            item = self.items.setdefault(self.item_key(Key), stored_value(Key))
+            for assignment in UpdateExpression.replace('SET ', '', 1).split(','):
+                name, value = (part.strip() for part in assignment.split('='))
+                item[name] = stored_value(ExpressionAttributeValues[value])
+        return {}
+
+    def scan(self, ExclusiveStartKey: Optional[Dict[str, Any]] = None, Limit: int = 1000, **kwargs) -> Dict[str, Any]:
+        self.latency.wait('dynamodb')
+        keys = sorted(self.items, key=str)
+        start = 0
+        if ExclusiveStartKey:
+            start = keys.index(ExclusiveStartKey[self.key]) + 1
+        page = keys[start:start + Limit]
+        response: Dict[str, Any] = {'Items': [dict(self.items[k]) for k in page]}
+        if start + Limit < len(keys):
+            response['LastEvaluatedKey'] = {self.key: page[-1]}
+        return response
+
+    def query(
+        self,
+        ExpressionAttributeValues: Dict[str, Any],
+        ScanIndexForward: bool = True,
+        Limit: int = 1000,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Items whose hash key equals the one value in ExpressionAttributeValues, by range key."""
+        self.latency.wait('dynamodb')
+        (value,) = ExpressionAttributeValues.values()
+        with self.lock:
+            matches = [dict(item) for item in self.items.values() if item[self.key] == value]
+        matches.sort(key=lambda item: item[self.range_key], reverse=not ScanIndexForward)
+        return {'Items': matches[:Limit]}
+
+
+class FakeDynamoDB:
+    """DynamoDB service resource: tables are created on first reference."""
+
+    KEYS = {'pipelines': 'pipeline_name', 'conversations': 'conversation_id', 'cache': 'cache_key'}
+    RANGE_KEYS = {'conversations': 'timestamp'}
+
+    def __init__(self, latency: Latency, table_names: Dict[str, str]):
+        self.latency = latency
+        self.tables = {
+            name: FakeTable(name, self.KEYS[kind], latency, self.RANGE_KEYS.get(kind)) for kind, name in table_names.items()
+        }
+
+    def Table(self, name: str) -> FakeTable:
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self.latency.wait('dynamodb')
+        responses: Dict[str, List[Dict[str, Any]]] = {}
+        for name, request in RequestItems.items():
+            table = self.tables[name]
+            found = [table.items.get(key[table.key]) for key in request['Keys']]
+            responses[name] = [dict(item) for item in found if item is not None]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+    def batch_write_item(self, RequestItems: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self.latency.wait('dynamodb')
+        for name, requests in RequestItems.items():
+            table = self.tables[name]
+            with table.lock:
+                for request in requests:
+                    item = request['PutRequest']['Item']
+                    table.items[table.item_key(item)] = stored_value(item)
+        return {'UnprocessedItems': {}}
+
+
+class SyntheticLogGroup:
+    """events evenly spread over the hours before anchor_ms, generated by index."""
+
+    def __init__(self, events: int, hours: float, anchor_ms: int):
+        self.events = events
+        self.start_ms = anchor_ms - int(hours * 3600 * 1000)
+        self.step_ms = max(1, int(hours * 3600 * 1000) // max(1, events))
+
+    def index_range(self, start_ms: int, end_ms: int) -> range:
+        first = max(0, -(-(start_ms - self.start_ms) // self.step_ms))
+        last = min(self.events, -(-(end_ms - self.start_ms) // self.step_ms))
+        return range(first, max(first, last))
+
+    def timestamp(self, index: int) -> int:
+        return self.start_ms + index * self.step_ms
+
+    def message(self, index: int) -> str:
+        template = LOG_TEMPLATES[index % len(LOG_TEMPLATES)]
+        return template.format(n=(index * 7919) % 100000, id=f'{index * 2654435761 % 2**32:08x}')
+
+    def event(self, index: int) -> Dict[str, Any]:
+        return {
+            'eventId': str(index),
+            'logStreamName': f'stream-{index % 4}',
+            'timestamp': self.timestamp(index),
+            'ingestionTime': self.timestamp(index) + 500,
+            'message': self.message(index)
+        }
+
+
+def insights_timestamp(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+class FakeLogs:
+    """CloudWatch Logs client over synthetic log groups.
+
+    Every synthetic event is an error line, so filter patterns are accepted
+    but not evaluated. Logs Insights queries complete on the first poll with
+    results computed from the index arithmetic rather than by scanning.
+    """
+
+    def __init__(self, latency: Latency, groups: Dict[str, SyntheticLogGroup], quota: Optional[ServiceQuota] = None):
+        self.latency = latency
+        self.groups = groups
+        self.quota = quota or ServiceQuota({})
+        self.queries: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def filter_log_events(
+        self,
+        logGroupName: str,
+        startTime: int,
+        endTime: int,
+        limit: int = 10000,
+        nextToken: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        self.latency.wait('logs')
+        self.quota.check('FilterLogEvents')
+        group = self.groups[logGroupName]
+        indices = group.index_range(startTime, endTime)
+        first = int(nextToken) if nextToken else indices.start
+        last = min(indices.stop, first + min(limit, 10000))
+        response: Dict[str, Any] = {'events': [group.event(i) for i in range(first, last)]}
+        if last < indices.stop:
+            response['nextToken'] = str(last)
+        return response
+
+    def start_query(self, logGroupName: str, startTime: int, endTime: int, queryString: str, **kwargs) -> Dict[str, Any]:
+        self.latency.wait('logs')
+        self.quota.check('StartQuery')
+        with self.lock:
+            query_id = f'query-{len(self.queries)}'
+            self.queries[query_id] = {
+                'group': self.groups[logGroupName],
+                'start_ms': startTime * 1000,
+                'end_ms': endTime * 1000,
+                'query': queryString
+            }
+        return {'queryId': query_id}
+
+    def get_query_results(self, queryId: str) -> Dict[str, Any]:
+        self.latency.wait('logs')
+        self.quota.check('GetQueryResults')
+        query = self.queries[queryId]
+        group = query['group']
+        indices = group.index_range(query['start_ms'], query['end_ms'])
+        if ' by bin(' in query['query']:
+            rows = self._histogram(group, indices, query['query'])
+        elif ', bin(' in query['query']:
+            rows = [
+                row + [{'field': 'bucket', 'value': insights_timestamp(bucket)}]
+                for bucket, span in self._bins(group, indices, query['query'].split(', bin(')[1])
+                for row in self._messages(group, span)
+            ]
+        else:
+            rows = self._messages(group, indices)
+        return {'status': 'Complete', 'results': rows}
+
+    def stop_query(self, queryId: str) -> Dict[str, Any]:
+        return {'success': True}
+
+    @staticmethod
+    def _messages(group: SyntheticLogGroup, indices: range) -> List[List[Dict[str, str]]]:
+        rows = []
+        for offset in range(min(len(LOG_TEMPLATES), len(indices))):
+            first = indices.start + offset
+            count = len(range(first, indices.stop, len(LOG_TEMPLATES)))
+            last = first + (count - 1) * len(LOG_TEMPLATES)
+            rows.append([
+                {'field': 'message_key', 'value': group.message(first)[:200]},
+                {'field': 'event_count', 'value': str(count)},
+                {'field': 'first_seen', 'value': insights_timestamp(group.timestamp(first))},
+                {'field': 'last_seen', 'value': insights_timestamp(group.timestamp(last))},
+                {'field': 'example', 'value': group.message(first)},
+            ])
+        rows.sort(key=lambda row: -int(row[1]['value']))
+        return rows
+
+    @staticmethod
+    def _bins(group: SyntheticLogGroup, indices: range, bin_clause: str) -> Iterator[Tuple[int, range]]:
+        """(bin start, event indices) of each non-empty bin; bin_clause starts with e.g. '60m)'."""
+        bin_ms = int(bin_clause.split('m)')[0]) * 60 * 1000
+        if not indices:
+            return
+        bucket = group.timestamp(indices.start) // bin_ms * bin_ms
+        while bucket <= group.timestamp(indices.stop - 1):
+            in_bucket = group.index_range(bucket, bucket + bin_ms)
+            span = range(max(in_bucket.start, indices.start), min(in_bucket.stop, indices.stop))
+            if span:
+                yield bucket, span
+            bucket += bin_ms
+
+    @classmethod
+    def _histogram(cls, group: SyntheticLogGroup, indices: range, query: str) -> List[List[Dict[str, str]]]:
+        return [
+            [
+                {'field': 'bucket', 'value': insights_timestamp(bucket)},
+                {'field': 'event_count', 'value': str(len(span))},
+            ]
+            for bucket, span in cls._bins(group, indices, query.split(' by bin(')[1])
+        ]
+
+
+class FakeStepFunctions:
+    """Step Functions client with failed_executions FAILED executions per state machine."""
+
+    def __init__(
+        self,
+        latency: Latency,
+        failed_executions: int,
+        history_events: int,
+        anchor_ms: int,
+        quota: Optional[ServiceQuota] = None
+    ):
+        self.latency = latency
+        self.quota = quota or ServiceQuota({})
+        self.failed_executions = failed_executions
+        self.history_events = history_events
+        self.anchor = datetime.fromtimestamp(anchor_ms / 1000, tz=timezone.utc)
+
+    def list_executions(self, stateMachineArn: str, maxResults: int = 100, statusFilter: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self.latency.wait('stepfunctions')
+        self.quota.check('ListExecutions')
+        if statusFilter not in (None, 'FAILED'):
+            return {'executions': []}
+        executions = []
+        for i in range(min(maxResults, self.failed_executions)):
+            started = self.anchor - timedelta(minutes=30 * (i + 1))
+            executions.append({
+                'executionArn': f"{stateMachineArn.replace(':stateMachine:', ':execution:')}:run-{i}",
+                'stateMachineArn': stateMachineArn,
+                'name': f'run-{i}',
+                'status': 'FAILED',
+                'startDate': started,
+                'stopDate': started + timedelta(minutes=5)
+            })
+        return {'executions': executions}
+
+    def describe_execution(self, executionArn: str) -> Dict[str, Any]:
+        self.latency.wait('stepfunctions')
+        self.quota.check('DescribeExecution')
+        return {'executionArn': executionArn, 'status': 'FAILED', 'startDate': self.anchor}
+
+    def get_execution_history(
+        self,
+        executionArn: str,
+        maxResults: int = 100,
+        reverseOrder: bool = False,
+        nextToken: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        self.latency.wait('stepfunctions')
+        self.quota.check('GetExecutionHistory')
+        events = self._history(executionArn)
+        if reverseOrder:
+            events.reverse()
+        first = int(nextToken) if nextToken else 0
+        response: Dict[str, Any] = {'events': events[first:first + maxResults]}
+        if first + maxResults < len(events):
+            response['nextToken'] = str(first + maxResults)
+        return response
+
+    def _history(self, execution_arn: str) -> List[Dict[str, Any]]:
+        # Successful task states, then the failing one and the execution failure
+        events: List[Dict[str, Any]] = [{'id': 1, 'type': 'ExecutionStarted', 'executionStartedEventDetails': {}}]
+        for i in range(max(0, self.history_events - 5) // 2):
+            events.append({'id': len(events) + 1, 'type': 'TaskStateEntered', 'stateEnteredEventDetails': {'name': f'Step{i}'}})
+            events.append({'id': len(events) + 1, 'type': 'TaskStateExited', 'stateExitedEventDetails': {'name': f'Step{i}'}})
+        events.append({'id': len(events) + 1, 'type': 'TaskStateEntered', 'stateEnteredEventDetails': {'name': 'LoadWarehouse'}})
+        events.append({'id': len(events) + 1, 'type': 'TaskFailed', 'taskFailedEventDetails': {
+            'error': 'States.TaskFailed', 'cause': f'Redshift COPY failed for {execution_arn}: S3ServiceException Access Denied'
+        }})
+        events.append({'id': len(events) + 1, 'type': 'ExecutionFailed', 'executionFailedEventDetails': {
+            'error': 'States.TaskFailed', 'cause': 'Task LoadWarehouse failed'
+        }})
+        return events
+
+
+LLM_REPLY = (
+    "1) Summary\nThe pipeline is failing while loading the warehouse.\n\n"
+    "2) Evidence\n- Repeated connection timeouts and Access Denied errors.\n\n"
+    "3) Probable cause\nThe load role lost read access to the input bucket.\n\n"
+    "4) Recommended next steps\n- Check the bucket policy and the role's S3 permissions."
+)
+
+
+class Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeOpenAI:
+    """OpenAI client exposing chat.completions.create, streaming or not."""
+
+    def __init__(self, latency: Latency, chunks: int = 40):
+        self.latency = latency
+        self.chunks = chunks
+        self.chat = Namespace(completions=Namespace(create=self.create))
+
+    def create(self, messages: List[Dict[str, str]], stream: bool = False, **kwargs) -> Any:
+        prompt_tokens = sum(len(message['content']) for message in messages) // 4
+        usage = Namespace(prompt_tokens=prompt_tokens, completion_tokens=len(LLM_REPLY) // 4)
+        if stream:
+            return self._stream(usage)
+        self.latency.wait('openai')
+        return Namespace(
+            choices=[Namespace(message=Namespace(content=LLM_REPLY))],
+            usage=usage
+        )
+
+    def _stream(self, usage: Any) -> Iterator[Any]:
+        delay = self.latency.seconds('openai') / self.chunks
+        for piece in split_reply(self.chunks):
+            time.sleep(delay)
+            yield Namespace(choices=[Namespace(delta=Namespace(content=piece))], usage=None)
+        yield Namespace(choices=[], usage=usage)
+
+
+class FakeBedrock:
+    """bedrock-runtime client for the Anthropic messages format."""
+
+    def __init__(self, latency: Latency, chunks: int = 40):
+        self.latency = latency
+        self.chunks = chunks
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        self.latency.wait('bedrock')
+        payload = {
+            'content': [{'type': 'text', 'text': LLM_REPLY}],
+            'usage': {'input_tokens': len(body) // 4, 'output_tokens': len(LLM_REPLY) // 4}
+        }
+        return {'body': io.BytesIO(json.dumps(payload).encode('utf-8'))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        return {'body': self._stream(len(body) // 4)}
+
+    def _stream(self, input_tokens: int) -> Iterator[Dict[str, Any]]:
+        delay = self.latency.seconds('bedrock') / self.chunks
+        yield self._chunk({'type': 'message_start', 'message': {'usage': {'input_tokens': input_tokens}}})
+        for piece in split_reply(self.chunks):
+            time.sleep(delay)
+            yield self._chunk({'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': piece}})
+        yield self._chunk({'type': 'message_delta', 'usage': {'output_tokens': len(LLM_REPLY) // 4}})
+
+    @staticmethod
+    def _chunk(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {'chunk': {'bytes': json.dumps(data).encode('utf-8')}}
+
+
+def split_reply(chunks: int) -> List[str]:
+    size = max(1, -(-len(LLM_REPLY) // chunks))
+    return [LLM_REPLY[i:i + size] for i in range(0, len(LLM_REPLY), size)]
+
+
+def build_clients(scenario: Dict[str, Any], table_names: Dict[str, str], latency_scale: float = 1.0) -> Dict[str, Any]:
+    """Create the stand-in clients for a scenario and seed its pipeline catalog.
+
+    Returns a dict suitable for handler.clients, keyed like handler.get_client.
+    """
+    latency = Latency(scenario.get('latency_ms', {}), scale=latency_scale, tails=scenario.get('latency_tails'))
+    quota = ServiceQuota(scenario.get('api_quotas', {}))
+    anchor_ms = int(time.time() * 1000)
+    dynamodb = FakeDynamoDB(latency, table_names)
+    groups: Dict[str, SyntheticLogGroup] = {}
+    pipelines = dynamodb.Table(table_names['pipelines'])
+    for i in range(scenario.get('pipelines', 1)):
+        name = f'bench-pipeline-{i}'
+        item: Dict[str, Any] = {'pipeline_name': name}
+        if scenario.get('log_events'):
+            item['log_group'] = f'/aws/bench/{name}'
+            groups[item['log_group']] = SyntheticLogGroup(
+                scenario['log_events'], scenario.get('log_hours', 24), anchor_ms
+            )
+        if scenario.get('failed_executions'):
+            item['state_machine_arn'] = f'arn:aws:states:us-east-1:000000000000:stateMachine:{name}'
+        if scenario.get('log_backend'):
+            item['log_backend'] = scenario['log_backend']
+        pipelines.items[name] = item
+
+    return {
+        'dynamodb': dynamodb,
+        'logs': FakeLogs(latency, groups, quota),
+        'stepfunctions': FakeStepFunctions(
+            latency, scenario.get('failed_executions', 0), scenario.get('history_events', 40), anchor_ms, quota
+        ),
+        'openai': FakeOpenAI(latency),
+        'bedrock-runtime': FakeBedrock(latency),
+    }
@@ -0,0 +1,71 @@
+"""
+Tests for batch analysis: every pipeline gets a result, in request order,
+and one failing, missing or slow pipeline never fails the batch.
+"""
+import time
+
+import handler
+
+
+def test_batch_reports_missing_pipelines_and_keeps_request_order(aws):
+    aws(pipelines=2, log_events=100, failed_executions=1)
+
+    results = handler.analyze_pipelines_batch(['bench-pipeline-1', 'missing', 'bench-pipeline-0'], 24)
+
+    assert [(result['pipeline_name'], result['status']) for result in results] == [
+        ('bench-pipeline-1', 'ok'), ('missing', 'not_found'), ('bench-pipeline-0', 'ok')
+    ]
+    assert results[0]['report']['pipeline_name'] == 'bench-pipeline-1'
+    assert results[1]['error'] == 'Pipeline not found in catalog'
+
+
+def test_failing_pipeline_is_reported_as_an_error(aws, monkeypatch):
+    aws(pipelines=2)
+    analyze = handler.analyze_pipeline
+
+    def failing_first(name, *args):
+        if name == 'bench-pipeline-0':
+            raise RuntimeError('boom')
+        return analyze(name, *args)
+
+    monkeypatch.setattr(handler, 'analyze_pipeline', failing_first)
+
+    results = handler.analyze_pipelines_batch(['bench-pipeline-0', 'bench-pipeline-1'], 24)
+
+    assert [result['status'] for result in results] == ['error', 'ok']
+    assert results[0]['error'] == 'Analysis failed'
+
+
+def test_catalog_entries_that_could_not_be_read_are_errors(aws, monkeypatch):
+    aws(pipelines=2)
+    read = handler.get_pipeline_infos
+    monkeypatch.setattr(handler, 'get_pipeline_infos', lambda names: {
+        name: info for name, info in read(names).items() if name != 'bench-pipeline-1'
+    })
+
+    results = handler.analyze_pipelines_batch(['bench-pipeline-0', 'bench-pipeline-1'], 24)
+
+    assert [result['status'] for result in results] == ['ok', 'error']
+    assert results[1]['error'] == 'Could not load catalog entry'
+
+
+def test_slow_pipeline_times_out_and_marks_the_batch_partial(aws, monkeypatch):
+    aws(pipelines=2)
+    analyze = handler.analyze_pipeline
+
+    def slow_second(name, *args):
+        if name == 'bench-pipeline-1':
+            # Abandoned by the batch; returns after the test without touching AWS
+            time.sleep(1.5)
+            return {}
+        return analyze(name, *args)
+
+    monkeypatch.setattr(handler, 'analyze_pipeline', slow_second)
+    deadline = handler.RequestDeadline(handler.DEADLINE_SAFETY_MS + 1100)
+    started = time.monotonic()
+
+    body = handler.handle_batch_request({'pipeline_names': ['bench-pipeline-0', 'bench-pipeline-1']}, 'c1', deadline)
+
+    assert time.monotonic() - started < 1.0
+    assert [result['status'] for result in body['results']] == ['ok', 'timeout']
+    assert body['partial'] is True
@@ -0,0 +1,99 @@
+"""
+Tests for the pipeline catalog cache and its background preload.
+"""
+import threading
+import time
+
+import pytest
+
+import handler
+from run_benchmarks import TABLE_NAMES
+
+
+class SlowScans:
+    """Wraps a stand-in table: scans wait for release; calls are counted."""
+
+    def __init__(self, table):
+        self.table = table
+        self.release = threading.Event()
+        self.scans = 0
+        self.gets = 0
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def scan(self, **kwargs):
+        self.scans += 1
+        self.release.wait(2)
+        return self.table.scan(**kwargs)
+
+    def get_item(self, **kwargs):
+        self.gets += 1
+        return self.table.get_item(**kwargs)
+
+
+@pytest.fixture
+def catalog(aws, monkeypatch):
+    """Three pipelines, preload enabled and no preload yet; returns the wrapped table."""
+    clients = aws(pipelines=3)
+    table = SlowScans(clients['dynamodb'].Table(TABLE_NAMES['pipelines']))
+    monkeypatch.setitem(clients['dynamodb'].tables, TABLE_NAMES['pipelines'], table)
+    monkeypatch.setattr(handler, 'CATALOG_PRELOAD', True)
+    monkeypatch.setattr(handler, 'catalog_preload_state', {'complete_until': 0.0, 'refresh_after': 0.0, 'lock': threading.Lock()})
+    monkeypatch.setattr(handler, 'pipeline_index_state', {'index': None, 'fresh_until': 0.0, 'lock': threading.Lock()})
+    yield table
+    table.release.set()
+    wait_for_preload()
+
+
+def wait_for_preload():
+    """Block until a running preload finishes (it holds the lock throughout)."""
+    with handler.catalog_preload_state['lock']:
+        pass
+
+
+def test_lookup_does_not_wait_for_the_preload(catalog):
+    started = time.monotonic()
+
+    assert handler.get_pipeline_info('bench-pipeline-1')['pipeline_name'] == 'bench-pipeline-1'
+
+    assert time.monotonic() - started < 0.5
+    assert catalog.gets == 1
+    catalog.release.set()
+    wait_for_preload()
+    assert catalog.scans == 1
+
+
+def test_after_the_preload_misses_need_no_get_item(catalog):
+    catalog.release.set()
+    handler.refresh_pipeline_catalog()
+    wait_for_preload()
+
+    assert handler.get_pipeline_info('bench-pipeline-2')['pipeline_name'] == 'bench-pipeline-2'
+    assert handler.get_pipeline_info('unknown') is None
+    assert catalog.gets == 0
+    assert len(handler.pipeline_index_state['index']) == 3
+
+
+def test_old_copy_is_served_while_a_refresh_runs(catalog):
+    catalog.release.set()
+    handler.refresh_pipeline_catalog()
+    wait_for_preload()
+    catalog.release.clear()
+    handler.catalog_preload_state['refresh_after'] = 0.0
+
+    assert handler.get_pipeline_info('unknown') is None
+    assert handler.get_pipeline_info('bench-pipeline-0')['pipeline_name'] == 'bench-pipeline-0'
+
+    assert catalog.scans == 2
+    assert catalog.gets == 0
+
+
+def test_only_one_refresh_runs_at_a_time(catalog):
+    for _ in range(5):
+        handler.refresh_pipeline_catalog()
+
+    assert catalog.scans <= 1
+    catalog.release.set()
+    wait_for_preload()
+    assert catalog.scans == 1
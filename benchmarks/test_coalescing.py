@@ -0,0 +1,154 @@
+"""
+Tests for request coalescing: SingleFlight within a container and the
+lease item that shares one answer across containers.
+"""
+import threading
+import time
+
+import pytest
+
+import handler
+
+
+# SingleFlight
+
+def test_concurrent_callers_share_the_leaders_run():
+    flight = handler.SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        release.wait(1)
+        return 'answer'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', work))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(runs) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {result for result, _ in results} == {'answer'}
+    assert flight.calls == {}
+
+
+def test_leader_failure_reaches_the_waiters():
+    flight = handler.SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError('boom')
+
+    def call():
+        try:
+            flight.do('key', failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(1)
+    call()
+    leader.join()
+
+    assert errors == ['boom', 'boom']
+
+
+def test_waiter_that_times_out_runs_the_work_itself():
+    flight = handler.SingleFlight()
+    started = threading.Event()
+    leader = threading.Thread(target=flight.do, args=('key', lambda: started.set() or time.sleep(0.3)))
+    leader.start()
+    started.wait(1)
+
+    assert flight.do('key', lambda: 'own', timeout=0.01) == ('own', False)
+    leader.join()
+
+
+def test_different_keys_do_not_wait_on_each_other():
+    flight = handler.SingleFlight()
+    started = threading.Event()
+    leader = threading.Thread(target=flight.do, args=('a', lambda: started.set() or time.sleep(0.3)))
+    leader.start()
+    started.wait(1)
+
+    assert flight.do('b', lambda: 'b') == ('b', False)
+    leader.join()
+
+
+# Lease item in the cache table
+
+@pytest.fixture
+def cache_table(aws):
+    clients = aws()
+    return clients['dynamodb'].Table(handler.CACHE_TABLE)
+
+
+def test_second_container_finds_the_running_lease(cache_table):
+    assert handler.acquire_flight_lease('flight#k', 'owner-a', 10) == (True, None)
+
+    acquired, item = handler.acquire_flight_lease('flight#k', 'owner-b', 10)
+
+    assert acquired is False
+    assert item['lease_owner'] == 'owner-a'
+    assert int(item['lease_expires']) > time.time() * 1000
+
+
+def test_expired_lease_can_be_taken_over(cache_table):
+    handler.acquire_flight_lease('flight#k', 'owner-a', 10)
+    handler.release_flight_lease('flight#k', 'owner-a')
+
+    assert handler.acquire_flight_lease('flight#k', 'owner-b', 10) == (True, None)
+    assert cache_table.items['flight#k']['lease_owner'] == 'owner-b'
+
+
+def test_waiter_receives_the_published_result(cache_table):
+    handler.acquire_flight_lease('flight#k', 'owner-a', 10)
+    _, item = handler.acquire_flight_lease('flight#k', 'owner-b', 10)
+    threading.Timer(0.05, handler.publish_flight_result, args=('flight#k', 'owner-a', {'response': 'shared'})).start()
+
+    assert handler.wait_for_flight('flight#k', item, 2) == {'response': 'shared'}
+
+
+def test_waiter_gives_up_when_the_lease_is_released_without_a_result(cache_table):
+    handler.acquire_flight_lease('flight#k', 'owner-a', 10)
+    _, item = handler.acquire_flight_lease('flight#k', 'owner-b', 10)
+    threading.Timer(0.05, handler.release_flight_lease, args=('flight#k', 'owner-a')).start()
+    started = time.monotonic()
+
+    assert handler.wait_for_flight('flight#k', item, 2) is None
+    assert time.monotonic() - started < 1
+
+
+def test_duplicate_in_another_container_gets_the_shared_answer(cache_table, monkeypatch):
+    answers = []
+
+    def answer(pipeline_name, hours_back, message, deadline, memory=None):
+        answers.append(pipeline_name)
+        time.sleep(0.1)
+        return {'response': f'answer for {pipeline_name}'}
+
+    monkeypatch.setattr(handler, 'answer_pipeline_question', answer)
+    results = []
+
+    def container():
+        deadline = handler.RequestDeadline(handler.DEADLINE_SAFETY_MS + 5000)
+        results.append(handler.answer_across_containers('flight#k', 'orders', 24, 'why?', deadline))
+
+    # Separate threads stand in for containers: answer_across_containers skips SingleFlight
+    threads = [threading.Thread(target=container) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert answers == ['orders']
+    assert sorted(result.get('coalesced', 'leader') for result in results) == ['leader', 'shared']
@@ -0,0 +1,180 @@
+"""
+Tests for conversation persistence: the PersistQueue writer, compressed
+responses and the memory read-through of queued turns.
+"""
+import json
+import threading
+import time
+
+import pytest
+
+import handler
+from run_benchmarks import TABLE_NAMES
+
+
+class RecordingBatches:
+    """Wraps the stand-in DynamoDB resource, recording each BatchWriteItem.
+
+    The first call waits for release, so puts made meanwhile pile up in
+    the queue; failing_calls makes that many calls return every item as
+    unprocessed.
+    """
+
+    def __init__(self, dynamodb, failing_calls=0):
+        self.dynamodb = dynamodb
+        self.batches = []
+        self.release = threading.Event()
+        self.failing_calls = failing_calls
+
+    def __getattr__(self, name):
+        return getattr(self.dynamodb, name)
+
+    def batch_write_item(self, RequestItems):
+        self.release.wait(2)
+        (name, requests), = RequestItems.items()
+        self.batches.append([request['PutRequest']['Item'] for request in requests])
+        if self.failing_calls:
+            self.failing_calls -= 1
+            return {'UnprocessedItems': RequestItems}
+        return self.dynamodb.batch_write_item(RequestItems=RequestItems)
+
+
+@pytest.fixture
+def queue(aws, monkeypatch):
+    """A fresh PersistQueue on the stand-in conversations table; returns (queue, recorder, table)."""
+    def install(failing_calls=0):
+        clients = aws()
+        recorder = RecordingBatches(clients['dynamodb'], failing_calls)
+        monkeypatch.setitem(clients, 'dynamodb', recorder)
+        monkeypatch.setattr(handler, 'GOVERNOR_BACKOFF_BASE', 0.0)
+        persist = handler.PersistQueue(TABLE_NAMES['conversations'], 100)
+        monkeypatch.setattr(handler, 'persist_queue', persist)
+        return persist, recorder, clients['dynamodb'].Table(TABLE_NAMES['conversations'])
+    return install
+
+
+def item(timestamp, conversation_id='c1', **fields):
+    return dict({'conversation_id': conversation_id, 'timestamp': timestamp, 'user_message': f'q{timestamp}'}, **fields)
+
+
+def test_queued_items_are_written_in_batches_of_at_most_25(queue):
+    persist, recorder, table = queue()
+    for timestamp in range(1, 41):
+        persist.put(item(timestamp))
+    recorder.release.set()
+
+    assert persist.flush(2)
+    sizes = [len(batch) for batch in recorder.batches]
+    # The writer may take the first item alone before the others are queued
+    assert sum(sizes) == 40 and max(sizes) == 25 and len(sizes) <= 3
+    assert len(table.items) == 40
+
+
+def test_items_with_the_same_key_in_a_batch_collapse_to_the_latest(queue):
+    persist, recorder, table = queue()
+    persist.put(item(1))
+    time.sleep(0.05)
+    persist.put(item(2, user_message='first'))
+    persist.put(item(2, user_message='second'))
+    recorder.release.set()
+
+    assert persist.flush(2)
+    assert [len(batch) for batch in recorder.batches] == [1, 1]
+    assert table.items[('c1', 2)]['user_message'] == 'second'
+
+
+def test_unprocessed_items_are_retried(queue):
+    persist, recorder, table = queue(failing_calls=2)
+    recorder.release.set()
+    persist.put(item(1))
+
+    assert persist.flush(2)
+    assert len(recorder.batches) == 3
+    assert ('c1', 1) in table.items
+
+
+def test_items_are_given_up_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(handler, 'PERSIST_MAX_ATTEMPTS', 2)
+    persist, recorder, table = queue(failing_calls=5)
+    recorder.release.set()
+    persist.put(item(1))
+
+    assert persist.flush(2)
+    assert len(recorder.batches) == 2
+    assert table.items == {}
+
+
+def test_pending_lists_queued_and_in_flight_items_of_one_conversation(queue):
+    persist, recorder, table = queue()
+    persist.put(item(1))
+    persist.put(item(2))
+    persist.put(item(3, conversation_id='c2'))
+    time.sleep(0.05)
+
+    assert [int(pending['timestamp']) for pending in persist.pending('c1')] == [1, 2]
+    recorder.release.set()
+    assert persist.flush(2)
+    assert persist.pending('c1') == []
+
+
+def test_long_responses_are_stored_compressed_and_read_back(queue):
+    persist, recorder, table = queue()
+    recorder.release.set()
+    long_answer = 'The load role lost read access to the input bucket. ' * 100
+
+    handler.save_conversation('c1', 'why?', long_answer, 'orders')
+    time.sleep(0.002)
+    handler.save_conversation('c1', 'and now?', 'Short answer.', 'orders')
+    assert persist.flush(2)
+
+    stored = sorted(table.items.values(), key=lambda stored_item: stored_item['timestamp'])
+    assert 'agent_response' not in stored[0]
+    assert len(bytes(stored[0]['agent_response_z'])) < len(long_answer) // 10
+    assert handler.turn_response(stored[0]) == long_answer
+    assert stored[1]['agent_response'] == 'Short answer.'
+    assert handler.turn_response(stored[1]) == 'Short answer.'
+
+
+def test_memory_sees_turns_still_queued_for_writing(queue):
+    persist, recorder, table = queue()
+    handler.save_conversation('c1', 'why did orders fail?', 'Access denied.', 'orders')
+    time.sleep(0.002)
+
+    memory = handler.ConversationMemory('c1')
+    handler.save_conversation('c1', 'and now?', 'Still failing.', 'orders')
+
+    assert table.items == {}
+    assert memory.messages() == [
+        {'role': 'user', 'content': 'why did orders fail?'},
+        {'role': 'assistant', 'content': 'Access denied.'},
+    ]
+    recorder.release.set()
+    assert persist.flush(2)
+
+
+def test_each_write_is_logged_as_its_own_metrics_record(queue, capsys):
+    persist, recorder, table = queue(failing_calls=1)
+    recorder.release.set()
+    entries = [{'item': item(timestamp), 'attempts': 0} for timestamp in (1, 2)]
+
+    assert persist.write(entries) == entries
+    assert persist.write(entries) == []
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(record['persist_items'], record['persist_unprocessed']) for record in records] == [(2, 2), (2, 0)]
+    assert records[0]['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [['Service']]
+    assert all(record['persist_write'] >= 0 for record in records)
+
+
+def test_a_stream_closed_early_still_saves_the_turn(aws):
+    clients = aws(log_events=100, failed_executions=1)
+    frames = handler.stream_pipeline_chat('why?', 'c1', 'bench-pipeline-0', 24)
+
+    summary = json.loads(next(frames).split('data: ', 1)[1])['text']
+    frames.close()
+
+    assert handler.persist_queue.flush(2)
+    stored, = clients['dynamodb'].Table(TABLE_NAMES['conversations']).items.values()
+    assert stored['user_message'] == 'why?'
+    # Nothing past the summary was produced, so the turn keeps the formatted report
+    assert handler.turn_response(stored).startswith(summary + '\n\n')
@@ -0,0 +1,453 @@
+"""
+Unit tests for the handler's pure logic: log signature mining, pipeline name
+matching, the API governor, request deadlines, conversation digests, LLM
+cache keys and prompt trimming.
+
+Run with: python -m pytest benchmarks
+"""
+import threading
+import time
+
+import pytest
+
+import handler
+
+
+class Throttled(Exception):
+    """Shaped like botocore's ClientError for a throttled call."""
+
+    def __init__(self):
+        super().__init__('ThrottlingException')
+        self.response = {'Error': {'Code': 'ThrottlingException'}}
+
+
+# LogTemplateMiner
+
+def test_miner_groups_messages_that_differ_in_variable_parts():
+    miner = handler.LogTemplateMiner()
+    miner.add('ERROR Task 1f2e failed: timeout after 3000 ms', 1000)
+    miner.add('ERROR Task 9a0b failed: timeout after 4500 ms', 2000)
+    miner.add('Access denied for arn:aws:iam::123456789012:role/loader', 3000)
+
+    top = miner.top(10)
+    assert [signature['count'] for signature in top] == [2, 1]
+    assert top[0]['signature'] == 'ERROR Task <*> failed: timeout after <NUM> ms'
+    assert (top[0]['first_seen'], top[0]['last_seen']) == (1000, 2000)
+    assert top[1]['signature'] == 'Access denied for <ARN>'
+
+
+def test_miner_evicts_rarest_cluster_at_capacity():
+    miner = handler.LogTemplateMiner(max_clusters=2)
+    for _ in range(3):
+        miner.add('disk full on volume', 1000)
+    miner.add('connection reset by peer', 2000)
+    miner.add('permission denied', 3000)
+
+    assert [signature['signature'] for signature in miner.top(10)] == ['disk full on volume', 'permission denied']
+
+
+def test_miner_expire_drops_old_buckets_and_clamps_first_seen():
+    miner = handler.LogTemplateMiner(time_bucket_ms=1000)
+    miner.add('job failed', 500)
+    miner.add('job failed', 1200)
+    miner.add('job failed', 2500)
+    miner.add('other error', 600)
+
+    miner.expire(1500)
+
+    (signature,) = miner.top(10)
+    assert signature['count'] == 2
+    assert signature['first_seen'] == 1500
+    assert miner.cluster_count == 1
+
+
+def test_miner_export_restore_round_trip():
+    miner = handler.LogTemplateMiner(time_bucket_ms=1000)
+    miner.add('job 7 failed', 500)
+    miner.add('job 8 failed', 1500)
+
+    restored = handler.LogTemplateMiner(time_bucket_ms=1000)
+    exported = miner.export(10)
+    # Checkpoints are JSON, so bucket keys come back as strings
+    exported[0]['time_buckets'] = {str(key): count for key, count in exported[0]['time_buckets'].items()}
+    restored.restore(exported)
+    restored.add('job 9 failed', 1700)
+
+    assert restored.top(10)[0]['count'] == 3
+    assert restored.buckets[(3, 'job')][0]['time_buckets'] == {0: 1, 1000: 2}
+
+
+# PipelineNameIndex and suggestions
+
+def test_index_finds_whole_names_longest_first():
+    index = handler.PipelineNameIndex(['orders', 'orders-sync', 'Customer-ETL'])
+
+    assert index.find('why did orders-sync and customer-etl fail?') == ['Customer-ETL', 'orders-sync']
+    assert index.find('check orders, then orders-sync') == ['orders-sync', 'orders']
+    assert index.find('orders-sync-v2 is down') == []
+    assert 'CUSTOMER-etl' in index and len(index) == 3
+
+
+def test_index_suggests_close_names_closest_first():
+    index = handler.PipelineNameIndex(['customer-etl', 'customer-elt', 'orders-sync'])
+
+    assert index.suggest('custmer-etl') == ['customer-etl']
+    assert index.suggest('customer-etx') == ['customer-etl', 'customer-elt']
+    assert index.suggest('billing') == []
+
+
+@pytest.mark.parametrize('a, b, limit, expected', [
+    ('kitten', 'sitting', 5, 3),
+    ('same', 'same', 1, 0),
+    ('', 'abc', 5, 3),
+    ('abcdef', 'uvwxyz', 2, 3),
+])
+def test_edit_distance(a, b, limit, expected):
+    assert handler.edit_distance(a, b, limit) == expected
+
+
+# ApiGovernor
+
+def test_governor_halves_on_throttle_and_recovers_additively():
+    governor = handler.ApiGovernor('test:Api', rate=10, burst=10, max_concurrency=4)
+
+    assert governor.acquire(0)
+    governor.release(time.monotonic(), throttled=True)
+    assert (governor.rate, governor.concurrency) == (5, 2)
+
+    for _ in range(2):
+        assert governor.acquire(1)
+        governor.release(time.monotonic())
+    assert governor.rate == pytest.approx(6)
+    assert governor.concurrency == 3
+
+
+def test_governor_ignores_throttles_from_calls_started_before_a_decrease():
+    governor = handler.ApiGovernor('test:Api', rate=10, burst=10, max_concurrency=8)
+    started_at = time.monotonic()
+    assert governor.acquire(0) and governor.acquire(0)
+
+    governor.release(started_at, throttled=True)
+    governor.release(started_at, throttled=True)
+
+    assert (governor.rate, governor.concurrency) == (5, 4)
+    assert governor.throttles == 2
+
+
+def test_governor_acquire_times_out_without_a_slot():
+    governor = handler.ApiGovernor('test:Api', rate=100, burst=100, max_concurrency=1)
+    assert governor.acquire(0)
+
+    assert not governor.acquire(0.05)
+    governor.release(time.monotonic())
+    assert governor.acquire(0)
+
+
+@pytest.fixture
+def fast_governor(monkeypatch):
+    """Governed calls with no backoff sleeps and a fresh governor per test."""
+    monkeypatch.setattr(handler, 'GOVERNOR_BACKOFF_BASE', 0.0)
+    monkeypatch.setattr(handler, 'GOVERNOR_MAX_WAIT', 0.01)
+    monkeypatch.setattr(handler, 'api_governors', {})
+
+
+def test_governed_call_retries_throttles(fast_governor, monkeypatch):
+    # A throttle empties the bucket, so the retry waits for the next token
+    monkeypatch.setattr(handler, 'GOVERNOR_MAX_WAIT', 1.0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise Throttled()
+        return 'ok'
+
+    assert handler.governed_call('test:Flaky', flaky) == 'ok'
+    assert len(calls) == 3
+
+
+def test_governed_call_retries_acquire_timeouts_then_raises(fast_governor):
+    governor = handler.get_governor('test:Busy')
+    for _ in range(governor.concurrency):
+        assert governor.acquire(0)
+
+    with pytest.raises(handler.ThrottleError):
+        handler.governed_call('test:Busy', lambda: 'unreachable')
+
+
+def test_governed_call_acquire_timeout_recovers_when_capacity_frees(fast_governor, monkeypatch):
+    monkeypatch.setattr(handler, 'GOVERNOR_BACKOFF_BASE', 0.05)
+    governor = handler.get_governor('test:Busy')
+    for _ in range(governor.concurrency):
+        assert governor.acquire(0)
+    threading.Timer(0.02, governor.release, args=(time.monotonic(),)).start()
+
+    assert handler.governed_call('test:Busy', lambda: 'ok') == 'ok'
+
+
+def test_governed_call_stops_at_the_stage_stop_time(fast_governor, monkeypatch):
+    monkeypatch.setattr(handler, 'GOVERNOR_MAX_WAIT', 5.0)
+    calls = []
+
+    def throttled():
+        calls.append(1)
+        raise Throttled()
+
+    started = time.monotonic()
+    with handler.stage_stop(started + 0.2):
+        with pytest.raises(handler.StageExpired):
+            handler.governed_call('test:Throttled', throttled)
+    # Without the stop time the retries would wait out the emptied bucket
+    assert time.monotonic() - started < 1.0
+    assert 1 <= len(calls) < handler.GOVERNOR_MAX_RETRIES + 1
+
+
+def test_stage_stop_never_extends_an_enclosing_stop_time():
+    with handler.stage_stop(time.monotonic() + 1):
+        outer = handler.stage_stop_at.get()
+        with handler.stage_stop(time.monotonic() + 60):
+            assert handler.stage_stop_at.get() == outer
+    assert handler.stage_stop_at.get() is None
+
+
+# RequestDeadline
+
+def test_deadline_budget_is_weighted_share_of_remaining_time():
+    deadline = handler.RequestDeadline(handler.DEADLINE_SAFETY_MS + 12000)
+    weights = handler.STAGE_WEIGHTS
+
+    assert deadline.budget('catalog') == pytest.approx(12 * weights['catalog'] / sum(weights.values()), abs=0.05)
+    assert deadline.budget('llm') == pytest.approx(deadline.remaining(), abs=0.05)
+
+
+def test_deadline_run_records_overrun():
+    deadline = handler.RequestDeadline(handler.DEADLINE_SAFETY_MS + 10000)
+
+    assert deadline.run('catalog', lambda: 'done') == 'done'
+    assert deadline.run('llm', lambda: time.sleep(0.3), timeout=0.05) is None
+    assert deadline.overrun == ['llm']
+
+
+def test_deadline_from_context_without_remaining_time():
+    deadline = handler.RequestDeadline.from_context(object())
+    expected = (handler.DEFAULT_REQUEST_TIMEOUT_MS - handler.DEADLINE_SAFETY_MS) / 1000
+
+    assert deadline.remaining() == pytest.approx(expected, abs=0.05)
+
+
+# ConversationMemory.fold
+
+def turn(timestamp, question='q', answer='a'):
+    return {'conversation_id': 'c1', 'timestamp': timestamp, 'user_message': question, 'agent_response': answer}
+
+
+@pytest.fixture
+def memory_with(monkeypatch):
+    """A ConversationMemory whose load returns the given digest and turns."""
+    def build(digest, turns):
+        monkeypatch.setattr(handler.ConversationMemory, 'load', lambda self: (digest, turns))
+        return handler.ConversationMemory('c1')
+    return build
+
+
+def test_fold_returns_none_while_turns_fit_the_window(memory_with):
+    memory = memory_with(None, [turn(ts) for ts in range(1, handler.MEMORY_MAX_TURNS)])
+
+    assert memory.fold(turn(handler.MEMORY_MAX_TURNS)) is None
+
+
+def test_fold_digests_the_turn_leaving_the_window(memory_with):
+    turns = [turn(1000 * ts, f'q{ts}', f'a{ts}') for ts in range(1, handler.MEMORY_MAX_TURNS + 1)]
+    memory = memory_with(None, turns)
+
+    digest = memory.fold(turn(1000 * (handler.MEMORY_MAX_TURNS + 1)))
+
+    assert digest['kind'] == 'digest'
+    assert digest['timestamp'] == handler.MEMORY_DIGEST_TIMESTAMP
+    assert digest['through'] == 1000
+    assert digest['digest'].endswith('Q: q1 A: a1')
+
+
+def test_fold_appends_to_existing_digest_and_skips_folded_turns(memory_with):
+    existing = {'kind': 'digest', 'digest': 'earlier line', 'through': 1000}
+    turns = [turn(1000 * ts, f'q{ts}') for ts in range(1, handler.MEMORY_MAX_TURNS + 1)]
+    memory = memory_with(existing, turns)
+
+    assert memory.fold(turn(1000 * (handler.MEMORY_MAX_TURNS + 1))) is None
+
+    memory = memory_with(existing, turns[1:] + [turn(1000 * (handler.MEMORY_MAX_TURNS + 1), 'q7')])
+    digest = memory.fold(turn(1000 * (handler.MEMORY_MAX_TURNS + 2)))
+    lines = digest['digest'].splitlines()
+    assert lines[0] == 'earlier line'
+    assert 'Q: q2 ' in lines[1] and len(lines) == 2
+    assert digest['through'] == 2000
+
+
+def test_fold_drops_oldest_digest_lines_over_the_cap(memory_with, monkeypatch):
+    monkeypatch.setattr(handler, 'MEMORY_DIGEST_MAX_CHARS', 80)
+    existing = {'kind': 'digest', 'digest': 'x' * 60, 'through': 0}
+    memory = memory_with(existing, [turn(1000 * ts, 'question') for ts in range(1, handler.MEMORY_MAX_TURNS + 1)])
+
+    digest = memory.fold(turn(1000 * (handler.MEMORY_MAX_TURNS + 1)))
+
+    assert 'x' * 60 not in digest['digest']
+    assert digest['digest'].count('\n') == 0
+
+
+def test_fold_without_history_returns_none(memory_with):
+    memory = memory_with(None, [])
+    memory.timed_out = True
+
+    assert memory.fold(turn(1)) is None
+
+
+# llm_cache_key
+
+def cache_report(signature_count=12, first_seen='2026-10-17T09:04:12', cause_at='2026-10-17 09:04:12.345', **changes):
+    report = {
+        'pipeline_name': 'orders-sync',
+        'time_range_hours': 24,
+        'summary': 'Pipeline orders-sync has 2 issue(s) in the last 24 hours.',
+        'evidence': [
+            {'type': 'log_signature', 'signature': 'Access denied for <ARN>', 'count': signature_count,
+             'first_seen': first_seen, 'last_seen': first_seen, 'example': 'Access denied for arn:aws:iam::1:role/x'},
+            {'type': 'step_function_failure', 'status': 'FAILED', 'start_date': first_seen,
+             'failed_state': 'LoadWarehouse', 'error': 'States.TaskFailed', 'cause': f'COPY failed at {cause_at}'},
+        ],
+        'sources': [{'source': 'cloudwatch_logs', 'status': 'ok', 'duration_ms': 812.4}],
+        'log_scan': {'pages': 3, 'bytes_scanned': 52000},
+        'generated_at': 1000.0,
+        'error_histogram': {'bucket_minutes': 60, 'counts': [1, 4]},
+    }
+    report.update(changes)
+    return report
+
+
+def cache_key(report, intent='Why did orders-sync fail?', context=''):
+    return handler.llm_cache_key(report, 'model', 'system prompt', intent, context)
+
+
+def test_cache_key_ignores_run_metadata_and_timestamps(monkeypatch):
+    monkeypatch.setattr(handler, 'LLM_CACHE_TOLERANT', True)
+    rerun = cache_report(
+        first_seen='2026-10-17T10:00:00',
+        cause_at='2026-10-17 10:04:12.001',
+        sources=[{'source': 'cloudwatch_logs', 'status': 'ok', 'duration_ms': 95.0}],
+        log_scan={'pages': 1, 'bytes_scanned': 900},
+        generated_at=2000.0,
+        error_histogram={'bucket_minutes': 60, 'counts': [2, 4]},
+    )
+
+    assert cache_key(rerun) == cache_key(cache_report())
+    assert cache_key(cache_report(), intent='  why did ORDERS-SYNC fail ') == cache_key(cache_report())
+
+
+def test_cache_key_changes_with_the_evidence_intent_and_context(monkeypatch):
+    monkeypatch.setattr(handler, 'LLM_CACHE_TOLERANT', True)
+    base = cache_key(cache_report())
+
+    assert cache_key(cache_report(signature_count=13)) != base
+    assert cache_key(cache_report(summary='Pipeline orders-sync is healthy.')) != base
+    assert cache_key(cache_report(), intent='What should I check first?') != base
+    assert cache_key(cache_report(), context='history-fingerprint') != base
+
+
+def test_strict_cache_key_keeps_timestamps(monkeypatch):
+    monkeypatch.setattr(handler, 'LLM_CACHE_TOLERANT', False)
+
+    assert cache_key(cache_report(first_seen='2026-10-17T10:00:00')) != cache_key(cache_report())
+    assert cache_key(cache_report(cause_at='2026-10-17 10:04:12.001')) != cache_key(cache_report())
+    assert cache_key(cache_report(generated_at=5.0)) == cache_key(cache_report())
+
+
+# Prompt building
+
+@pytest.fixture
+def estimator(monkeypatch):
+    """A fresh, uncalibrated token estimator (4 characters per token)."""
+    monkeypatch.setattr(handler, 'token_estimator', handler.TokenEstimator())
+    return handler.token_estimator
+
+
+def signature_item(count, signature):
+    return {'type': 'log_signature', 'signature': signature, 'count': count,
+            'first_seen': '2026-10-17T09:00:00', 'last_seen': '2026-10-17T10:00:00', 'example': signature}
+
+
+def failure_item(run, cause, start_date='2026-10-17T09:00:00'):
+    return {'type': 'step_function_failure', 'execution_arn': f'arn:aws:states:us-east-1:1:execution:sm:run-{run}',
+            'status': 'FAILED', 'start_date': start_date, 'failed_state': 'LoadWarehouse',
+            'error': 'States.TaskFailed', 'cause': cause}
+
+
+def prompt_report(evidence, event_count=100):
+    return {'pipeline_name': 'orders', 'time_range_hours': 24, 'summary': 'Pipeline orders is failing.',
+            'evidence': evidence, 'log_scan': {'event_count': event_count}, 'sources': [], 'probable_cause': []}
+
+
+def test_estimator_calibrates_towards_reported_token_counts(estimator):
+    assert estimator.estimate('x' * 40) == 10
+
+    for _ in range(50):
+        estimator.calibrate(300, 100)
+
+    assert estimator.chars_per_token == pytest.approx(3.0, abs=0.05)
+    assert estimator.estimate('x' * 30) == 10
+    estimator.calibrate(0, 0)
+    assert estimator.chars_per_token == pytest.approx(3.0, abs=0.05)
+
+
+def test_compact_evidence_ranks_by_share_and_merges_identical_failures():
+    report = prompt_report([
+        signature_item(10, 'disk full'),
+        signature_item(60, 'Access denied for <ARN>'),
+        failure_item(1, 'COPY failed for job 17: Access Denied', '2026-10-17T09:00:00'),
+        failure_item(2, 'COPY failed for job 18: Access Denied', '2026-10-17T11:00:00'),
+    ])
+
+    items = handler.compact_evidence(report)
+
+    assert [round(score, 2) for score, _ in items] == [1.0, 0.6, 0.1]
+    assert items[0][1].startswith('sfn x2 FAILED latest=run-2 at 2026-10-17T11:00:00 state=LoadWarehouse')
+    assert items[1][1].startswith('log x60 ')
+
+
+def test_prompt_drops_lowest_ranked_evidence_over_the_budget(estimator, monkeypatch):
+    monkeypatch.setattr(handler, 'LLM_INPUT_TOKEN_BUDGET', 120)
+    report = prompt_report([signature_item(50 - i, f'error number {i} ' + 'x' * 80) for i in range(10)], event_count=500)
+
+    prompt, max_tokens = handler.build_report_prompt(report, 'why?')
+
+    lines = prompt.splitlines()
+    kept = [line for line in lines if line.startswith('E')]
+    assert 1 <= len(kept) < 10
+    assert 'error number 0 ' in kept[0]
+    assert f'({10 - len(kept)} lower-ranked evidence items omitted)' in lines
+    assert lines[-1] == 'question: why?'
+    assert estimator.estimate(prompt) <= 120 + 15
+    assert max_tokens == handler.llm_max_tokens(len(kept))
+
+
+def test_prompt_without_evidence_says_none(estimator):
+    prompt, max_tokens = handler.build_report_prompt(prompt_report([]))
+
+    assert 'evidence: none' in prompt
+    assert prompt.endswith('question: Analyze this pipeline report.')
+    assert max_tokens == handler.LLM_MAX_TOKENS_BASE
+
+
+def test_max_tokens_grow_with_evidence_up_to_the_cap():
+    assert handler.llm_max_tokens(2) == handler.LLM_MAX_TOKENS_BASE + 2 * handler.LLM_MAX_TOKENS_PER_ITEM
+    assert handler.llm_max_tokens(1000) == handler.LLM_MAX_TOKENS_CAP
+
+
+def test_text_prompt_keeps_leading_lines_within_the_budget(estimator, monkeypatch):
+    monkeypatch.setattr(handler, 'LLM_INPUT_TOKEN_BUDGET', 50)
+    text = '\n'.join(f'pipeline-{i}: failing ' + 'y' * 40 for i in range(20))
+
+    prompt, _ = handler.build_text_prompt(text, 'which first?')
+
+    lines = prompt.splitlines()
+    assert lines[0].startswith('pipeline-0:')
+    assert lines[-2].endswith('more lines omitted)')
+    assert lines[-1] == 'question: which first?'
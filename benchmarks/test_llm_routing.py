@@ -0,0 +1,95 @@
+"""
+Tests for invoke_llm: provider order, hedging a slow provider and failing
+over from one that errors.
+"""
+import time
+
+import pytest
+
+import handler
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Both providers configured, OpenAI primary, fresh stats and a short hedge delay."""
+    monkeypatch.setattr(handler, 'OPENAI_API_KEY', 'test-key')
+    monkeypatch.setattr(handler, 'BEDROCK_MODEL_ID', 'test-model')
+    monkeypatch.setattr(handler, 'LLM_PRIMARY', 'openai')
+    monkeypatch.setattr(handler, 'LLM_HEDGE_ENABLED', True)
+    monkeypatch.setattr(handler, 'LLM_HEDGE_DEFAULT_DELAY', 0.05)
+    monkeypatch.setattr(handler, 'LLM_HEDGE_MIN_DELAY', 0.05)
+    monkeypatch.setattr(handler, 'llm_stats', {
+        name: handler.ProviderStats(handler.LLM_STATS_WINDOW) for name in ('openai', 'bedrock')
+    })
+
+
+def answering(text, after=0.0, calls=None):
+    """A provider call that returns text after a delay, recording its timeout."""
+    def call(timeout):
+        if calls is not None:
+            calls.append(timeout)
+        time.sleep(after)
+        return text
+    return call
+
+
+def failing(timeout):
+    raise RuntimeError('provider unavailable')
+
+
+def test_fast_primary_answers_without_a_hedge(providers):
+    secondary = []
+
+    text = handler.invoke_llm({'openai': answering('primary'), 'bedrock': answering('secondary', calls=secondary)}, 5)
+
+    assert text == 'primary'
+    assert secondary == []
+
+
+def test_slow_primary_is_hedged_and_the_first_answer_wins(providers):
+    started = time.monotonic()
+
+    text = handler.invoke_llm({'openai': answering('primary', after=1.0), 'bedrock': answering('secondary')}, 5)
+
+    assert text == 'secondary'
+    assert time.monotonic() - started < 0.5
+
+
+def test_failing_primary_fails_over_at_once(providers, monkeypatch):
+    monkeypatch.setattr(handler, 'LLM_HEDGE_ENABLED', False)
+    secondary = []
+
+    text = handler.invoke_llm({'openai': failing, 'bedrock': answering('secondary', calls=secondary)}, 5)
+
+    assert text == 'secondary'
+    # The failover call gets what is left of the overall timeout
+    assert 4 < secondary[0] <= 5
+
+
+def test_empty_answer_counts_as_a_failure(providers):
+    assert handler.invoke_llm({'openai': answering(''), 'bedrock': answering('secondary')}, 5) == 'secondary'
+    assert handler.llm_stats['openai'].outcomes[-1] is False
+
+
+def test_every_provider_failing_returns_none(providers):
+    assert handler.invoke_llm({'openai': failing, 'bedrock': failing}, 5) is None
+
+
+def test_gives_up_at_the_timeout(providers):
+    started = time.monotonic()
+
+    text = handler.invoke_llm({'openai': answering('late', after=1.0), 'bedrock': answering('late', after=1.0)}, 0.2)
+
+    assert text is None
+    assert time.monotonic() - started < 0.5
+
+
+def test_unhealthy_primary_is_tried_last(providers, monkeypatch):
+    monkeypatch.setattr(handler, 'LLM_STATS_MIN_SAMPLES', 2)
+    for _ in range(2):
+        handler.llm_stats['openai'].record(0.1, False)
+    primary = []
+
+    assert handler.llm_providers() == ['bedrock', 'openai']
+    assert handler.invoke_llm({'openai': answering('primary', calls=primary), 'bedrock': answering('secondary')}, 5) == 'secondary'
+    assert primary == []
@@ -0,0 +1,190 @@
+"""
+Tests for log scanning: checkpointed incremental scans, the Logs Insights
+backend (query translation and result parsing) and how scan_pipeline_logs
+chooses between them.
+"""
+import time
+
+import pytest
+
+import handler
+from conftest import pipeline_info
+
+
+def test_week_long_scan_seeds_a_checkpoint_with_insights_then_reads_the_delta(aws):
+    clients = aws(log_events=50000, log_hours=168)
+    info = pipeline_info(clients)
+
+    first = handler.scan_pipeline_logs(info, 168)
+    second = handler.scan_pipeline_logs(info, 168)
+
+    assert first['backend'] == 'insights'
+    assert first['checkpoint']['resumed'] is False
+    assert second['backend'] == 'filter'
+    assert second['checkpoint']['resumed'] is True
+    assert second['checkpoint']['delta_minutes'] < 5
+    assert second['pages'] <= 2
+    assert second['event_count'] == pytest.approx(first['event_count'], rel=0.01)
+    assert first['stopped_reason'] is second['stopped_reason'] is None
+
+
+def test_resumed_scan_is_trimmed_and_clamped_to_a_shorter_window(aws):
+    clients = aws(log_events=12000, log_hours=24, log_backend='filter')
+    info = pipeline_info(clients)
+    handler.scan_pipeline_logs(info, 24)
+
+    scan = handler.scan_pipeline_logs(info, 6)
+
+    window_start = int(time.time() * 1000) - 6 * 3600 * 1000
+    assert scan['checkpoint']['resumed'] is True
+    # Expiry works at bucket granularity, so up to one extra hour may be kept
+    assert 3000 <= scan['event_count'] <= 3500
+    assert scan['first_seen'] >= window_start - 1000
+    assert scan['histogram'][0][0] >= window_start - 1000
+    assert all(signature['first_seen'] >= window_start - 1000 for signature in scan['signatures'])
+
+
+def test_checkpoint_that_does_not_cover_the_window_is_not_resumed(aws):
+    clients = aws(log_events=24000, log_hours=24, log_backend='filter')
+    info = pipeline_info(clients)
+    handler.scan_pipeline_logs(info, 2)
+
+    scan = handler.scan_pipeline_logs(info, 4)
+
+    assert scan['checkpoint']['resumed'] is False
+    assert scan['event_count'] == pytest.approx(4000, abs=2)
+
+
+def test_short_window_in_auto_mode_scans_incrementally_with_filter(aws):
+    clients = aws(log_events=2000, log_hours=24)
+
+    scan = handler.scan_pipeline_logs(pipeline_info(clients), 2)
+
+    assert scan['backend'] == 'filter'
+    assert 'checkpoint' in scan
+
+
+def test_insights_backend_from_catalog_queries_the_whole_window(aws):
+    clients = aws(log_events=2000, log_hours=24, log_backend='insights')
+
+    scan = handler.scan_pipeline_logs(pipeline_info(clients), 24)
+
+    assert scan['backend'] == 'insights'
+    assert 'checkpoint' not in scan
+    assert scan['event_count'] == pytest.approx(2000, abs=2)
+
+
+def test_insights_failure_falls_back_to_filter(aws, monkeypatch):
+    clients = aws(log_events=2000, log_hours=24)
+
+    def broken(**kwargs):
+        raise RuntimeError('Insights unavailable')
+
+    monkeypatch.setattr(clients['logs'], 'start_query', broken)
+    scan = handler.scan_pipeline_logs(pipeline_info(clients), 24)
+
+    assert scan['backend'] == 'filter'
+    assert scan['stopped_reason'] is None
+    assert scan['event_count'] == pytest.approx(2000, abs=2)
+
+
+def test_noisy_group_is_retried_with_insights_and_remembered(aws, monkeypatch):
+    monkeypatch.setattr(handler, 'LOG_SCAN_MAX_EVENTS', 50)
+    clients = aws(log_events=2000, log_hours=24)
+    info = pipeline_info(clients)
+
+    first = handler.scan_pipeline_logs(info, 2)
+
+    assert first['backend'] == 'insights' and first['stopped_reason'] is None
+    assert handler.noisy_log_groups.get(info['log_group'])[0]
+    second = handler.scan_pipeline_logs(info, 2)
+    assert second['backend'] == 'insights'
+    assert 'checkpoint' in second
+
+
+def test_scan_stops_paging_at_the_stage_stop_time(aws):
+    clients = aws(log_events=12000, log_hours=24, log_backend='filter')
+    log_group = pipeline_info(clients)['log_group']
+    now_ms = int(time.time() * 1000)
+    aggregate = handler.LogScanAggregate('filter')
+
+    with handler.stage_stop(time.monotonic() - 1):
+        future = handler.submit_traced(handler.evidence_executor, handler.scan_log_range,
+                                       aggregate, log_group, now_ms - 24 * 3600 * 1000, now_ms)
+    future.result()
+
+    assert aggregate.stopped_reason == 'timeout'
+    assert aggregate.pages == 0
+
+
+# Logs Insights queries and results
+
+@pytest.mark.parametrize('pattern, expected', [
+    (None, ''),
+    ('ERROR', ' | filter @message like /ERROR/'),
+    ('ERROR -DEBUG', ' | filter @message like /ERROR/ and @message not like /DEBUG/'),
+    ('?ERROR ?Exception', ' | filter (@message like /ERROR/ or @message like /Exception/)'),
+    ('"disk full" ?a.b', ' | filter @message like /disk full/ and (@message like /a\\.b/)'),
+    ('{ $.level = "error" }', None),
+    ('[ip, user, status=5*]', None),
+])
+def test_filter_pattern_to_insights(pattern, expected):
+    assert handler.filter_pattern_to_insights(pattern) == expected
+
+
+@pytest.mark.parametrize('hours_back, expected', [(1, 60), (168, 60), (336, 120), (720, 360)])
+def test_insights_bin_minutes_keeps_the_histogram_within_max_buckets(hours_back, expected):
+    assert handler.insights_bin_minutes(hours_back) == expected
+
+
+def insights_row(**fields):
+    return [{'field': name, 'value': str(value)} for name, value in fields.items()]
+
+
+class RecordedInsights:
+    """A logs client returning fixed Insights results, recording the queries."""
+
+    def __init__(self, results):
+        self.results = results
+        self.queries = {}
+
+    def start_query(self, queryString, **kwargs):
+        name = 'histogram' if queryString.startswith('fields @timestamp |') else 'messages'
+        self.queries[name] = queryString
+        return {'queryId': name}
+
+    def get_query_results(self, queryId):
+        return {'status': 'Complete', 'results': self.results[queryId], 'statistics': {'bytesScanned': 2048}}
+
+
+def test_insights_results_are_folded_into_signatures_and_histogram(monkeypatch):
+    logs = RecordedInsights({
+        'messages': [
+            insights_row(message_key='ERROR Task 1 failed', event_count=7, first_seen='2026-10-17 10:05:00.000',
+                         last_seen='2026-10-17 11:30:00.500', example='ERROR Task 1 failed'),
+            insights_row(message_key='ERROR Task 2 failed', event_count=3, first_seen='2026-10-17 09:00:00.000',
+                         last_seen='2026-10-17 09:10:00.000', example='ERROR Task 2 failed'),
+        ],
+        'histogram': [
+            insights_row(bucket='2026-10-17 09:00:00.000', event_count=3),
+            insights_row(bucket='2026-10-17 10:00:00.000', event_count=4),
+            insights_row(bucket='2026-10-17 11:00:00.000', event_count=3),
+        ],
+    })
+    monkeypatch.setattr(handler, 'get_client', lambda name: logs)
+    monkeypatch.setattr(handler, 'api_governors', {})
+
+    scan = handler.query_logs_insights('/aws/test', 24, filter_pattern='ERROR')
+
+    hour_ms = 3600 * 1000
+    nine = handler.parse_insights_timestamp('2026-10-17 09:00:00.000')
+    assert nine == 1792227600000
+    assert 'filter @message like /ERROR/' in logs.queries['messages']
+    assert 'bin(60m)' in logs.queries['histogram']
+    assert scan['backend'] == 'insights' and scan['stopped_reason'] is None
+    assert scan['event_count'] == 10
+    assert scan['bytes_scanned'] == 2048
+    assert scan['histogram'] == [[nine, 3], [nine + hour_ms, 4], [nine + 2 * hour_ms, 3]]
+    assert (scan['first_seen'], scan['last_seen']) == (nine, nine + 2 * hour_ms + 30 * 60000 + 500)
+    (signature,) = scan['signatures']
+    assert signature['signature'] == 'ERROR Task <NUM> failed' and signature['count'] == 10
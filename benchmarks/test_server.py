@@ -0,0 +1,32 @@
+"""
+Tests for the ASGI server's streaming responses.
+"""
+import asyncio
+import json
+
+import handler
+import server
+from run_benchmarks import TABLE_NAMES
+
+
+def test_a_client_disconnect_stops_the_stream_and_saves_the_turn(aws):
+    clients = aws(log_events=100, failed_executions=1)
+    body = json.dumps({'message': 'why?', 'pipeline_name': 'bench-pipeline-0', 'conversation_id': 'c1', 'stream': True})
+    messages = [{'type': 'http.request', 'body': body.encode('utf-8'), 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.body':
+            raise OSError('connection reset by peer')
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/chat', 'headers': [(b'content-type', b'application/json')]}
+    asyncio.run(server.app(scope, receive, send))
+
+    assert [message['type'] for message in sent] == ['http.response.start']
+    assert handler.persist_queue.flush(2)
+    stored, = clients['dynamodb'].Table(TABLE_NAMES['conversations']).items.values()
+    assert stored['conversation_id'] == 'c1' and stored['user_message'] == 'why?'
@@ -0,0 +1,110 @@
+"""
+Tests for Step Functions evidence: the newest-first history scan and the
+execution failure cache.
+"""
+import time
+
+import pytest
+
+import handler
+from conftest import pipeline_info
+
+
+class CountingCalls:
+    """Wraps a stand-in client, counting calls per method."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = {}
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def call(**kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return method(**kwargs)
+        return call
+
+
+@pytest.fixture
+def sfn(aws, monkeypatch):
+    """Stand-ins with failed executions; returns (clients, counting Step Functions client)."""
+    def install(**scenario):
+        clients = aws(failed_executions=3, **scenario)
+        counting = CountingCalls(clients['stepfunctions'])
+        monkeypatch.setitem(clients, 'stepfunctions', counting)
+        return clients, counting
+    return install
+
+
+def execution_arn(clients, run=0):
+    state_machine = pipeline_info(clients)['state_machine_arn']
+    return f"{state_machine.replace(':stateMachine:', ':execution:')}:run-{run}"
+
+
+def test_long_history_is_read_newest_first_in_one_page(sfn):
+    clients, counting = sfn(history_events=5000)
+
+    failure = handler.fetch_execution_failure(execution_arn(clients))
+
+    assert failure['failed_state'] == 'LoadWarehouse'
+    assert failure['error'] == 'States.TaskFailed'
+    # The task failure is earlier in the history than the execution failure, so it wins
+    assert failure['cause'].startswith('Redshift COPY failed')
+    assert counting.calls == {'get_execution_history': 1}
+
+
+def test_failing_state_on_a_later_page_is_found(sfn):
+    clients, counting = sfn()
+    history = clients['stepfunctions'].client._history(execution_arn(clients))
+    # Keep the failure events on the first page and the state they belong to on the second
+    padding = [{'id': 0, 'type': 'PassStateExited'}] * 98
+    clients['stepfunctions'].client._history = lambda arn: history[:-2] + padding + history[-2:]
+
+    failure = handler.fetch_execution_failure(execution_arn(clients))
+
+    assert failure['failed_state'] == 'LoadWarehouse'
+    assert counting.calls == {'get_execution_history': 2}
+
+
+def test_failures_are_cached_in_memory_and_shared_through_the_cache_table(sfn, monkeypatch):
+    clients, counting = sfn()
+    arn = execution_arn(clients)
+
+    first = handler.get_execution_failure(arn)
+    assert handler.get_execution_failure(arn) == first
+    assert counting.calls == {'get_execution_history': 1}
+
+    # Another container: empty memory cache, shared DynamoDB entry
+    monkeypatch.setattr(handler, 'execution_failure_cache', handler.TTLCache(100, float('inf')))
+    assert handler.get_execution_failure(arn) == first
+    assert counting.calls == {'get_execution_history': 1}
+
+
+def test_history_without_an_error_is_only_cached_briefly(sfn, monkeypatch):
+    clients, counting = sfn()
+    arn = execution_arn(clients)
+    monkeypatch.setattr(handler, 'SFN_HISTORY_MAX_PAGES', 0)
+
+    empty = handler.get_execution_failure(arn)
+    assert empty == {'failed_state': None, 'error': None, 'cause': None}
+    assert f'sfn#{arn}' not in clients['dynamodb'].Table(handler.CACHE_TABLE).items
+
+    expires_at, _ = handler.execution_failure_cache.entries[arn]
+    assert expires_at <= time.monotonic() + handler.SFN_EMPTY_FAILURE_TTL
+
+    # Once the short entry lapses, the history is read again
+    monkeypatch.setattr(handler, 'SFN_HISTORY_MAX_PAGES', 5)
+    handler.execution_failure_cache.invalidate(arn)
+    assert handler.get_execution_failure(arn)['failed_state'] == 'LoadWarehouse'
+
+
+def test_describe_failures_fetches_each_execution_once(sfn):
+    clients, counting = sfn()
+    state_machine = pipeline_info(clients)['state_machine_arn']
+
+    executions = handler.describe_step_function_failures(state_machine, max_results=3)
+    handler.describe_step_function_failures(state_machine, max_results=3)
+
+    assert [execution['failed_state'] for execution in executions] == ['LoadWarehouse'] * 3
+    assert counting.calls == {'list_executions': 2, 'get_execution_history': 3}
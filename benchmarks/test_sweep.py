@@ -0,0 +1,125 @@
+"""
+Tests for the scheduled sweep: stored reports, their error histogram and
+when chat requests read them.
+"""
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import handler
+
+
+HOUR_MS = 3600 * 1000
+
+
+def iso(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+
+def test_error_histogram_rebins_log_buckets_and_bins_failed_executions(monkeypatch):
+    monkeypatch.setattr(handler, 'SWEEP_HISTOGRAM_BUCKET_MINUTES', 60)
+    now_ms = 1792227600000 + 30 * 60000  # 09:30 UTC
+    report = {
+        'time_range_hours': 3,
+        'log_scan': {'histogram': [
+            [now_ms - 3 * HOUR_MS - 35 * 60000, 7],  # 05:55, before the first bucket
+            [1792220400000, 2],  # 07:00
+            [1792220400000 + 15 * 60000, 3],  # 07:15
+            [1792227600000, 4],  # 09:00
+        ]},
+        'evidence': [
+            {'type': 'step_function_failure', 'start_date': iso(1792224000000 + 60000)},  # 08:01
+            {'type': 'step_function_failure', 'start_date': iso(1792227600000 + 60000)},  # 09:01
+            {'type': 'step_function_failure', 'start_date': None},
+            {'type': 'log_signature'},
+        ],
+    }
+
+    histogram = handler.error_histogram(report, now_ms)
+
+    # 06:30 is the window start, so the buckets start at 06:00
+    assert histogram['start'] == '2026-10-17T06:00:00+00:00'
+    assert histogram['bucket_minutes'] == 60
+    assert histogram['log_errors'] == [0, 5, 0, 4]
+    assert histogram['failed_executions'] == [0, 0, 1, 1]
+
+
+def test_error_histogram_without_a_log_histogram_has_no_log_errors():
+    report = {'time_range_hours': 1, 'log_scan': {'event_count': 3}, 'evidence': []}
+
+    histogram = handler.error_histogram(report, int(time.time() * 1000))
+
+    assert 'log_errors' not in histogram
+    assert sum(histogram['failed_executions']) == 0
+
+
+@pytest.fixture
+def sweep(aws, monkeypatch):
+    """Stand-ins with three pipelines, stored reports enabled; returns the clients."""
+    monkeypatch.setattr(handler, 'PRECOMPUTED_ENABLED', True)
+    return aws(pipelines=3, log_events=500, failed_executions=2)
+
+
+def unexpected_analysis(*args, **kwargs):
+    raise AssertionError('analyzed live')
+
+
+class Context:
+    def get_remaining_time_in_millis(self):
+        return 60000
+
+
+def test_sweep_stores_reports_that_chat_requests_then_use(sweep, monkeypatch):
+    summary = handler.run_scheduled_sweep(Context())
+
+    assert (summary['stored'], summary['swept']) == (3, 3)
+    stored = handler.load_precomputed_report('bench-pipeline-1', handler.SWEEP_HOURS_BACK, 60)
+    assert stored['generated_at']
+    assert sum(stored['error_histogram']['failed_executions']) == 2
+
+    monkeypatch.setattr(handler, 'analyze_pipeline', unexpected_analysis)
+    assert handler.pipeline_report('bench-pipeline-1', handler.SWEEP_HOURS_BACK) == stored
+
+
+def test_second_sweep_passes_over_fresh_reports(sweep):
+    handler.run_scheduled_sweep(Context())
+
+    summary = handler.run_scheduled_sweep(Context())
+
+    assert (summary['fresh'], summary['stored']) == (3, 0)
+
+
+def test_partial_reports_are_not_stored(sweep, monkeypatch):
+    analyze = handler.analyze_pipeline
+    monkeypatch.setattr(handler, 'analyze_pipeline', lambda *args: dict(analyze(*args), partial=True))
+
+    summary = handler.run_scheduled_sweep(Context())
+
+    assert summary['partial'] == 3
+    assert handler.load_precomputed_report('bench-pipeline-0', handler.SWEEP_HOURS_BACK, 60) is None
+
+
+def test_other_windows_do_not_look_up_a_stored_report(sweep, monkeypatch):
+    handler.run_scheduled_sweep(Context())
+    lookups = []
+    monkeypatch.setattr(handler, 'load_precomputed_report', lambda *args: lookups.append(args))
+
+    report = handler.pipeline_report('bench-pipeline-0', handler.SWEEP_HOURS_BACK // 2)
+
+    assert lookups == []
+    assert report['time_range_hours'] == handler.SWEEP_HOURS_BACK // 2
+    assert 'generated_at' not in report
+
+
+def test_slow_lookup_is_abandoned_for_a_live_analysis(sweep, monkeypatch):
+    monkeypatch.setattr(handler, 'load_precomputed_report', lambda *args: time.sleep(1))
+    deadline = handler.RequestDeadline(handler.DEADLINE_SAFETY_MS + 2000)
+    started = time.monotonic()
+
+    report = handler.pipeline_report('bench-pipeline-0', handler.SWEEP_HOURS_BACK, deadline)
+
+    # The lookup gets the catalog share of the time left (1/11 of 2s)
+    assert time.monotonic() - started < 0.8
+    assert report['pipeline_name'] == 'bench-pipeline-0' and 'generated_at' not in report
+    assert deadline.overrun == []
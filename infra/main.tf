@@ -26,6 +26,7 @@ module "iam" {
   environment             = var.environment
   conversations_table_arn = module.dynamodb.conversations_table_arn
   pipelines_table_arn     = module.dynamodb.pipelines_table_arn
+  cache_table_arn         = module.dynamodb.cache_table_arn
   account_id              = data.aws_caller_identity.current.account_id
   region                  = data.aws_region.current.name
   bedrock_model_id        = var.bedrock_model_id
@@ -40,12 +41,14 @@ module "lambda" {
   lambda_role_arn        = module.iam.lambda_role_arn
   conversations_table     = module.dynamodb.conversations_table_name
   pipelines_table         = module.dynamodb.pipelines_table_name
+  cache_table             = module.dynamodb.cache_table_name
   default_region          = var.aws_region
   bedrock_model_id        = var.bedrock_model_id
   openai_api_key          = var.openai_api_key
   log_retention_days      = var.log_retention_days
   timeout                 = var.lambda_timeout
   memory_size             = var.lambda_memory_size
+  sweep_schedule          = var.sweep_schedule
 }
 
 # API Gateway HTTP API
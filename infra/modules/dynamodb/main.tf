@@ -58,3 +58,29 @@ resource "aws_dynamodb_table" "pipelines_catalog" {
     Project     = var.project_name
   }
 }
+
+resource "aws_dynamodb_table" "agent_cache" {
+  name         = "${var.project_name}-agent-cache-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "cache_key"
+
+  attribute {
+    name = "cache_key"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "ttl"
+    enabled        = true
+  }
+
+  server_side_encryption {
+    enabled = true
+  }
+
+  tags = {
+    Name        = "${var.project_name}-agent-cache-${var.environment}"
+    Environment = var.environment
+    Project     = var.project_name
+  }
+}
@@ -17,3 +17,13 @@ output "pipelines_table_arn" {
   description = "Pipelines catalog table ARN"
   value       = aws_dynamodb_table.pipelines_catalog.arn
 }
+
+output "cache_table_name" {
+  description = "Agent cache table name"
+  value       = aws_dynamodb_table.agent_cache.name
+}
+
+output "cache_table_arn" {
+  description = "Agent cache table ARN"
+  value       = aws_dynamodb_table.agent_cache.arn
+}
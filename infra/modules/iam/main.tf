@@ -41,16 +41,21 @@ resource "aws_iam_policy" "lambda_policy" {
         {
           Effect = "Allow"
           Action = [
+            "dynamodb:BatchGetItem",
+            "dynamodb:BatchWriteItem",
             "dynamodb:GetItem",
             "dynamodb:PutItem",
             "dynamodb:Query",
+            "dynamodb:Scan",
             "dynamodb:UpdateItem"
           ]
           Resource = [
             var.conversations_table_arn,
             "${var.conversations_table_arn}/*",
             var.pipelines_table_arn,
-            "${var.pipelines_table_arn}/*"
+            "${var.pipelines_table_arn}/*",
+            var.cache_table_arn,
+            "${var.cache_table_arn}/*"
           ]
         },
         {
@@ -58,15 +63,25 @@ resource "aws_iam_policy" "lambda_policy" {
           Action = [
             "logs:FilterLogEvents",
             "logs:DescribeLogStreams",
-            "logs:GetLogEvents"
+            "logs:GetLogEvents",
+            "logs:StartQuery"
           ]
           Resource = "arn:aws:logs:${var.region}:${var.account_id}:log-group:*"
         },
+        {
+          Effect = "Allow"
+          Action = [
+            "logs:GetQueryResults",
+            "logs:StopQuery"
+          ]
+          Resource = "*"
+        },
         {
           Effect = "Allow"
           Action = [
             "states:ListExecutions",
             "states:DescribeExecution",
+            "states:GetExecutionHistory",
             "states:DescribeStateMachine"
           ]
           Resource = "arn:aws:states:${var.region}:${var.account_id}:*"
@@ -76,7 +91,8 @@ resource "aws_iam_policy" "lambda_policy" {
         {
           Effect = "Allow"
           Action = [
-            "bedrock:InvokeModel"
+            "bedrock:InvokeModel",
+            "bedrock:InvokeModelWithResponseStream"
           ]
           Resource = "arn:aws:bedrock:${var.region}::foundation-model/*"
         }
@@ -18,6 +18,11 @@ variable "pipelines_table_arn" {
   type        = string
 }
 
+variable "cache_table_arn" {
+  description = "ARN of agent cache DynamoDB table"
+  type        = string
+}
+
 variable "account_id" {
   description = "AWS account ID"
   type        = string
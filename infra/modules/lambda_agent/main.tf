@@ -29,9 +29,11 @@ resource "aws_lambda_function" "ops_agent" {
     variables = {
       DDB_CONVERSATIONS_TABLE = var.conversations_table
       DDB_PIPELINES_TABLE     = var.pipelines_table
+      DDB_CACHE_TABLE         = var.cache_table
       DEFAULT_REGION          = var.default_region
       BEDROCK_MODEL_ID        = var.bedrock_model_id
       OPENAI_API_KEY          = var.openai_api_key
+      PRECOMPUTED_ENABLED     = var.sweep_schedule == "" ? "false" : "true"
     }
   }
 
@@ -46,3 +48,31 @@ resource "aws_lambda_function" "ops_agent" {
   }
 }
 
+# Scheduled fleet health sweep: precomputes every pipeline's report
+resource "aws_cloudwatch_event_rule" "sweep" {
+  count               = var.sweep_schedule == "" ? 0 : 1
+  name                = "${var.project_name}-sweep-${var.environment}"
+  description         = "Precompute pipeline health reports for the ops agent"
+  schedule_expression = var.sweep_schedule
+
+  tags = {
+    Name        = "${var.project_name}-sweep-${var.environment}"
+    Environment = var.environment
+    Project     = var.project_name
+  }
+}
+
+resource "aws_cloudwatch_event_target" "sweep" {
+  count = var.sweep_schedule == "" ? 0 : 1
+  rule  = aws_cloudwatch_event_rule.sweep[0].name
+  arn   = aws_lambda_function.ops_agent.arn
+}
+
+resource "aws_lambda_permission" "sweep" {
+  count         = var.sweep_schedule == "" ? 0 : 1
+  statement_id  = "AllowEventBridgeSweep"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.ops_agent.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.sweep[0].arn
+}
@@ -23,6 +23,11 @@ variable "pipelines_table" {
   type        = string
 }
 
+variable "cache_table" {
+  description = "DynamoDB agent cache table name"
+  type        = string
+}
+
 variable "default_region" {
   description = "Default AWS region"
   type        = string
@@ -58,3 +63,9 @@ variable "memory_size" {
   type        = number
   default     = 512
 }
+
+variable "sweep_schedule" {
+  description = "EventBridge schedule expression for the fleet health sweep (empty disables it)"
+  type        = string
+  default     = ""
+}
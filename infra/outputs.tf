@@ -23,6 +23,11 @@ output "pipelines_table_name" {
   value       = module.dynamodb.pipelines_table_name
 }
 
+output "cache_table_name" {
+  description = "DynamoDB agent cache table name"
+  value       = module.dynamodb.cache_table_name
+}
+
 output "api_gateway_id" {
   description = "API Gateway HTTP API ID"
   value       = module.api_gateway.api_id
@@ -47,6 +47,12 @@ variable "lambda_memory_size" {
   default     = 512
 }
 
+variable "sweep_schedule" {
+  description = "EventBridge schedule for the fleet health sweep, e.g. rate(10 minutes); empty disables it"
+  type        = string
+  default     = ""
+}
+
 variable "allowed_origins" {
   description = "Allowed CORS origins for API Gateway"
   type        = list(string)
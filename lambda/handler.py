@@ -2,24 +2,33 @@
 Operations Agent Lambda Handler
 Handles chat requests and orchestrates pipeline analysis.
 """
+import time
+# Captured before the remaining imports so cold-start profiling covers them
+MODULE_IMPORT_STARTED = time.perf_counter()
+
+import contextvars
+import hashlib
+import importlib
 import json
 import os
-import boto3
+import random
+import re
+import sys
 import uuid
+import zlib
 import logging
+import math
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Callable, Iterator
 
 # Configure structured logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize AWS clients
-ddb = boto3.resource('dynamodb')
-logs_client = boto3.client('logs')
-sfn_client = boto3.client('stepfunctions')
-bedrock_client = boto3.client('bedrock-runtime', region_name=os.getenv('DEFAULT_REGION', 'us-east-1'))
-
 # Environment variables
 CONVERSATIONS_TABLE = os.getenv('DDB_CONVERSATIONS_TABLE')
 PIPELINES_TABLE = os.getenv('DDB_PIPELINES_TABLE')
@@ -27,80 +36,2026 @@ DEFAULT_REGION = os.getenv('DEFAULT_REGION', 'us-east-1')
 BEDROCK_MODEL_ID = os.getenv('BEDROCK_MODEL_ID', '')
 # Support both OPENAI_API_KEY and OPEN_AI_AGENT for compatibility
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY') or os.getenv('OPEN_AI_AGENT', '')
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+# Optional shared cache table (LLM responses and other short-lived agent state)
+CACHE_TABLE = os.getenv('DDB_CACHE_TABLE')
+# Evidence collection: bounded fan-out and per-source timeout (seconds)
+EVIDENCE_MAX_WORKERS = int(os.getenv('EVIDENCE_MAX_WORKERS', '16'))
+EVIDENCE_SOURCE_TIMEOUT = float(os.getenv('EVIDENCE_SOURCE_TIMEOUT', '10'))
+# Log scan budgets: stop paging once either limit is reached
+LOG_SCAN_MAX_EVENTS = int(os.getenv('LOG_SCAN_MAX_EVENTS', '20000'))
+LOG_SCAN_MAX_BYTES = int(os.getenv('LOG_SCAN_MAX_BYTES', str(8 * 1024 * 1024)))
+LOG_SCAN_PAGE_SIZE = int(os.getenv('LOG_SCAN_PAGE_SIZE', '1000'))
+# Error-signature clustering: evidence items rendered, clusters kept, merge threshold
+LOG_SIGNATURE_LIMIT = int(os.getenv('LOG_SIGNATURE_LIMIT', '10'))
+LOG_SIGNATURE_MAX_CLUSTERS = int(os.getenv('LOG_SIGNATURE_MAX_CLUSTERS', '200'))
+LOG_SIGNATURE_SIMILARITY = float(os.getenv('LOG_SIGNATURE_SIMILARITY', '0.5'))
+# Logs Insights backend: used from this window size (hours) in auto mode, poll deadline (seconds)
+LOGS_INSIGHTS_MIN_HOURS = float(os.getenv('LOGS_INSIGHTS_MIN_HOURS', '6'))
+LOGS_INSIGHTS_TIMEOUT = float(os.getenv('LOGS_INSIGHTS_TIMEOUT', '8'))
+LOGS_INSIGHTS_MAX_GROUPS = int(os.getenv('LOGS_INSIGHTS_MAX_GROUPS', '1000'))
+# Most buckets in an Insights error histogram; longer windows get wider bins
+LOG_HISTOGRAM_MAX_BUCKETS = int(os.getenv('LOG_HISTOGRAM_MAX_BUCKETS', '168'))
+# Seconds a log group that exhausted the filter scan budget skips straight to Insights
+LOG_NOISY_GROUP_TTL = float(os.getenv('LOG_NOISY_GROUP_TTL', '3600'))
+DEFAULT_LOG_FILTER_PATTERN = 'ERROR Exception "error" "failed" "failure"'
+# Incremental scans: checkpoint bucket size, retention, ingestion lag and signatures kept
+LOG_SCAN_INCREMENTAL = os.getenv('LOG_SCAN_INCREMENTAL', 'true').lower() == 'true'
+LOG_CHECKPOINT_BUCKET_MS = int(os.getenv('LOG_CHECKPOINT_BUCKET_MINUTES', '60')) * 60 * 1000
+LOG_CHECKPOINT_RETENTION_HOURS = int(os.getenv('LOG_CHECKPOINT_RETENTION_HOURS', '168'))
+LOG_CHECKPOINT_LAG_MS = int(os.getenv('LOG_CHECKPOINT_LAG_SECONDS', '120')) * 1000
+LOG_CHECKPOINT_MAX_SIGNATURES = int(os.getenv('LOG_CHECKPOINT_MAX_SIGNATURES', '50'))
+# Pipeline catalog cache (seconds / entries); preload rescans the whole catalog in the
+# background every half TTL
+CATALOG_CACHE_TTL = float(os.getenv('CATALOG_CACHE_TTL', '300'))
+CATALOG_NEGATIVE_TTL = float(os.getenv('CATALOG_NEGATIVE_TTL', '60'))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', '1024'))
+CATALOG_PRELOAD = os.getenv('CATALOG_PRELOAD', 'false').lower() == 'true'
+# Pipeline names recognized in chat messages: index of catalog names (refreshed per
+# CATALOG_CACHE_TTL) and the "did you mean" suggestions offered for unknown names
+PIPELINE_INDEX_ENABLED = os.getenv('PIPELINE_INDEX_ENABLED', 'true').lower() == 'true'
+PIPELINE_SUGGESTIONS = int(os.getenv('PIPELINE_SUGGESTIONS', '3'))
+# SDK client tuning (seconds); clients are created lazily and reused across warm invocations
+AWS_CONNECT_TIMEOUT = float(os.getenv('AWS_CONNECT_TIMEOUT', '2'))
+AWS_READ_TIMEOUT = float(os.getenv('AWS_READ_TIMEOUT', '10'))
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '20'))
+# Read timeout of the LLM clients. boto3 timeouts are per client, so Bedrock calls
+# are bounded by the LLM stage deadline (invoke_llm stops waiting) rather than per call.
+LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', '60'))
+# Report per-dependency import and init times in responses
+COLD_START_PROFILE = os.getenv('COLD_START_PROFILE', 'false').lower() == 'true'
+# Step Functions failure drill-down: concurrent history fetches, pages read per
+# execution, in-memory entries and shared-tier retention (history is kept 90 days)
+SFN_HISTORY_MAX_WORKERS = int(os.getenv('SFN_HISTORY_MAX_WORKERS', '5'))
+SFN_HISTORY_MAX_PAGES = int(os.getenv('SFN_HISTORY_MAX_PAGES', '5'))
+SFN_FAILURE_CACHE_MAX_ENTRIES = int(os.getenv('SFN_FAILURE_CACHE_MAX_ENTRIES', '2048'))
+SFN_FAILURE_CACHE_DAYS = int(os.getenv('SFN_FAILURE_CACHE_DAYS', '90'))
+# Seconds to remember a history read that found no error (e.g. SFN_HISTORY_MAX_PAGES ran out)
+SFN_EMPTY_FAILURE_TTL = float(os.getenv('SFN_EMPTY_FAILURE_TTL', '300'))
+# Request deadline: time held back from the Lambda timeout for building the
+# response, fallback when no Lambda context is available, and the least LLM time worth trying
+DEADLINE_SAFETY_MS = int(os.getenv('DEADLINE_SAFETY_MS', '1500'))
+DEFAULT_REQUEST_TIMEOUT_MS = int(os.getenv('DEFAULT_REQUEST_TIMEOUT_MS', '30000'))
+LLM_MIN_BUDGET_SECONDS = float(os.getenv('LLM_MIN_BUDGET_SECONDS', '2'))
+# Threads for deadline-bounded stage calls; raise with concurrent requests per process (server mode)
+STAGE_MAX_WORKERS = int(os.getenv('STAGE_MAX_WORKERS', '8'))
+# Relative share of the remaining time each stage gets, in execution order.
+# Conversation writes are queued, not a stage: flush_on_lambda bounds them.
+STAGE_WEIGHTS = {'catalog': 1, 'evidence': 5, 'llm': 5}
+# Batch analysis: pipelines analyzed at once and maximum pipelines per request
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '8'))
+BATCH_MAX_PIPELINES = int(os.getenv('BATCH_MAX_PIPELINES', '100'))
+# Scheduled sweep (EventBridge): every catalog pipeline is analyzed ahead of time and
+# its report stored in the cache table; chat answers use a report younger than
+# PRECOMPUTED_MAX_AGE_SECONDS instead of gathering evidence again
+PRECOMPUTED_ENABLED = os.getenv('PRECOMPUTED_ENABLED', 'true').lower() == 'true'
+PRECOMPUTED_MAX_AGE_SECONDS = int(os.getenv('PRECOMPUTED_MAX_AGE_SECONDS', '900'))
+SWEEP_HOURS_BACK = int(os.getenv('SWEEP_HOURS_BACK', '24'))
+SWEEP_MAX_CONCURRENCY = int(os.getenv('SWEEP_MAX_CONCURRENCY', '8'))
+# A sweep skips pipelines whose stored report is younger than this, so sweeps that
+# run out of time continue where the last one stopped
+SWEEP_REFRESH_SECONDS = int(os.getenv('SWEEP_REFRESH_SECONDS', '600'))
+SWEEP_HISTOGRAM_BUCKET_MINUTES = int(os.getenv('SWEEP_HISTOGRAM_BUCKET_MINUTES', '60'))
+# LLM response cache (seconds / entries); tolerant mode ignores timestamp-only report changes
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', '600'))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '256'))
+LLM_CACHE_TOLERANT = os.getenv('LLM_CACHE_TOLERANT', 'true').lower() == 'true'
+# LLM prompt budget: estimated input tokens for the serialized report, and the
+# completion budget (a base plus a share per evidence item, capped)
+LLM_INPUT_TOKEN_BUDGET = int(os.getenv('LLM_INPUT_TOKEN_BUDGET', '1500'))
+LLM_MAX_TOKENS_BASE = int(os.getenv('LLM_MAX_TOKENS_BASE', '250'))
+LLM_MAX_TOKENS_PER_ITEM = int(os.getenv('LLM_MAX_TOKENS_PER_ITEM', '60'))
+LLM_MAX_TOKENS_CAP = int(os.getenv('LLM_MAX_TOKENS_CAP', '1000'))
+# LLM routing: preferred provider when both are configured, hedged requests to the
+# other provider after the first has run past its recent latency percentile (the
+# delay in seconds is used until enough samples are in), and concurrent LLM calls
+LLM_PRIMARY = os.getenv('LLM_PRIMARY', 'openai')
+LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'true').lower() == 'true'
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', '5'))
+LLM_HEDGE_MIN_DELAY = float(os.getenv('LLM_HEDGE_MIN_DELAY', '0.5'))
+LLM_MAX_WORKERS = int(os.getenv('LLM_MAX_WORKERS', '8'))
+# Rolling per-provider stats: calls kept, calls needed before they are trusted, and
+# the error rate above which a provider is tried second
+LLM_STATS_WINDOW = int(os.getenv('LLM_STATS_WINDOW', '100'))
+LLM_STATS_MIN_SAMPLES = int(os.getenv('LLM_STATS_MIN_SAMPLES', '20'))
+LLM_MAX_ERROR_RATE = float(os.getenv('LLM_MAX_ERROR_RATE', '0.5'))
+# AWS API governor: client-side rate limits as API -> [calls per second, burst], merged
+# over the defaults below, plus per-API concurrency, retries and backoff (seconds)
+GOVERNOR_RATE_LIMITS = json.loads(os.getenv('GOVERNOR_RATE_LIMITS', '{}'))
+GOVERNOR_MAX_CONCURRENCY = int(os.getenv('GOVERNOR_MAX_CONCURRENCY', '8'))
+GOVERNOR_MAX_RETRIES = int(os.getenv('GOVERNOR_MAX_RETRIES', '4'))
+# Longest wait for capacity per attempt
+GOVERNOR_MAX_WAIT = float(os.getenv('GOVERNOR_MAX_WAIT', '5'))
+GOVERNOR_BACKOFF_BASE = float(os.getenv('GOVERNOR_BACKOFF_BASE', '0.2'))
+GOVERNOR_BACKOFF_CAP = float(os.getenv('GOVERNOR_BACKOFF_CAP', '3'))
+# Single-flight coalescing of identical concurrent questions; a finished answer is
+# also handed to duplicates in other containers for this many seconds (needs the cache table)
+COALESCE_ENABLED = os.getenv('COALESCE_ENABLED', 'true').lower() == 'true'
+COALESCE_RESULT_SECONDS = int(os.getenv('COALESCE_RESULT_SECONDS', '5'))
+# Conversation memory: the last turns (within a token budget) are sent with each
+# question; turns that fall out of the window are folded into a rolling digest
+MEMORY_ENABLED = os.getenv('MEMORY_ENABLED', 'true').lower() == 'true'
+MEMORY_MAX_TURNS = int(os.getenv('MEMORY_MAX_TURNS', '6'))
+MEMORY_TOKEN_BUDGET = int(os.getenv('MEMORY_TOKEN_BUDGET', '800'))
+MEMORY_TURN_MAX_CHARS = int(os.getenv('MEMORY_TURN_MAX_CHARS', '1200'))
+MEMORY_DIGEST_MAX_CHARS = int(os.getenv('MEMORY_DIGEST_MAX_CHARS', '1500'))
+MEMORY_LOAD_TIMEOUT = float(os.getenv('MEMORY_LOAD_TIMEOUT', '1'))
+# Conversation turns are written in the background in batches; agent responses of
+# at least this many bytes are stored zlib-compressed
+CONVERSATION_COMPRESS_MIN_BYTES = int(os.getenv('CONVERSATION_COMPRESS_MIN_BYTES', '1024'))
+PERSIST_QUEUE_MAX = int(os.getenv('PERSIST_QUEUE_MAX', '1000'))
+PERSIST_MAX_ATTEMPTS = int(os.getenv('PERSIST_MAX_ATTEMPTS', '5'))
+# On Lambda, how long the handler waits for queued writes before returning
+PERSIST_FLUSH_SECONDS = float(os.getenv('PERSIST_FLUSH_SECONDS', '0.5'))
+# Request tracing: per-stage spans emitted as CloudWatch EMF metrics and a Server-Timing header
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'OpsAgent')
+METRICS_SERVICE = os.getenv('METRICS_SERVICE', 'ops-agent')
+# EMF accepts at most 100 values per metric in one record
+EMF_MAX_VALUES = 100
+
+AGENT_SYSTEM_PROMPT = """You are an AWS Operations Support Agent specialized in data platforms, SQL pipelines, and cloud workflows.
+
+Your role is to help engineers understand operational state and troubleshoot issues.
+
+Be concise, technical, and objective. Base conclusions only on provided evidence.
+If information is missing, ask for minimum required detail (pipeline name, time range, environment).
+
+Always structure your response as:
+1) Summary - One or two sentences describing the current situation
+2) Evidence - Bullet points with concrete signals (errors, timestamps, execution status)
+3) Probable cause - Hypothesis based strictly on the evidence
+4) Recommended next steps - Clear, actionable steps
+
+Write in the same language as the user."""
+
+# Lazily created SDK clients, shared across warm invocations
+clients: Dict[str, Any] = {}
+clients_lock = threading.Lock()
+# Milliseconds spent importing ('import:<module>') and creating ('client:<name>') each dependency
+init_timings: Dict[str, float] = {}
+container_state = {'cold_start': True, 'module_init_ms': 0.0}
+
+
+def import_sdk(module_name: str) -> Any:
+    """Import an SDK module on first use, recording how long the import took."""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    init_timings[f'import:{module_name}'] = round((time.perf_counter() - started) * 1000, 2)
+    return module
+
+
+def boto_config(read_timeout: Optional[float] = None, max_attempts: int = 3) -> Any:
+    """Connection pooling, keep-alive and timeout settings shared by all AWS clients.
+
+    Clients whose calls go through governed_call use max_attempts=1 so
+    throttles reach the governor instead of being retried blindly.
+    """
+    config = import_sdk('botocore.config')
+    return config.Config(
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=AWS_READ_TIMEOUT if read_timeout is None else read_timeout,
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        retries={'mode': 'standard', 'max_attempts': max_attempts}
+    )
+
+
+CLIENT_FACTORIES: Dict[str, Callable[[], Any]] = {
+    'dynamodb': lambda: import_sdk('boto3').resource('dynamodb', config=boto_config()),
+    'logs': lambda: import_sdk('boto3').client('logs', config=boto_config(max_attempts=1)),
+    'stepfunctions': lambda: import_sdk('boto3').client('stepfunctions', config=boto_config(max_attempts=1)),
+    'bedrock-runtime': lambda: import_sdk('boto3').client(
+        'bedrock-runtime', region_name=DEFAULT_REGION, config=boto_config(LLM_READ_TIMEOUT)
+    ),
+    'openai': lambda: import_sdk('openai').OpenAI(api_key=OPENAI_API_KEY, timeout=LLM_READ_TIMEOUT, max_retries=1),
+}
+
+
+def get_client(name: str) -> Any:
+    """Return the memoized SDK client for name, creating it on first use."""
+    client = clients.get(name)
+    if client is not None:
+        return client
+    with clients_lock:
+        client = clients.get(name)
+        if client is None:
+            imports_before = sum(v for k, v in init_timings.items() if k.startswith('import:'))
+            started = time.perf_counter()
+            client = CLIENT_FACTORIES[name]()
+            imports_after = sum(v for k, v in init_timings.items() if k.startswith('import:'))
+            elapsed = (time.perf_counter() - started) * 1000 - (imports_after - imports_before)
+            init_timings[f'client:{name}'] = round(elapsed, 2)
+            clients[name] = client
+    return client
+
+
+def get_table(table_name: Optional[str]) -> Any:
+    """Return the memoized DynamoDB Table for table_name, or None if unset."""
+    if not table_name:
+        return None
+    key = f'table:{table_name}'
+    table = clients.get(key)
+    if table is None:
+        resource = get_client('dynamodb')
+        with clients_lock:
+            table = clients.setdefault(key, resource.Table(table_name))
+    return table
+
 
-# DynamoDB tables
-conversations_table = ddb.Table(CONVERSATIONS_TABLE) if CONVERSATIONS_TABLE else None
-pipelines_table = ddb.Table(PIPELINES_TABLE) if PIPELINES_TABLE else None
+def cold_start_report(cold_start: bool) -> Dict[str, Any]:
+    """Summarize container init costs for COLD_START_PROFILE responses."""
+    return {
+        'cold_start': cold_start,
+        'module_init_ms': container_state['module_init_ms'],
+        'dependencies': dict(init_timings)
+    }
+
+
+class RequestTrace:
+    """Timing spans and counters collected while serving one request.
+
+    Spans with the same name are aggregated (e.g. every CloudWatch Logs page
+    is one 'logs' sample). Evidence sources record from worker threads, so
+    updates are locked.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}
+        self.counters: Dict[str, float] = {}
+        self.properties: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def add_span(self, name: str, duration_ms: float):
+        with self.lock:
+            self.spans.setdefault(name, []).append(duration_ms)
+
+    def count(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: summed duration and call count per span."""
+        with self.lock:
+            spans = {name: list(values) for name, values in self.spans.items()}
+        entries = [
+            f'{name};dur={sum(values):.1f};desc="{len(values)} call{"s" if len(values) > 1 else ""}"'
+            for name, values in spans.items()
+        ]
+        entries.append(f'total;dur={self.total_ms():.1f}')
+        return ', '.join(entries)
+
+    def emf_record(self, cold_start: bool) -> Dict[str, Any]:
+        """Build a CloudWatch Embedded Metric Format record for this request.
+
+        Span samples are emitted as value arrays so CloudWatch can compute
+        p50/p99; the ColdStart dimension separates cold from warm latency.
+        """
+        with self.lock:
+            spans = {name: list(values) for name, values in self.spans.items()}
+            counters = dict(self.counters)
+        spans['total'] = [self.total_ms()]
+        for prefix in ('catalog_cache', 'llm_cache', 'sfn_cache'):
+            lookups = sum(v for k, v in counters.items() if k.startswith(prefix + '_'))
+            if lookups:
+                hits = sum(v for k, v in counters.items() if k.startswith(prefix + '_') and k.endswith('hit'))
+                counters[f'{prefix}_hit_rate'] = round(hits / lookups, 4)
+        
+        metrics = [{'Name': name, 'Unit': 'Milliseconds'} for name in spans]
+        metrics += [
+            {'Name': name, 'Unit': 'None' if name.endswith('_rate') else 'Count'}
+            for name in counters
+        ]
+        record: Dict[str, Any] = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['Service'], ['Service', 'ColdStart']],
+                    'Metrics': metrics
+                }]
+            },
+            'Service': METRICS_SERVICE,
+            'ColdStart': str(cold_start).lower()
+        }
+        record.update(self.properties)
+        for name, values in spans.items():
+            values = [round(v, 2) for v in values[:EMF_MAX_VALUES]]
+            record[name] = values[0] if len(values) == 1 else values
+        record.update(counters)
+        return record
+
+
+# The active request's trace; None when tracing is disabled or outside a request
+current_trace: contextvars.ContextVar = contextvars.ContextVar('current_trace', default=None)
+# Monotonic time at which the active stage's caller stops waiting; None when
+# unbounded. Governed calls, log paging and Insights polling stop once it passes,
+# so work the caller has given up on does not keep calling AWS.
+stage_stop_at: contextvars.ContextVar = contextvars.ContextVar('stage_stop_at', default=None)
+
+
+@contextmanager
+def trace_span(name: str) -> Iterator[None]:
+    """Time the enclosed block as span name of the active trace, if any."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, (time.perf_counter() - started) * 1000)
+
+
+def trace_count(name: str, value: float = 1):
+    """Add value to counter name of the active trace, if any."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.count(name, value)
+
+
+@contextmanager
+def stage_stop(stop_at: float) -> Iterator[None]:
+    """Set the stage stop time for work submitted within the block.
+
+    Never extends an enclosing stop time.
+    """
+    current = stage_stop_at.get()
+    token = stage_stop_at.set(stop_at if current is None else min(current, stop_at))
+    try:
+        yield
+    finally:
+        stage_stop_at.reset(token)
+
+
+def stage_time_left() -> Optional[float]:
+    """Seconds until the active stage's stop time, or None when it has none."""
+    stop_at = stage_stop_at.get()
+    return None if stop_at is None else stop_at - time.monotonic()
+
+
+def submit_traced(executor: ThreadPoolExecutor, fn: Callable[..., Any], *args: Any) -> Any:
+    """Submit fn to executor, carrying the active trace and stage stop time into the worker thread."""
+    if current_trace.get() is None and stage_stop_at.get() is None:
+        return executor.submit(fn, *args)
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+# Shared across warm invocations so threads are not recreated per request
+evidence_executor = ThreadPoolExecutor(max_workers=EVIDENCE_MAX_WORKERS, thread_name_prefix='evidence')
+# History fetches run from inside an evidence task, so they get their own pool
+sfn_history_executor = ThreadPoolExecutor(max_workers=SFN_HISTORY_MAX_WORKERS, thread_name_prefix='sfn-history')
+# Runs deadline-bounded stage calls (catalog, LLM) so the request can stop waiting
+stage_executor = ThreadPoolExecutor(max_workers=STAGE_MAX_WORKERS, thread_name_prefix='stage')
+# LLM calls, primary and hedge; the caller waits on them from a stage thread
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix='llm')
+# Separate pool for whole-pipeline tasks: they submit to evidence_executor and
+# must not wait on themselves
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_CONCURRENCY, thread_name_prefix='batch')
+# Whole-pipeline tasks of a scheduled sweep, kept apart from interactive batches
+sweep_executor = ThreadPoolExecutor(max_workers=SWEEP_MAX_CONCURRENCY, thread_name_prefix='sweep')
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL.
+
+    Lives at module level so it survives across warm invocations. A cached
+    None is a valid (negative) entry, so lookups return a (hit, value) pair.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Tuple[bool, Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key: Any = None):
+        """Drop one entry, or every entry when no key is given."""
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+
+class SingleFlight:
+    """Collapses concurrent calls that share a key into one execution.
+
+    The first caller (the leader) runs the work; callers arriving while it
+    is in flight wait for its result instead of repeating it.
+    """
+
+    def __init__(self):
+        self.calls: Dict[Any, Future] = {}
+        self.lock = threading.Lock()
+
+    def do(self, key: Any, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Return fn's result and whether it came from another caller's run.
+
+        A waiter that gives up after timeout seconds runs fn itself.
+        """
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+        
+        if not leader:
+            try:
+                return future.result(timeout=timeout), True
+            except FutureTimeoutError:
+                return fn(), False
+        
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+
+
+# Default client-side limits (calls per second, burst): the default per-account,
+# per-Region service quotas. One container may use the whole quota; the containers
+# sharing an account settle below it by backing off on the service's throttles.
+DEFAULT_API_RATE_LIMITS: Dict[str, Tuple[float, float]] = {
+    'logs:FilterLogEvents': (25, 25),
+    'logs:StartQuery': (5, 5),
+    'logs:GetQueryResults': (5, 5),
+    'states:ListExecutions': (2, 100),
+    'states:GetExecutionHistory': (5, 250),
+    'states:DescribeExecution': (15, 250),
+}
+# Error codes (and HTTP 429) meaning "slow down"; the governor adapts to these
+THROTTLE_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'TooManyRequestsException',
+    'RequestLimitExceeded', 'ProvisionedThroughputExceededException', 'LimitExceededException',
+    'RequestThrottled', 'RequestThrottledException', 'SlowDown'
+}
+# Errors worth retrying without slowing down
+TRANSIENT_ERROR_CODES = {'InternalFailure', 'InternalServerError', 'ServiceUnavailable', 'ServiceUnavailableException'}
+TRANSIENT_ERROR_TYPES = {'EndpointConnectionError', 'ConnectionClosedError', 'ReadTimeoutError', 'ConnectTimeoutError'}
+
+
+class ThrottleError(Exception):
+    """An AWS API stayed throttled through every retry (or had no capacity in time)."""
+
+
+class StageExpired(Exception):
+    """The active stage's stop time passed before the next AWS call (see stage_stop_at)."""
+
+
+def classify_aws_error(error: Exception) -> Optional[str]:
+    """Return 'throttle', 'transient' or None (not retryable) for an SDK error."""
+    response = getattr(error, 'response', None) or {}
+    code = response.get('Error', {}).get('Code')
+    status = response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    if code in THROTTLE_ERROR_CODES or status == 429:
+        return 'throttle'
+    if code in TRANSIENT_ERROR_CODES or type(error).__name__ in TRANSIENT_ERROR_TYPES or (status or 0) >= 500:
+        return 'transient'
+    return None
+
+
+class ApiGovernor:
+    """Client-side rate and concurrency limits for one AWS API, adapted to throttling.
+
+    A token bucket paces calls at rate per second (bursting up to burst) and
+    a concurrency limit caps calls in flight. A throttle halves both, once
+    per round of calls; each success wins a little back. A container
+    therefore settles just under the throughput the account allows instead
+    of retrying into a throttle storm. Lives at module level, so the learned
+    limits carry over between warm invocations.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, max_concurrency: int):
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self.in_flight = 0
+        self.successes = 0
+        self.throttles = 0
+        self.decreased_at = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        """Wait for a token and a concurrency slot; False if none within timeout."""
+        give_up_at = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+                self.refilled_at = now
+                if self.tokens >= 1 and self.in_flight < self.concurrency:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return True
+                if now >= give_up_at:
+                    return False
+                # Wake for the next token; a released slot notifies sooner
+                token_wait = (1 - self.tokens) / self.rate if self.tokens < 1 else give_up_at - now
+                self.condition.wait(min(give_up_at - now, max(token_wait, 0.001)))
+
+    def release(self, started_at: float, throttled: bool = False):
+        """Return the slot of a call started at started_at and adapt to its outcome."""
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttles += 1
+                self.successes = 0
+                # Calls already in flight when we slowed down report stale throttles
+                if started_at >= self.decreased_at:
+                    self.decreased_at = time.monotonic()
+                    self.rate = max(self.max_rate / 20, self.rate / 2)
+                    self.concurrency = max(1, self.concurrency // 2)
+                    self.tokens = min(self.tokens, 0.0)
+            else:
+                self.successes += 1
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+                if self.successes >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self.successes = 0
+            self.condition.notify_all()
+
+
+api_governors: Dict[str, ApiGovernor] = {}
+api_governors_lock = threading.Lock()
+
+
+def get_governor(api: str) -> ApiGovernor:
+    """Return the shared governor for api ('service:Operation')."""
+    governor = api_governors.get(api)
+    if governor is None:
+        with api_governors_lock:
+            governor = api_governors.get(api)
+            if governor is None:
+                rate, burst = GOVERNOR_RATE_LIMITS.get(api) or DEFAULT_API_RATE_LIMITS.get(api, (10, 10))
+                governor = api_governors[api] = ApiGovernor(api, float(rate), float(burst), GOVERNOR_MAX_CONCURRENCY)
+    return governor
+
+
+def governor_backoff(attempt: int):
+    """Sleep a full-jitter backoff, cut short at the stage stop time.
+
+    Full jitter keeps retries from many callers from arriving in lockstep.
+    """
+    delay = random.uniform(0, min(GOVERNOR_BACKOFF_CAP, GOVERNOR_BACKOFF_BASE * 2 ** attempt))
+    time_left = stage_time_left()
+    time.sleep(delay if time_left is None else max(0.0, min(delay, time_left)))
+
+
+def governed_call(api: str, fn: Callable[..., Any], **kwargs: Any) -> Any:
+    """Call fn(**kwargs) within api's governor, retrying throttles with jittered backoff.
+
+    Finding no capacity within GOVERNOR_MAX_WAIT counts as a throttle and is
+    retried the same way. Raises ThrottleError once retries run out, so
+    callers can report the source as throttled rather than empty, and
+    StageExpired instead of starting an attempt after the stage stop time.
+    Other errors propagate unchanged.
+    """
+    governor = get_governor(api)
+    for attempt in range(GOVERNOR_MAX_RETRIES + 1):
+        time_left = stage_time_left()
+        if time_left is not None and time_left <= 0:
+            raise StageExpired(f"{api}: stage stop time passed after {attempt} attempts")
+        if not governor.acquire(GOVERNOR_MAX_WAIT if time_left is None else min(GOVERNOR_MAX_WAIT, time_left)):
+            trace_count('aws_throttle_retries')
+            if attempt == GOVERNOR_MAX_RETRIES:
+                trace_count('aws_throttled')
+                raise ThrottleError(f"{api}: no capacity within {GOVERNOR_MAX_WAIT:.0f}s after {attempt + 1} attempts")
+            governor_backoff(attempt)
+            continue
+        started_at = time.monotonic()
+        try:
+            result = fn(**kwargs)
+        except Exception as e:
+            kind = classify_aws_error(e)
+            governor.release(started_at, throttled=kind == 'throttle')
+            if kind is None:
+                raise
+            trace_count('aws_throttle_retries' if kind == 'throttle' else 'aws_transient_retries')
+            if attempt == GOVERNOR_MAX_RETRIES:
+                if kind == 'throttle':
+                    trace_count('aws_throttled')
+                    raise ThrottleError(f"{api} throttled after {attempt + 1} attempts") from e
+                raise
+            governor_backoff(attempt)
+            continue
+        governor.release(started_at)
+        return result
+
+
+catalog_cache = TTLCache(CATALOG_CACHE_MAX_ENTRIES, CATALOG_CACHE_TTL)
+# Set while a complete catalog preload is fresh: a cache miss then means the
+# pipeline does not exist, so no get_item is needed. The next preload starts
+# at refresh_after, halfway through, so it lands before the old copy expires.
+catalog_preload_state = {'complete_until': 0.0, 'refresh_after': 0.0, 'lock': threading.Lock()}
+
+
+def iter_pipeline_catalog() -> Iterator[Dict[str, Any]]:
+    """Yield every pipelines catalog item, one Scan page at a time.
+
+    Items are also put in the catalog cache as they go by.
+    """
+    kwargs: Dict[str, Any] = {}
+    while True:
+        with trace_span('catalog'):
+            response = get_table(PIPELINES_TABLE).scan(**kwargs)
+        for item in response.get('Items', []):
+            catalog_cache.set(item['pipeline_name'], item)
+            yield item
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def preload_pipeline_catalog() -> int:
+    """Load the whole pipelines catalog into the cache with a paginated Scan.
+
+    Returns the number of items loaded. The preload is authoritative for
+    misses only when the entire catalog fits in the cache.
+    """
+    if not PIPELINES_TABLE:
+        return 0
+    
+    names = []
+    try:
+        for item in iter_pipeline_catalog():
+            names.append(item['pipeline_name'])
+    except Exception as e:
+        logger.error(f"Error preloading pipeline catalog: {str(e)}", exc_info=True)
+        return len(names)
+    
+    count = len(names)
+    pipeline_index_state['index'] = PipelineNameIndex(names)
+    pipeline_index_state['fresh_until'] = time.monotonic() + CATALOG_CACHE_TTL
+    if count <= CATALOG_CACHE_MAX_ENTRIES:
+        catalog_preload_state['complete_until'] = time.monotonic() + CATALOG_CACHE_TTL
+    catalog_preload_state['refresh_after'] = time.monotonic() + CATALOG_CACHE_TTL / 2
+    logger.info(f"Preloaded {count} pipelines into catalog cache")
+    return count
+
+
+def refresh_pipeline_catalog():
+    """Start a catalog preload on a background thread, unless one is running.
+
+    Requests keep being served from the current cache (or get_item) while
+    it runs. A failed preload is retried after half a TTL, not per request.
+    """
+    if not catalog_preload_state['lock'].acquire(blocking=False):
+        return
+    
+    def run():
+        try:
+            preload_pipeline_catalog()
+        finally:
+            if catalog_preload_state['refresh_after'] <= time.monotonic():
+                catalog_preload_state['refresh_after'] = time.monotonic() + CATALOG_CACHE_TTL / 2
+            catalog_preload_state['lock'].release()
+    
+    threading.Thread(target=run, name='catalog-refresh', daemon=True).start()
+
+
+class RequestDeadline:
+    """Splits the time left in an invocation between the request's stages.
+
+    A stage's budget is its weight's share of the time remaining among the
+    stages still to run, so time a fast stage leaves unused flows to later
+    ones. Stages that overrun are recorded so the response can be flagged
+    as partial.
+    """
+
+    def __init__(self, remaining_ms: float):
+        self.expires_at = time.monotonic() + max(0.0, remaining_ms - DEADLINE_SAFETY_MS) / 1000
+        self.overrun: List[str] = []
+
+    @classmethod
+    def from_context(cls, context: Any) -> 'RequestDeadline':
+        get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        return cls(get_remaining() if get_remaining else DEFAULT_REQUEST_TIMEOUT_MS)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def budget(self, stage: str) -> float:
+        """Seconds stage may use, leaving the later stages their share."""
+        stages = list(STAGE_WEIGHTS)
+        later = stages[stages.index(stage):]
+        return self.remaining() * STAGE_WEIGHTS[stage] / sum(STAGE_WEIGHTS[name] for name in later)
+
+    def run(self, stage: str, fn: Callable[[], Any], timeout: Optional[float] = None, required: bool = True) -> Any:
+        """Run fn within the stage budget; on overrun record it and return None.
+
+        A stage still queued at the deadline is cancelled. One already
+        running cannot be interrupted; its AWS calls stop at the stage stop
+        time, and callers pass the budget down as per-call timeouts (see
+        invoke_llm) to bound the rest of the work left behind. Work that is
+        not required (the caller has a fallback) is not recorded as overrun,
+        so it does not make the answer partial.
+        """
+        timeout = self.budget(stage) if timeout is None else timeout
+        with stage_stop(time.monotonic() + timeout):
+            future = submit_traced(stage_executor, fn)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(f"Stage {stage} exceeded its {timeout:.1f}s budget")
+            if required:
+                self.overrun.append(stage)
+            return None
 
 
 def get_pipeline_info(pipeline_name: str) -> Optional[Dict[str, Any]]:
-    """Get pipeline information from catalog."""
-    if not pipelines_table:
+    """Get pipeline information from catalog (cached across warm invocations)."""
+    if not PIPELINES_TABLE:
+        return None
+    
+    if CATALOG_PRELOAD and catalog_preload_state['refresh_after'] <= time.monotonic():
+        refresh_pipeline_catalog()
+    
+    hit, item = catalog_cache.get(pipeline_name)
+    trace_count('catalog_cache_hit' if hit else 'catalog_cache_miss')
+    if hit:
+        return item
+    if catalog_preload_state['complete_until'] > time.monotonic():
+        catalog_cache.set(pipeline_name, None, ttl=CATALOG_NEGATIVE_TTL)
         return None
     
     try:
-        response = pipelines_table.get_item(
-            Key={'pipeline_name': pipeline_name}
-        )
-        return response.get('Item')
+        with trace_span('catalog'):
+            response = get_table(PIPELINES_TABLE).get_item(
+                Key={'pipeline_name': pipeline_name}
+            )
+        item = response.get('Item')
+        catalog_cache.set(pipeline_name, item, ttl=CATALOG_CACHE_TTL if item else CATALOG_NEGATIVE_TTL)
+        return item
     except Exception as e:
         logger.error(f"Error getting pipeline info: {str(e)}", exc_info=True)
         return None
 
 
-def save_conversation(conversation_id: str, user_message: str, agent_response: str):
-    """Save conversation to DynamoDB."""
-    if not conversations_table:
+def get_pipeline_infos(pipeline_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Get catalog entries for many pipelines, fetching cache misses with BatchGetItem.
+
+    Pipelines missing from the catalog map to None. Names that could not be
+    fetched (errors, unprocessed keys left after retries) are omitted.
+    """
+    infos: Dict[str, Optional[Dict[str, Any]]] = {}
+    if not PIPELINES_TABLE:
+        return {name: None for name in pipeline_names}
+    
+    missing = []
+    for name in pipeline_names:
+        hit, item = catalog_cache.get(name)
+        trace_count('catalog_cache_hit' if hit else 'catalog_cache_miss')
+        if hit:
+            infos[name] = item
+        else:
+            missing.append(name)
+    
+    resource = get_client('dynamodb')
+    # BatchGetItem accepts at most 100 keys per call
+    for offset in range(0, len(missing), 100):
+        chunk = missing[offset:offset + 100]
+        request = {PIPELINES_TABLE: {'Keys': [{'pipeline_name': name} for name in chunk]}}
+        try:
+            for attempt in range(3):
+                with trace_span('catalog'):
+                    response = resource.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(PIPELINES_TABLE, []):
+                    infos[item['pipeline_name']] = item
+                    catalog_cache.set(item['pipeline_name'], item)
+                request = response.get('UnprocessedKeys') or {}
+                if not request:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+        except Exception as e:
+            logger.error(f"Error batch getting pipeline info: {str(e)}", exc_info=True)
+            continue
+        
+        unprocessed = {key['pipeline_name'] for key in request.get(PIPELINES_TABLE, {}).get('Keys', [])}
+        for name in chunk:
+            if name not in infos and name not in unprocessed:
+                infos[name] = None
+                catalog_cache.set(name, None, ttl=CATALOG_NEGATIVE_TTL)
+    
+    return infos
+
+
+# Characters a pipeline name may contain (common in AWS resource names)
+PIPELINE_NAME_PATTERN = re.compile(r'^[a-zA-Z0-9_\-./:]+$')
+PIPELINE_NAME_INVALID_CHAR = re.compile(r'[^a-zA-Z0-9_\-./:]')
+# A catalog name only matches a whole word: no name characters may touch it
+PIPELINE_NAME_WORD_CHARS = set('abcdefghijklmnopqrstuvwxyz0123456789_-')
+
+
+class PipelineNameIndex:
+    """Aho-Corasick automaton over the catalog's pipeline names.
+
+    find() reports every catalog name in a message in one pass over its
+    characters, however many names there are. Matching ignores case;
+    results use the catalog's spelling.
+    """
+
+    def __init__(self, names: List[str]):
+        self.names = {name.lower(): name for name in names}
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[str]] = [[]]
+        for key in self.names:
+            state = 0
+            for char in key:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(key)
+        
+        # Breadth-first failure links: the longest proper suffix that is also a prefix
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.names
+
+    def find(self, text: str) -> List[str]:
+        """Catalog names occurring as whole words in text, longest first."""
+        text = text.lower()
+        found = set()
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for key in self.output[state]:
+                start = end + 1 - len(key)
+                before = text[start - 1] if start > 0 else ' '
+                after = text[end + 1] if end + 1 < len(text) else ' '
+                if before not in PIPELINE_NAME_WORD_CHARS and after not in PIPELINE_NAME_WORD_CHARS:
+                    found.add(key)
+        return [self.names[key] for key in sorted(found, key=lambda key: (-len(key), key))]
+
+    def suggest(self, name: str, limit: int = PIPELINE_SUGGESTIONS) -> List[str]:
+        """Catalog names within a small edit distance of name, closest first."""
+        key = name.lower()
+        max_distance = max(1, len(key) // 4)
+        scored = []
+        for candidate in self.names:
+            if abs(len(candidate) - len(key)) > max_distance:
+                continue
+            distance = edit_distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                scored.append((distance, candidate))
+        return [self.names[candidate] for _, candidate in sorted(scored)[:limit]]
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between a and b, or limit + 1 once it must exceed limit."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+# The catalog name index, rebuilt once per CATALOG_CACHE_TTL (and by every preload)
+pipeline_index_state: Dict[str, Any] = {'index': None, 'fresh_until': 0.0, 'lock': threading.Lock()}
+
+
+def get_pipeline_index() -> Optional[PipelineNameIndex]:
+    """Return the catalog name index, loading pipeline names with a keys-only Scan when stale.
+
+    Returns the last good index (or None) if the catalog cannot be read.
+    Only one caller refreshes a stale index; the others use the old one.
+    """
+    if not PIPELINES_TABLE or not PIPELINE_INDEX_ENABLED:
+        return None
+    if pipeline_index_state['fresh_until'] > time.monotonic():
+        return pipeline_index_state['index']
+    if not pipeline_index_state['lock'].acquire(blocking=pipeline_index_state['index'] is None):
+        return pipeline_index_state['index']
+    try:
+        if pipeline_index_state['fresh_until'] > time.monotonic():
+            return pipeline_index_state['index']
+        names = []
+        kwargs: Dict[str, Any] = {'ProjectionExpression': 'pipeline_name'}
+        while True:
+            with trace_span('catalog'):
+                response = get_table(PIPELINES_TABLE).scan(**kwargs)
+            names.extend(item['pipeline_name'] for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        pipeline_index_state['index'] = PipelineNameIndex(names)
+        logger.info(f"Indexed {len(names)} pipeline names")
+    except Exception as e:
+        logger.error(f"Error loading pipeline names: {str(e)}", exc_info=True)
+    finally:
+        # Also after errors, so a failing Scan is not retried on every request
+        pipeline_index_state['fresh_until'] = time.monotonic() + CATALOG_CACHE_TTL
+        pipeline_index_state['lock'].release()
+    return pipeline_index_state['index']
+
+
+# Sort key of a conversation's digest item: above any millisecond timestamp, so a
+# newest-first Query returns the digest ahead of the turns
+MEMORY_DIGEST_TIMESTAMP = 2 ** 53 - 1
+# BatchWriteItem accepts at most 25 items per call
+PERSIST_BATCH_SIZE = 25
+
+
+def conversation_ttl() -> int:
+    """Expiry (epoch seconds) for conversation items: 30 days from now."""
+    return int((datetime.now(timezone.utc) + timedelta(days=30)).timestamp())
+
+
+def turn_response(item: Dict[str, Any]) -> str:
+    """The agent response of a stored turn, decompressing it if needed."""
+    if 'agent_response_z' in item:
+        return zlib.decompress(bytes(item['agent_response_z'])).decode('utf-8')
+    return item.get('agent_response', '')
+
+
+def digest_line(item: Dict[str, Any]) -> str:
+    """One compact digest line for a turn leaving the memory window."""
+    when = datetime.fromtimestamp(int(item['timestamp']) / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+    question = ' '.join(item.get('user_message', '').split())[:120]
+    answer = ' '.join(turn_response(item).split())[:160]
+    return f"{when} {item.get('pipeline_name') or '-'}: Q: {question} A: {answer}"
+
+
+class ConversationMemory:
+    """The recent turns of one conversation, loaded in the background.
+
+    A single newest-first Query reads the digest item and the last
+    MEMORY_MAX_TURNS turns. It starts as soon as the request is parsed so
+    it overlaps evidence gathering; readers wait for it at most
+    MEMORY_LOAD_TIMEOUT seconds and otherwise go on without history.
+    Items of the conversation still queued for writing in this process
+    are merged in, so the previous turn is there even if the background
+    write has not landed yet.
+    """
+
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        # Taken now, before this request's own turn is queued and before the Query
+        self.pending = persist_queue.pending(conversation_id)
+        self.started_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        self.future = submit_traced(stage_executor, self.load)
+        self.timed_out = False
+        self.cached: Optional[List[Dict[str, str]]] = None
+
+    def load(self) -> Optional[Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Return the digest item (or None) and the turns oldest first; None on error."""
+        try:
+            with trace_span('memory'):
+                items = get_table(CONVERSATIONS_TABLE).query(
+                    KeyConditionExpression='conversation_id = :id',
+                    ExpressionAttributeValues={':id': self.conversation_id},
+                    ScanIndexForward=False,
+                    Limit=MEMORY_MAX_TURNS + 1
+                ).get('Items', [])
+        except Exception as e:
+            logger.error(f"Error loading conversation history: {str(e)}", exc_info=True)
+            return None
+        if self.pending:
+            merged = {int(item['timestamp']): item for item in items}
+            merged.update((int(item['timestamp']), item) for item in self.pending)
+            items = sorted(merged.values(), key=lambda item: int(item['timestamp']), reverse=True)
+            trace_count('memory_pending_items', len(self.pending))
+        digest = next((item for item in items if item.get('kind') == 'digest'), None)
+        # A slow load can already see this request's own turn
+        turns = [
+            item for item in items
+            if item.get('kind') != 'digest' and int(item['timestamp']) < self.started_ms
+        ][:MEMORY_MAX_TURNS]
+        return digest, turns[::-1]
+
+    def loaded(self) -> Optional[Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """The load result, or None if it failed or was not done in time."""
+        if self.timed_out:
+            return None
+        try:
+            return self.future.result(timeout=MEMORY_LOAD_TIMEOUT)
+        except FutureTimeoutError:
+            # Later readers of this request do not wait again
+            self.timed_out = True
+            trace_count('memory_load_timeout')
+            return None
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Earlier turns as alternating user/assistant chat messages.
+
+        Newest turns are kept first until MEMORY_TOKEN_BUDGET is used; the
+        digest of older turns is prefixed to the oldest kept question.
+        """
+        if self.cached is not None:
+            return self.cached
+        state = self.loaded()
+        if state is None:
+            return []
+        digest, turns = state
+        
+        used = 0
+        kept: List[Dict[str, str]] = []
+        for item in reversed(turns):
+            question = item.get('user_message', '')[:MEMORY_TURN_MAX_CHARS] or "(no message)"
+            answer = turn_response(item)[:MEMORY_TURN_MAX_CHARS] or "(no answer)"
+            cost = token_estimator.estimate(question) + token_estimator.estimate(answer)
+            if used + cost > MEMORY_TOKEN_BUDGET:
+                break
+            kept[:0] = [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+            used += cost
+        
+        if kept and digest and digest.get('digest'):
+            kept[0] = {"role": "user", "content": f"earlier in this conversation:\n{digest['digest']}\n\n{kept[0]['content']}"}
+        trace_count('memory_turns', len(kept) // 2)
+        self.cached = kept
+        return kept
+
+    def fingerprint(self) -> str:
+        """Short hash of the history sent to the LLM ('' without history), for cache keys."""
+        messages = self.messages()
+        if not messages:
+            return ''
+        return hashlib.sha256(json.dumps(messages).encode('utf-8')).hexdigest()[:16]
+
+    def last_pipeline(self) -> str:
+        """Pipeline of the most recent turn that named one, for follow-up questions."""
+        state = self.loaded()
+        for item in reversed(state[1] if state else []):
+            if item.get('pipeline_name'):
+                return item['pipeline_name']
+        return ''
+
+    def fold(self, new_turn: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The updated digest item once new_turn pushes turns out of the window, else None."""
+        state = self.loaded()
+        if state is None:
+            return None
+        digest, turns = state
+        through = int(digest['through']) if digest else 0
+        leaving = [item for item in (turns + [new_turn])[:-MEMORY_MAX_TURNS] if int(item['timestamp']) > through]
+        if not leaving:
+            return None
+        
+        lines = (digest.get('digest', '').splitlines() if digest else []) + [digest_line(item) for item in leaving]
+        while len(lines) > 1 and len("\n".join(lines)) > MEMORY_DIGEST_MAX_CHARS:
+            lines.pop(0)
+        return {
+            'conversation_id': self.conversation_id,
+            'timestamp': MEMORY_DIGEST_TIMESTAMP,
+            'kind': 'digest',
+            'digest': "\n".join(lines),
+            'through': int(leaving[-1]['timestamp']),
+            'ttl': conversation_ttl()
+        }
+
+
+def emit_persist_metrics(duration_ms: float, items: int, unprocessed: int):
+    """Log one conversation batch write as its own EMF record.
+
+    The writer thread serves no single request, so its latency cannot go in
+    a request's trace.
+    """
+    if not TRACING_ENABLED:
+        return
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['Service']],
+                'Metrics': [
+                    {'Name': 'persist_write', 'Unit': 'Milliseconds'},
+                    {'Name': 'persist_items', 'Unit': 'Count'},
+                    {'Name': 'persist_unprocessed', 'Unit': 'Count'}
+                ]
+            }]
+        },
+        'Service': METRICS_SERVICE,
+        'persist_write': round(duration_ms, 2),
+        'persist_items': items,
+        'persist_unprocessed': unprocessed
+    }
+    print(json.dumps(record), flush=True)
+
+
+class PersistQueue:
+    """Writes conversation items off the request path.
+
+    A daemon thread, started on first use, drains the queue with
+    BatchWriteItem. Unprocessed items and failed calls are retried with
+    backoff up to PERSIST_MAX_ATTEMPTS times; when the queue is full the
+    oldest item is dropped. Items with the same key in one batch are
+    collapsed to the latest (BatchWriteItem rejects duplicates). Each
+    write is logged as a metrics record (see emit_persist_metrics).
+    """
+
+    def __init__(self, table_name: Optional[str], max_items: int):
+        self.table_name = table_name
+        self.max_items = max_items
+        self.entries: deque = deque()
+        self.in_flight: List[Dict[str, Any]] = []
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+
+    def put(self, item: Dict[str, Any]):
+        with self.condition:
+            if len(self.entries) >= self.max_items:
+                dropped = self.entries.popleft()
+                logger.error(f"Persist queue full, dropped an item of conversation {dropped['item']['conversation_id']}")
+            self.entries.append({'item': item, 'attempts': 0})
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='persist', daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def take(self) -> List[Dict[str, Any]]:
+        """Wait for items and remove the next batch from the queue."""
+        with self.condition:
+            while not self.entries:
+                self.condition.wait()
+            batch: Dict[Tuple[str, int], Dict[str, Any]] = {}
+            while self.entries and len(batch) < PERSIST_BATCH_SIZE:
+                entry = self.entries.popleft()
+                batch[(entry['item']['conversation_id'], int(entry['item']['timestamp']))] = entry
+            self.in_flight = list(batch.values())
+            return self.in_flight
+
+    def write(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Write one batch; returns the entries that were not written."""
+        started = time.perf_counter()
+        failed = batch
+        try:
+            response = get_client('dynamodb').batch_write_item(RequestItems={
+                self.table_name: [{'PutRequest': {'Item': entry['item']}} for entry in batch]
+            })
+            unprocessed = {
+                (request['PutRequest']['Item']['conversation_id'], int(request['PutRequest']['Item']['timestamp']))
+                for request in response.get('UnprocessedItems', {}).get(self.table_name, [])
+            }
+            failed = [entry for entry in batch if (entry['item']['conversation_id'], int(entry['item']['timestamp'])) in unprocessed]
+        except Exception as e:
+            logger.error(f"Error saving conversation: {str(e)}", exc_info=True)
+        emit_persist_metrics((time.perf_counter() - started) * 1000, len(batch), len(failed))
+        return failed
+
+    def run(self):
+        while True:
+            failed = self.write(self.take())
+            attempts = 0
+            with self.condition:
+                for entry in reversed(failed):
+                    entry['attempts'] += 1
+                    attempts = max(attempts, entry['attempts'])
+                    if entry['attempts'] >= PERSIST_MAX_ATTEMPTS:
+                        logger.error(f"Giving up saving an item of conversation {entry['item']['conversation_id']}")
+                    else:
+                        self.entries.appendleft(entry)
+                self.in_flight = []
+                self.condition.notify_all()
+            if failed:
+                time.sleep(random.uniform(0, min(GOVERNOR_BACKOFF_CAP, GOVERNOR_BACKOFF_BASE * 2 ** attempts)))
+
+    def pending(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Items of conversation_id that are queued or being written, oldest first."""
+        with self.condition:
+            return [
+                entry['item'] for entry in list(self.in_flight) + list(self.entries)
+                if entry['item']['conversation_id'] == conversation_id
+            ]
+
+    def flush(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for the queue to drain; True if it did."""
+        give_up_at = time.monotonic() + timeout
+        with self.condition:
+            while self.entries or self.in_flight:
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+
+# Shared across warm invocations; on Lambda, items left when an invocation freezes
+# are written once the next one thaws the container
+persist_queue = PersistQueue(CONVERSATIONS_TABLE, PERSIST_QUEUE_MAX)
+
+
+def save_conversation(
+    conversation_id: str,
+    user_message: str,
+    agent_response: str,
+    pipeline_name: str = '',
+    memory: Optional[ConversationMemory] = None
+):
+    """Queue a conversation turn for saving to DynamoDB.
+
+    With the conversation's memory, a turn this one pushes out of the
+    window is folded into the digest item, which is queued alongside.
+    """
+    if not CONVERSATIONS_TABLE:
         return
     
     try:
-        timestamp = int(datetime.now(timezone.utc).timestamp() * 1000)
-        ttl = int((datetime.now(timezone.utc) + timedelta(days=30)).timestamp())
+        item: Dict[str, Any] = {
+            'conversation_id': conversation_id,
+            'timestamp': int(datetime.now(timezone.utc).timestamp() * 1000),
+            'user_message': user_message,
+            'ttl': conversation_ttl()
+        }
+        if pipeline_name:
+            item['pipeline_name'] = pipeline_name
+        encoded = agent_response.encode('utf-8')
+        if len(encoded) >= CONVERSATION_COMPRESS_MIN_BYTES:
+            item['agent_response_z'] = zlib.compress(encoded)
+            trace_count('conversation_bytes_saved', len(encoded) - len(item['agent_response_z']))
+        else:
+            item['agent_response'] = agent_response
+        persist_queue.put(item)
         
-        conversations_table.put_item(
-            Item={
-                'conversation_id': conversation_id,
-                'timestamp': timestamp,
-                'user_message': user_message,
-                'agent_response': agent_response,
-                'ttl': ttl
+        digest = memory.fold(item) if memory is not None else None
+        if digest:
+            persist_queue.put(digest)
+    except Exception as e:
+        logger.error(f"Error saving conversation: {str(e)}", exc_info=True)
+
+
+# Variable parts of log lines, masked before clustering (order matters: ARNs and
+# UUIDs contain digits that the number mask would otherwise split up)
+LOG_MASKS = [
+    (re.compile(r'arn:aws[\w-]*:[^\s"\',;]+'), '<ARN>'),
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'), '<UUID>'),
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'), '<TS>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'), '<IP>'),
+    (re.compile(r'\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{16,}\b'), '<HEX>'),
+    (re.compile(r'(?<![A-Za-z_])[-+]?\d+(?:\.\d+)?'), '<NUM>'),
+]
+WILDCARD = '<*>'
+
+
+def mask_log_message(message: str) -> str:
+    """Reduce a log message to its first line with variable tokens masked."""
+    first_line = next((line for line in message.splitlines() if line.strip()), '')[:300]
+    for pattern, replacement in LOG_MASKS:
+        first_line = pattern.sub(replacement, first_line)
+    return first_line
+
+
+class LogTemplateMiner:
+    """Online Drain-style clustering of log messages into error signatures.
+
+    Masked messages are bucketed by token count and first token, then merged
+    into the most similar template in the bucket; positions that differ become
+    wildcards. The number of clusters is capped, evicting the rarest.
+
+    With time_bucket_ms set, each cluster also keeps its counts per time
+    bucket so that counts falling out of a window can be expired later.
+    """
+
+    def __init__(
+        self,
+        max_clusters: int = LOG_SIGNATURE_MAX_CLUSTERS,
+        similarity: float = LOG_SIGNATURE_SIMILARITY,
+        time_bucket_ms: Optional[int] = None
+    ):
+        self.max_clusters = max_clusters
+        self.similarity = similarity
+        self.time_bucket_ms = time_bucket_ms
+        self.buckets: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+        self.cluster_count = 0
+
+    @staticmethod
+    def _similarity(template: List[str], tokens: List[str]) -> float:
+        matches = sum(1 for a, b in zip(template, tokens) if a == b or a == WILDCARD)
+        return matches / len(tokens) if tokens else 1.0
+
+    @staticmethod
+    def _bucket_key(tokens: List[str]) -> Tuple[int, str]:
+        return len(tokens), tokens[0] if tokens and '<' not in tokens[0] else WILDCARD
+
+    def add(self, message: str, timestamp: int, count: int = 1, last_seen: Optional[int] = None):
+        """Fold in one message, or a pre-aggregated group of count messages
+        seen between timestamp and last_seen."""
+        last_seen = timestamp if last_seen is None else last_seen
+        tokens = mask_log_message(message).split()
+        bucket = self.buckets.setdefault(self._bucket_key(tokens), [])
+
+        best, best_score = None, 0.0
+        for cluster in bucket:
+            score = self._similarity(cluster['tokens'], tokens)
+            if score > best_score:
+                best, best_score = cluster, score
+
+        if best is not None and best_score >= self.similarity:
+            best['tokens'] = [a if a == b else WILDCARD for a, b in zip(best['tokens'], tokens)]
+            best['count'] += count
+            best['first_seen'] = min(best['first_seen'], timestamp)
+            best['last_seen'] = max(best['last_seen'], last_seen)
+            self._count_in_time_bucket(best, timestamp, count)
+            return
+
+        if self.cluster_count >= self.max_clusters:
+            self._evict()
+        cluster = {
+            'tokens': tokens,
+            'count': count,
+            'first_seen': timestamp,
+            'last_seen': last_seen,
+            'example': message[:500]
+        }
+        if self.time_bucket_ms:
+            cluster['time_buckets'] = {}
+            self._count_in_time_bucket(cluster, timestamp, count)
+        bucket.append(cluster)
+        self.cluster_count += 1
+
+    def _count_in_time_bucket(self, cluster: Dict[str, Any], timestamp: int, count: int):
+        if self.time_bucket_ms:
+            key = timestamp - timestamp % self.time_bucket_ms
+            cluster['time_buckets'][key] = cluster['time_buckets'].get(key, 0) + count
+
+    def export(self, limit: int) -> List[Dict[str, Any]]:
+        """Return the most frequent clusters in a JSON-serializable form."""
+        clusters = [cluster for bucket in self.buckets.values() for cluster in bucket]
+        clusters.sort(key=lambda cluster: -cluster['count'])
+        return clusters[:limit]
+
+    def restore(self, clusters: List[Dict[str, Any]]):
+        """Load clusters previously returned by export (e.g. from a checkpoint)."""
+        for cluster in clusters:
+            if 'time_buckets' in cluster:
+                cluster['time_buckets'] = {int(key): count for key, count in cluster['time_buckets'].items()}
+            self.buckets.setdefault(self._bucket_key(cluster['tokens']), []).append(cluster)
+            self.cluster_count += 1
+
+    def expire(self, before_ms: int):
+        """Drop time-bucketed counts older than before_ms (at bucket granularity).
+
+        first_seen is clamped to before_ms: the bucket straddling it may
+        keep earlier events, but they are outside the window.
+        """
+        if not self.time_bucket_ms:
+            return
+        for key, bucket in self.buckets.items():
+            kept = []
+            for cluster in bucket:
+                cluster['time_buckets'] = {
+                    start: count for start, count in cluster['time_buckets'].items()
+                    if start + self.time_bucket_ms > before_ms
+                }
+                cluster['count'] = sum(cluster['time_buckets'].values())
+                if cluster['count']:
+                    cluster['first_seen'] = max(cluster['first_seen'], min(cluster['time_buckets']), before_ms)
+                    kept.append(cluster)
+            self.cluster_count -= len(bucket) - len(kept)
+            self.buckets[key] = kept
+
+    def _evict(self):
+        key, rarest = min(
+            ((key, cluster) for key, bucket in self.buckets.items() for cluster in bucket),
+            key=lambda item: (item[1]['count'], item[1]['last_seen'])
+        )
+        self.buckets[key].remove(rarest)
+        self.cluster_count -= 1
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        """Return the most frequent signatures, most frequent first."""
+        clusters = [cluster for bucket in self.buckets.values() for cluster in bucket]
+        clusters.sort(key=lambda cluster: (-cluster['count'], -cluster['last_seen']))
+        return [
+            {
+                'signature': ' '.join(cluster['tokens']),
+                'count': cluster['count'],
+                'first_seen': cluster['first_seen'],
+                'last_seen': cluster['last_seen'],
+                'example': cluster['example']
             }
+            for cluster in clusters[:limit]
+        ]
+
+
+class LogScanAggregate:
+    """Running totals over scanned log events, kept in constant memory.
+
+    With time_bucket_ms set, totals are also kept per time bucket so the
+    aggregate can be checkpointed, resumed and trimmed to a window.
+    """
+
+    def __init__(self, backend: str = 'filter', time_bucket_ms: Optional[int] = None):
+        self.backend = backend
+        self.event_count = 0
+        self.bytes_scanned = 0
+        self.pages = 0
+        self.first_seen: Optional[int] = None
+        self.last_seen: Optional[int] = None
+        self.stopped_reason: Optional[str] = None
+        self.time_bucket_ms = time_bucket_ms
+        self.histogram: Dict[int, int] = {}
+        self.signatures = LogTemplateMiner(time_bucket_ms=time_bucket_ms)
+
+    def add(self, event: Dict[str, Any]):
+        timestamp = event.get('timestamp', 0)
+        message = event.get('message', '')
+        self.event_count += 1
+        self.bytes_scanned += len(message)
+        if self.first_seen is None or timestamp < self.first_seen:
+            self.first_seen = timestamp
+        if self.last_seen is None or timestamp > self.last_seen:
+            self.last_seen = timestamp
+        if self.time_bucket_ms:
+            key = timestamp - timestamp % self.time_bucket_ms
+            self.histogram[key] = self.histogram.get(key, 0) + 1
+        self.signatures.add(message, timestamp)
+
+    def export_state(self) -> Dict[str, Any]:
+        """Serialize the bucketed totals for a scan checkpoint."""
+        return {
+            'histogram': self.histogram,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'signatures': self.signatures.export(LOG_CHECKPOINT_MAX_SIGNATURES)
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        """Resume from a checkpoint written by export_state."""
+        self.histogram = {int(key): count for key, count in state['histogram'].items()}
+        self.event_count = sum(self.histogram.values())
+        self.first_seen = state['first_seen']
+        self.last_seen = state['last_seen']
+        self.signatures.restore(state['signatures'])
+
+    def expire(self, before_ms: int):
+        """Drop totals older than before_ms (at bucket granularity; first_seen is clamped to it)."""
+        self.histogram = {
+            start: count for start, count in self.histogram.items()
+            if start + self.time_bucket_ms > before_ms
+        }
+        self.event_count = sum(self.histogram.values())
+        self.signatures.expire(before_ms)
+        if not self.histogram:
+            self.first_seen = self.last_seen = None
+        elif self.first_seen is not None:
+            self.first_seen = max(self.first_seen, min(self.histogram), before_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        scan = {
+            'backend': self.backend,
+            'event_count': self.event_count,
+            'bytes_scanned': self.bytes_scanned,
+            'pages': self.pages,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'stopped_reason': self.stopped_reason,
+            'signature_count': self.signatures.cluster_count,
+            'signatures': self.signatures.top(LOG_SIGNATURE_LIMIT)
+        }
+        if self.time_bucket_ms:
+            scan['histogram'] = sorted([start, count] for start, count in self.histogram.items())
+        return scan
+
+
+def iter_log_events(
+    log_group: str,
+    start_ms: int,
+    end_ms: int,
+    filter_pattern: Optional[str] = None,
+    page_size: int = LOG_SCAN_PAGE_SIZE,
+    aggregate: Optional[LogScanAggregate] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield matching log events lazily, following nextToken across all log streams.
+
+    Pages are only requested as the caller consumes events, so breaking out of
+    the loop stops the scan without fetching further pages.
+    """
+    kwargs = {
+        'logGroupName': log_group,
+        'startTime': start_ms,
+        'endTime': end_ms,
+        'limit': page_size
+    }
+    
+    if filter_pattern:
+        kwargs['filterPattern'] = filter_pattern
+    
+    while True:
+        with trace_span('logs'):
+            response = governed_call('logs:FilterLogEvents', get_client('logs').filter_log_events, **kwargs)
+        if aggregate is not None:
+            aggregate.pages += 1
+        yield from response.get('events', [])
+        
+        next_token = response.get('nextToken')
+        # The API can return the same token when there is nothing left to read
+        if not next_token or next_token == kwargs.get('nextToken'):
+            return
+        kwargs['nextToken'] = next_token
+
+
+def scan_log_range(
+    aggregate: LogScanAggregate,
+    log_group: str,
+    start_ms: int,
+    end_ms: int,
+    filter_pattern: Optional[str] = None,
+    max_events: Optional[int] = None,
+    max_bytes: Optional[int] = None
+):
+    """Fold matching events in [start_ms, end_ms) into aggregate within a budget.
+
+    Sets aggregate.stopped_reason when the event or byte budget is reached,
+    the stage stop time passes or the scan fails; the budget only counts
+    events read by this call.
+    """
+    max_events = LOG_SCAN_MAX_EVENTS if max_events is None else max_events
+    max_bytes = LOG_SCAN_MAX_BYTES if max_bytes is None else max_bytes
+    scanned_events = scanned_bytes = 0
+    
+    try:
+        events = iter_log_events(
+            log_group,
+            start_ms,
+            end_ms,
+            filter_pattern=filter_pattern,
+            page_size=min(LOG_SCAN_PAGE_SIZE, max_events),
+            aggregate=aggregate
         )
+        for event in events:
+            aggregate.add(event)
+            scanned_events += 1
+            scanned_bytes += len(event.get('message', ''))
+            if scanned_events >= max_events:
+                aggregate.stopped_reason = 'max_events'
+                break
+            if scanned_bytes >= max_bytes:
+                aggregate.stopped_reason = 'max_bytes'
+                break
+        events.close()
+    except ThrottleError as e:
+        logger.warning(f"Log scan throttled: {str(e)}")
+        aggregate.stopped_reason = 'throttled'
+    except StageExpired:
+        aggregate.stopped_reason = 'timeout'
     except Exception as e:
-        logger.error(f"Error saving conversation: {str(e)}", exc_info=True)
+        logger.error(f"Error searching logs: {str(e)}", exc_info=True)
+        aggregate.stopped_reason = 'error'
 
 
 def search_cloudwatch_logs(
     log_group: str,
     hours_back: int = 24,
-    filter_pattern: Optional[str] = None
-) -> List[Dict[str, Any]]:
-    """Search CloudWatch Logs for errors."""
+    filter_pattern: Optional[str] = None,
+    max_events: Optional[int] = None,
+    max_bytes: Optional[int] = None
+) -> Dict[str, Any]:
+    """Scan CloudWatch Logs for errors within an event and byte budget.
+
+    Returns running aggregates (counts, first/last seen, error signatures) rather
+    than the raw events, so memory stays constant regardless of window size.
+    """
+    aggregate = LogScanAggregate()
+    
+    end_time = datetime.now(timezone.utc)
+    start_time = end_time - timedelta(hours=hours_back)
+    scan_log_range(
+        aggregate,
+        log_group,
+        int(start_time.timestamp() * 1000),
+        int(end_time.timestamp() * 1000),
+        filter_pattern=filter_pattern,
+        max_events=max_events,
+        max_bytes=max_bytes
+    )
+    return aggregate.to_dict()
+
+
+def scan_checkpoint_key(pipeline_name: str, filter_pattern: Optional[str]) -> str:
+    """Checkpoint key per pipeline and filter pattern (a new pattern starts over)."""
+    pattern_hash = hashlib.sha256((filter_pattern or '').encode('utf-8')).hexdigest()[:16]
+    return f'ckpt#{pipeline_name}#{pattern_hash}'
+
+
+def load_scan_checkpoint(key: str) -> Optional[Dict[str, Any]]:
+    """Read a compressed scan checkpoint from the cache table."""
     try:
-        end_time = datetime.now(timezone.utc)
-        start_time = end_time - timedelta(hours=hours_back)
-        
-        kwargs = {
-            'logGroupName': log_group,
-            'startTime': int(start_time.timestamp() * 1000),
-            'endTime': int(end_time.timestamp() * 1000),
-            'limit': 50
-        }
-        
-        if filter_pattern:
-            kwargs['filterPattern'] = filter_pattern
+        with trace_span('cache'):
+            item = get_table(CACHE_TABLE).get_item(Key={'cache_key': key}).get('Item')
+        if not item:
+            return None
+        # boto3 wraps binary attributes in a Binary object
+        raw = getattr(item['state'], 'value', item['state'])
+        return json.loads(zlib.decompress(bytes(raw)))
+    except Exception as e:
+        logger.error(f"Error loading scan checkpoint: {str(e)}", exc_info=True)
+        return None
+
+
+def save_scan_checkpoint(key: str, state: Dict[str, Any]):
+    """Write a compressed scan checkpoint that expires with its retention window."""
+    try:
+        with trace_span('cache'):
+            get_table(CACHE_TABLE).put_item(
+                Item={
+                    'cache_key': key,
+                    'state': zlib.compress(json.dumps(state).encode('utf-8')),
+                    'ttl': int(time.time()) + LOG_CHECKPOINT_RETENTION_HOURS * 3600
+                }
+            )
+    except Exception as e:
+        logger.error(f"Error saving scan checkpoint: {str(e)}", exc_info=True)
+
+
+def scan_logs_incremental(
+    pipeline_name: str,
+    log_group: str,
+    hours_back: int = 24,
+    filter_pattern: Optional[str] = None,
+    insights_filter: Optional[str] = None,
+    insights_min_ms: Optional[int] = None
+) -> Dict[str, Any]:
+    """Scan only the logs written since the pipeline's last checkpoint.
+
+    The checkpoint holds hourly-bucketed counts and signatures up to a settled
+    point (now minus LOG_CHECKPOINT_LAG, so late-arriving events are not
+    skipped). Each call scans the delta since then, checkpoints the merged
+    state, adds the unsettled tail for this answer only and finally trims the
+    totals to the requested window at bucket granularity.
+    
+    With insights_min_ms set, a delta at least that long (such as the whole
+    window on a first scan) is aggregated by Logs Insights instead of being
+    paged through, and seeds the checkpoint all the same.
+    """
+    now_ms = int(time.time() * 1000)
+    window_start = now_ms - hours_back * 3600 * 1000
+    # Whole seconds: Insights queries take their time range in seconds
+    settled_until = (now_ms - LOG_CHECKPOINT_LAG_MS) // 1000 * 1000
+    retain_from = now_ms - LOG_CHECKPOINT_RETENTION_HOURS * 3600 * 1000
+    key = scan_checkpoint_key(pipeline_name, filter_pattern)
+    
+    aggregate = LogScanAggregate(time_bucket_ms=LOG_CHECKPOINT_BUCKET_MS)
+    scanned_from, scan_start = window_start, window_start
+    state = load_scan_checkpoint(key)
+    resumed = bool(
+        state
+        and state['scanned_from'] <= window_start + LOG_CHECKPOINT_BUCKET_MS
+        and window_start <= state['scanned_until'] <= settled_until
+    )
+    if resumed:
+        aggregate.load_state(state['aggregate'])
+        scanned_from, scan_start = state['scanned_from'], state['scanned_until']
+    
+    if insights_min_ms is not None and settled_until - scan_start >= insights_min_ms:
+        aggregate.backend = 'insights'
+        insights_log_range(aggregate, log_group, scan_start, settled_until, filter_pattern, insights_filter)
+    else:
+        scan_log_range(aggregate, log_group, scan_start, settled_until, filter_pattern)
+    if aggregate.stopped_reason is None:
+        aggregate.expire(retain_from)
+        save_scan_checkpoint(key, {
+            'scanned_from': max(scanned_from, retain_from),
+            'scanned_until': settled_until,
+            'aggregate': aggregate.export_state()
+        })
+        scan_log_range(aggregate, log_group, settled_until, now_ms, filter_pattern)
+    
+    aggregate.expire(window_start)
+    scan = aggregate.to_dict()
+    # The first kept bucket may start before the window; report it from the window start
+    scan['histogram'] = [[max(start, window_start), count] for start, count in scan['histogram']]
+    scan['checkpoint'] = {
+        'resumed': resumed,
+        'scanned_from': scan_start,
+        'delta_minutes': round((now_ms - scan_start) / 60000, 1)
+    }
+    return scan
+
+
+# Characters that must be escaped inside an Insights /regex/ literal
+INSIGHTS_REGEX_SPECIAL = re.compile(r'([.^$*+?()\[\]{}|\\/])')
+
+
+def filter_pattern_to_insights(filter_pattern: Optional[str]) -> Optional[str]:
+    """Translate a term-based CloudWatch filter pattern into Insights filter clauses.
+
+    Plain terms must all match, ?terms match if any does and -terms exclude.
+    Returns None for JSON and space-delimited patterns, which have no
+    equivalent here; callers should then use the filter_log_events backend.
+    """
+    if not filter_pattern:
+        return ''
+    if filter_pattern.strip().startswith(('{', '[')):
+        return None
+    
+    required, optional, excluded = [], [], []
+    for term in re.findall(r'[?-]?"[^"]*"|\S+', filter_pattern):
+        target = required
+        if term[0] == '?':
+            target, term = optional, term[1:]
+        elif term[0] == '-':
+            target, term = excluded, term[1:]
+        term = term.strip('"')
+        if term:
+            target.append(INSIGHTS_REGEX_SPECIAL.sub(r'\\\1', term))
+    
+    clauses = [f"@message like /{term}/" for term in required]
+    clauses += [f"@message not like /{term}/" for term in excluded]
+    if optional:
+        clauses.append('(' + ' or '.join(f"@message like /{term}/" for term in optional) + ')')
+    return ' | filter ' + ' and '.join(clauses) if clauses else ''
+
+
+def parse_insights_timestamp(value: str) -> int:
+    """Convert an Insights result timestamp (UTC, 'YYYY-MM-DD HH:MM:SS.mmm') to epoch ms."""
+    parsed = datetime.strptime(value, '%Y-%m-%d %H:%M:%S.%f').replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+# Bin sizes (minutes) the Insights histogram rounds up to
+HISTOGRAM_BIN_MINUTES = [5, 10, 15, 30, 60, 120, 180, 360, 720, 1440]
+
+
+def insights_bin_minutes(hours_back: float) -> int:
+    """Histogram bin for an Insights scan of hours_back.
+
+    The filter backend's checkpoint bucket, widened to the next standard
+    size when the window would need more than LOG_HISTOGRAM_MAX_BUCKETS.
+    """
+    minutes = max(LOG_CHECKPOINT_BUCKET_MS // 60000, math.ceil(hours_back * 60 / LOG_HISTOGRAM_MAX_BUCKETS))
+    return next((size for size in HISTOGRAM_BIN_MINUTES if size >= minutes), int(minutes))
+
+
+def insights_log_range(
+    aggregate: LogScanAggregate,
+    log_group: str,
+    start_ms: int,
+    end_ms: int,
+    filter_pattern: Optional[str] = None,
+    insights_filter: Optional[str] = None,
+    bin_minutes: Optional[int] = None
+):
+    """Fold the errors in [start_ms, end_ms) into aggregate with Logs Insights.
+
+    Runs a stats-by-message query and a stats-by-bin query in parallel and
+    polls both with backoff. Message groups go into the same signature miner
+    as the filter backend. With aggregate.time_bucket_ms set, both queries
+    are binned by it, so the result can be checkpointed and expired like a
+    filter scan; otherwise the histogram uses bin_minutes. Polling ends at
+    LOGS_INSIGHTS_TIMEOUT or the stage stop time, whichever comes first.
+    Sets aggregate.stopped_reason when a query fails, is throttled or times
+    out.
+    """
+    logs = get_client('logs')
+    if insights_filter:
+        filter_clause = f" | filter {insights_filter}"
+    else:
+        filter_clause = filter_pattern_to_insights(filter_pattern) or ''
+    if aggregate.time_bucket_ms:
+        bin_minutes = aggregate.time_bucket_ms // 60000
+    group_by = f"message_key, bin({bin_minutes}m) as bucket" if aggregate.time_bucket_ms else "message_key"
+    queries = {
+        'messages': (
+            f"fields @timestamp, @message, substr(@message, 0, 200) as message_key{filter_clause}"
+            " | stats count(*) as event_count, min(@timestamp) as first_seen,"
+            f" max(@timestamp) as last_seen, earliest(@message) as example by {group_by}"
+            f" | sort event_count desc | limit {LOGS_INSIGHTS_MAX_GROUPS}"
+        ),
+        'histogram': (
+            f"fields @timestamp{filter_clause}"
+            f" | stats count(*) as event_count by bin({bin_minutes}m) as bucket"
+        )
+    }
+    
+    query_ids: Dict[str, str] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for name, query_string in queries.items():
+            with trace_span('logs'):
+                query_ids[name] = governed_call(
+                    'logs:StartQuery',
+                    logs.start_query,
+                    logGroupName=log_group,
+                    startTime=start_ms // 1000,
+                    endTime=end_ms // 1000,
+                    queryString=query_string,
+                    limit=10000
+                )['queryId']
         
-        response = logs_client.filter_log_events(**kwargs)
-        return response.get('events', [])
+        deadline = time.monotonic() + LOGS_INSIGHTS_TIMEOUT
+        if stage_stop_at.get() is not None:
+            deadline = min(deadline, stage_stop_at.get())
+        delay = 0.25
+        while len(results) < len(query_ids):
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            for name, query_id in query_ids.items():
+                if name in results:
+                    continue
+                with trace_span('logs'):
+                    response = governed_call('logs:GetQueryResults', logs.get_query_results, queryId=query_id)
+                if response['status'] in ('Complete', 'Failed', 'Cancelled', 'Timeout', 'Unknown'):
+                    results[name] = response
+            if time.monotonic() >= deadline:
+                break
+            delay = min(delay * 2, 2.0)
+    except ThrottleError as e:
+        logger.warning(f"Logs Insights throttled: {str(e)}")
+        aggregate.stopped_reason = 'throttled'
+        return
+    except StageExpired:
+        # Out of time: the queries still running are stopped below
+        aggregate.stopped_reason = 'timeout'
     except Exception as e:
-        logger.error(f"Error searching logs: {str(e)}", exc_info=True)
-        return []
+        logger.error(f"Error querying Logs Insights: {str(e)}", exc_info=True)
+        aggregate.stopped_reason = 'error'
+        return
+    
+    for name, query_id in query_ids.items():
+        if name not in results:
+            aggregate.stopped_reason = 'timeout'
+            # Not governed: the stage may be out of time, and a StopQuery that
+            # fails only leaves the query to time out by itself
+            try:
+                logs.stop_query(queryId=query_id)
+            except Exception:
+                pass
+        elif results[name]['status'] != 'Complete':
+            aggregate.stopped_reason = 'error'
+    
+    grouped = 0
+    for row in results.get('messages', {}).get('results', []):
+        fields = {field['field']: field['value'] for field in row}
+        first_seen = parse_insights_timestamp(fields['first_seen'])
+        last_seen = parse_insights_timestamp(fields['last_seen'])
+        # Within a bin, first_seen falls in that bin's time bucket
+        aggregate.signatures.add(fields.get('example', ''), first_seen, count=int(fields['event_count']), last_seen=last_seen)
+        grouped += int(fields['event_count'])
+        aggregate.first_seen = first_seen if aggregate.first_seen is None else min(aggregate.first_seen, first_seen)
+        aggregate.last_seen = last_seen if aggregate.last_seen is None else max(aggregate.last_seen, last_seen)
+    
+    binned = 0
+    for row in results.get('histogram', {}).get('results', []):
+        fields = {field['field']: field['value'] for field in row}
+        start = parse_insights_timestamp(fields['bucket'])
+        aggregate.histogram[start] = aggregate.histogram.get(start, 0) + int(fields['event_count'])
+        binned += int(fields['event_count'])
+    
+    aggregate.event_count += binned or grouped
+    statistics = results.get('messages', {}).get('statistics', {})
+    aggregate.bytes_scanned += int(statistics.get('bytesScanned', 0))
+
+
+def query_logs_insights(
+    log_group: str,
+    hours_back: int = 24,
+    filter_pattern: Optional[str] = None,
+    insights_filter: Optional[str] = None
+) -> Dict[str, Any]:
+    """Aggregate errors server-side with CloudWatch Logs Insights.
+
+    The result has the same shape as search_cloudwatch_logs plus a
+    histogram in insights_bin_minutes bins.
+    """
+    aggregate = LogScanAggregate(backend='insights')
+    end_ms = int(time.time() * 1000)
+    insights_log_range(
+        aggregate,
+        log_group,
+        end_ms - hours_back * 3600 * 1000,
+        end_ms,
+        filter_pattern,
+        insights_filter,
+        insights_bin_minutes(hours_back)
+    )
+    scan = aggregate.to_dict()
+    scan['histogram'] = sorted([start, count] for start, count in aggregate.histogram.items())
+    return scan
+
+
+# Log groups whose filter scan ran out of budget recently; auto mode sends them to Insights
+noisy_log_groups = TTLCache(CATALOG_CACHE_MAX_ENTRIES, LOG_NOISY_GROUP_TTL)
+
+
+def choose_log_backend(pipeline_info: Dict[str, Any], hours_back: int) -> str:
+    """Pick the log backend: the catalog's log_backend, or auto by window size."""
+    backend = pipeline_info.get('log_backend', 'auto')
+    if backend in ('filter', 'insights'):
+        return backend
+    return 'insights' if hours_back >= LOGS_INSIGHTS_MIN_HOURS else 'filter'
+
+
+def scan_pipeline_logs(pipeline_info: Dict[str, Any], hours_back: int) -> Dict[str, Any]:
+    """Collect log evidence for a pipeline with the backend that suits it.
+
+    Scans are checkpointed (incremental) when the cache table is set. In
+    auto mode a window of LOGS_INSIGHTS_MIN_HOURS or more is only sent to
+    Logs Insights for the part no checkpoint covers yet, so a repeated
+    long-window question scans just the new events. A filter scan that runs
+    into its budget (a noisy log group) is retried with Logs Insights so the
+    totals are exact, and the group's deltas go to Insights for
+    LOG_NOISY_GROUP_TTL afterwards. A catalog log_backend of insights always
+    queries the whole window.
+    """
+    log_group = pipeline_info['log_group']
+    # Use custom filter pattern from catalog, or default
+    filter_pattern = pipeline_info.get('log_filter_pattern', DEFAULT_LOG_FILTER_PATTERN)
+    insights_filter = pipeline_info.get('log_insights_filter')
+    insights_supported = bool(insights_filter) or filter_pattern_to_insights(filter_pattern) is not None
+    auto = pipeline_info.get('log_backend', 'auto') == 'auto'
+    
+    backend = choose_log_backend(pipeline_info, hours_back)
+    noisy = auto and insights_supported and noisy_log_groups.get(log_group)[0]
+    incremental = LOG_SCAN_INCREMENTAL and bool(CACHE_TABLE) and (auto or backend == 'filter')
+    
+    scan = None
+    if incremental:
+        insights_min_ms = None
+        if noisy:
+            insights_min_ms = 0
+        elif backend == 'insights' and insights_supported:
+            insights_min_ms = int(LOGS_INSIGHTS_MIN_HOURS * 3600 * 1000)
+        scan = scan_logs_incremental(
+            pipeline_info['pipeline_name'], log_group, hours_back, filter_pattern, insights_filter, insights_min_ms
+        )
+    elif backend == 'insights' and insights_supported:
+        scan = query_logs_insights(log_group, hours_back, filter_pattern, insights_filter)
+    if scan is not None and scan['backend'] == 'insights' and scan['stopped_reason'] in ('error', 'throttled'):
+        logger.warning(f"Logs Insights {scan['stopped_reason']} for {log_group}, falling back to filter_log_events")
+        scan = None
+    if scan is None:
+        scan = search_cloudwatch_logs(log_group, hours_back, filter_pattern=filter_pattern)
+    elif scan['backend'] == 'insights':
+        return scan
+    if auto and insights_supported and scan['stopped_reason'] in ('max_events', 'max_bytes'):
+        noisy_log_groups.set(log_group, True)
+        insights_scan = query_logs_insights(log_group, hours_back, filter_pattern, insights_filter)
+        if insights_scan['stopped_reason'] is None:
+            return insights_scan
+    return scan
 
 
 def get_step_function_execution(execution_arn: str) -> Optional[Dict[str, Any]]:
     """Get Step Functions execution details."""
     try:
-        response = sfn_client.describe_execution(executionArn=execution_arn)
+        with trace_span('sfn'):
+            response = governed_call(
+                'states:DescribeExecution', get_client('stepfunctions').describe_execution, executionArn=execution_arn
+            )
         return response
     except Exception as e:
         logger.error(f"Error getting execution: {str(e)}", exc_info=True)
@@ -112,7 +2067,7 @@ def list_step_function_executions(
     status_filter: Optional[str] = None,
     max_results: int = 10
 ) -> List[Dict[str, Any]]:
-    """List Step Functions executions."""
+    """List Step Functions executions (ThrottleError propagates so callers can report it)."""
     try:
         kwargs = {'maxResults': max_results}
         
@@ -121,16 +2076,225 @@ def list_step_function_executions(
         if status_filter:
             kwargs['statusFilter'] = status_filter
         
-        response = sfn_client.list_executions(**kwargs)
+        with trace_span('sfn'):
+            response = governed_call('states:ListExecutions', get_client('stepfunctions').list_executions, **kwargs)
         return response.get('executions', [])
+    except (ThrottleError, StageExpired):
+        raise
     except Exception as e:
         logger.error(f"Error listing executions: {str(e)}", exc_info=True)
         return []
 
 
-def analyze_pipeline(pipeline_name: str, hours_back: int = 24) -> Dict[str, Any]:
-    """Analyze pipeline and return structured report."""
-    pipeline_info = get_pipeline_info(pipeline_name)
+# A terminal execution's history never changes, so extracted failures are kept
+# until evicted (memory) or until the history itself would have expired (DynamoDB)
+execution_failure_cache = TTLCache(SFN_FAILURE_CACHE_MAX_ENTRIES, float('inf'))
+
+
+def event_details(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the <type>EventDetails payload of a history event (e.g. taskFailedEventDetails)."""
+    event_type = event.get('type', '')
+    # All *StateEntered events share one details key
+    if event_type.endswith('StateEntered'):
+        return event.get('stateEnteredEventDetails', {})
+    return event.get(event_type[:1].lower() + event_type[1:] + 'EventDetails', {})
+
+
+def fetch_execution_failure(execution_arn: str) -> Optional[Dict[str, Any]]:
+    """Extract the failing state, error and cause from an execution's history.
+
+    Reads the history newest-first and stops at the first page that names the
+    failing state, so a long history costs one or two calls. Raises
+    StageExpired rather than reading on past the stage stop time.
+    """
+    failure: Dict[str, Any] = {'failed_state': None, 'error': None, 'cause': None}
+    kwargs = {
+        'executionArn': execution_arn,
+        'reverseOrder': True,
+        'maxResults': 100,
+        'includeExecutionData': False
+    }
+    try:
+        for _ in range(SFN_HISTORY_MAX_PAGES):
+            with trace_span('sfn'):
+                response = governed_call(
+                    'states:GetExecutionHistory', get_client('stepfunctions').get_execution_history, **kwargs
+                )
+            for event in response.get('events', []):
+                event_type = event.get('type', '')
+                details = event_details(event)
+                if event_type.endswith(('Failed', 'TimedOut', 'Aborted')):
+                    # The innermost (earliest) failure explains the execution-level one
+                    failure['error'] = details.get('error') or failure['error']
+                    failure['cause'] = details.get('cause') or failure['cause']
+                elif event_type.endswith('StateEntered') and failure['error']:
+                    failure['failed_state'] = details.get('name')
+                    break
+            if failure['failed_state'] or 'nextToken' not in response:
+                break
+            kwargs['nextToken'] = response['nextToken']
+    except (ThrottleError, StageExpired):
+        raise
+    except Exception as e:
+        logger.error(f"Error getting execution history: {str(e)}", exc_info=True)
+        return None
+    
+    if failure['cause']:
+        failure['cause'] = failure['cause'][:1000]
+    return failure
+
+
+def get_execution_failure(execution_arn: str) -> Optional[Dict[str, Any]]:
+    """Get failure details for a terminal execution, from cache when already seen.
+
+    A history read that found no error may only have run out of pages, so it
+    is kept in memory for SFN_EMPTY_FAILURE_TTL and not shared.
+    """
+    hit, failure = execution_failure_cache.get(execution_arn)
+    if hit:
+        trace_count('sfn_cache_hit')
+        return failure
+    
+    cache_key = f'sfn#{execution_arn}'
+    if CACHE_TABLE:
+        try:
+            with trace_span('cache'):
+                item = get_table(CACHE_TABLE).get_item(Key={'cache_key': cache_key}).get('Item')
+            if item:
+                failure = json.loads(item['failure'])
+                execution_failure_cache.set(execution_arn, failure)
+                trace_count('sfn_cache_shared_hit')
+                return failure
+        except Exception as e:
+            logger.error(f"Error reading execution failure cache: {str(e)}", exc_info=True)
+    
+    trace_count('sfn_cache_miss')
+    failure = fetch_execution_failure(execution_arn)
+    if failure is None:
+        return None
+    if not failure['error']:
+        execution_failure_cache.set(execution_arn, failure, ttl=SFN_EMPTY_FAILURE_TTL)
+        return failure
+    execution_failure_cache.set(execution_arn, failure)
+    if CACHE_TABLE:
+        try:
+            with trace_span('cache'):
+                get_table(CACHE_TABLE).put_item(
+                    Item={
+                        'cache_key': cache_key,
+                        'failure': json.dumps(failure),
+                        'ttl': int((datetime.now(timezone.utc) + timedelta(days=SFN_FAILURE_CACHE_DAYS)).timestamp())
+                    }
+                )
+        except Exception as e:
+            logger.error(f"Error writing execution failure cache: {str(e)}", exc_info=True)
+    return failure
+
+
+def describe_step_function_failures(state_machine_arn: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    """List recent FAILED executions with their failing state, error and cause.
+
+    Failure details for executions not seen before are fetched concurrently.
+    Executions whose history stayed throttled get details_status 'throttled',
+    and those not read by the stage stop time 'timeout'.
+    """
+    executions = list_step_function_executions(
+        state_machine_arn=state_machine_arn,
+        status_filter='FAILED',
+        max_results=max_results
+    )
+    futures = [
+        submit_traced(sfn_history_executor, get_execution_failure, execution['executionArn'])
+        for execution in executions
+    ]
+    for execution, future in zip(executions, futures):
+        try:
+            execution.update(future.result() or {})
+        except ThrottleError as e:
+            logger.warning(f"Execution history throttled: {str(e)}")
+            execution['details_status'] = 'throttled'
+        except StageExpired:
+            execution['details_status'] = 'timeout'
+    return executions
+
+
+def collect_evidence(
+    sources: Dict[str, Callable[[], Any]],
+    timeout: Optional[float] = None
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Run evidence sources concurrently, each bounded by its own timeout.
+
+    Returns the results of the sources that finished and a status entry per
+    source (ok, error, throttled or timeout) with its duration in milliseconds.
+    The timeout is also the sources' stage stop time, so a source left
+    running stops calling AWS soon after it is abandoned.
+    """
+    timeout = EVIDENCE_SOURCE_TIMEOUT if timeout is None else timeout
+    started = time.monotonic()
+    durations: Dict[str, float] = {}
+    trace = current_trace.get()
+
+    def timed(name: str, fn: Callable[[], Any]) -> Any:
+        source_start = time.monotonic()
+        try:
+            return fn()
+        finally:
+            durations[name] = (time.monotonic() - source_start) * 1000
+
+    with stage_stop(started + timeout):
+        futures = {name: submit_traced(evidence_executor, timed, name, fn) for name, fn in sources.items()}
+
+    results: Dict[str, Any] = {}
+    statuses: List[Dict[str, Any]] = []
+    for name, future in futures.items():
+        # All sources start together, so each one gets the same absolute deadline
+        remaining = max(0.0, started + timeout - time.monotonic())
+        try:
+            results[name] = future.result(timeout=remaining)
+            status = 'ok'
+        except ThrottleError as e:
+            logger.warning(f"Evidence source {name} throttled: {str(e)}")
+            status = 'throttled'
+        except (FutureTimeoutError, StageExpired):
+            future.cancel()
+            logger.warning(f"Evidence source {name} timed out after {timeout:.1f}s")
+            status = 'timeout'
+        except Exception as e:
+            logger.error(f"Evidence source {name} failed: {str(e)}", exc_info=True)
+            status = 'error'
+
+        duration_ms = durations.get(name, (time.monotonic() - started) * 1000)
+        statuses.append({'source': name, 'status': status, 'duration_ms': round(duration_ms, 1)})
+
+    if trace is not None:
+        trace.add_span('evidence', (time.monotonic() - started) * 1000)
+    return results, statuses
+
+
+# Log scan stop reasons that leave the cloudwatch_logs source incomplete
+LOG_SCAN_SOURCE_STATUS = {'throttled': 'throttled', 'error': 'error', 'timeout': 'partial'}
+
+
+def analyze_pipeline(
+    pipeline_name: str,
+    hours_back: int = 24,
+    pipeline_info: Optional[Dict[str, Any]] = None,
+    deadline: Optional[RequestDeadline] = None
+) -> Dict[str, Any]:
+    """Analyze pipeline and return structured report.
+
+    pipeline_info can be passed when the catalog entry is already loaded
+    (batch requests); otherwise it is looked up. With a deadline, the catalog
+    lookup and evidence collection are cut off at their stage budgets and
+    report['partial'] is set.
+    """
+    catalog_timed_out = False
+    if pipeline_info is None:
+        if deadline:
+            pipeline_info = deadline.run('catalog', lambda: get_pipeline_info(pipeline_name))
+            catalog_timed_out = 'catalog' in deadline.overrun
+        else:
+            pipeline_info = get_pipeline_info(pipeline_name)
     
     report = {
         'pipeline_name': pipeline_name,
@@ -138,63 +2302,324 @@ def analyze_pipeline(pipeline_name: str, hours_back: int = 24) -> Dict[str, Any]
         'summary': '',
         'evidence': [],
         'probable_cause': [],
-        'recommendations': []
+        'recommendations': [],
+        'sources': []
     }
     
-    # Search logs if log group is available
+    # Fan out to every evidence source the catalog entry knows about
+    sources: Dict[str, Callable[[], Any]] = {}
     if pipeline_info and pipeline_info.get('log_group'):
-        log_group = pipeline_info['log_group']
-        # Use custom filter pattern from catalog, or default
-        filter_pattern = pipeline_info.get('log_filter_pattern', 'ERROR Exception "error" "failed" "failure"')
-        errors = search_cloudwatch_logs(
-            log_group,
-            hours_back,
-            filter_pattern=filter_pattern
-        )
-        
-        for event in errors[:10]:
+        sources['cloudwatch_logs'] = lambda: scan_pipeline_logs(pipeline_info, hours_back)
+    
+    if pipeline_info and pipeline_info.get('state_machine_arn'):
+        state_machine_arn = pipeline_info['state_machine_arn']
+        sources['step_functions'] = lambda: describe_step_function_failures(state_machine_arn, max_results=5)
+    
+    timeout = min(EVIDENCE_SOURCE_TIMEOUT, deadline.budget('evidence')) if deadline else None
+    results, report['sources'] = collect_evidence(sources, timeout=timeout)
+    if catalog_timed_out:
+        report['sources'].insert(0, {'source': 'catalog', 'status': 'timeout', 'duration_ms': None})
+    
+    log_scan = results.get('cloudwatch_logs')
+    # A source that returned but was cut short is incomplete, not clean
+    for source in report['sources']:
+        if source['status'] != 'ok':
+            continue
+        if source['source'] == 'cloudwatch_logs' and log_scan:
+            source['status'] = LOG_SCAN_SOURCE_STATUS.get(log_scan['stopped_reason'], 'ok')
+        elif source['source'] == 'step_functions':
+            if any(execution.get('details_status') == 'throttled' for execution in results['step_functions']):
+                source['status'] = 'throttled'
+    report['partial'] = any(source['status'] != 'ok' for source in report['sources'])
+    incomplete = [f"{source['source']} ({source['status']})" for source in report['sources'] if source['status'] != 'ok']
+    
+    if log_scan:
+        report['log_scan'] = {key: value for key, value in log_scan.items() if key != 'signatures'}
+        for signature in log_scan['signatures']:
             report['evidence'].append({
-                'type': 'log_error',
-                'timestamp': datetime.fromtimestamp(event['timestamp']/1000).isoformat(),
-                'message': event.get('message', '')[:500]
+                'type': 'log_signature',
+                'signature': signature['signature'],
+                'count': signature['count'],
+                'first_seen': datetime.fromtimestamp(signature['first_seen']/1000).isoformat(),
+                'last_seen': datetime.fromtimestamp(signature['last_seen']/1000).isoformat(),
+                'example': signature['example']
             })
     
-    # Check Step Functions if state machine ARN is available
-    if pipeline_info and pipeline_info.get('state_machine_arn'):
-        state_machine_arn = pipeline_info['state_machine_arn']
-        failed_executions = list_step_function_executions(
-            state_machine_arn=state_machine_arn,
-            status_filter='FAILED',
-            max_results=5
-        )
-        
-        for execution in failed_executions:
-            report['evidence'].append({
-                'type': 'step_function_failure',
-                'execution_arn': execution['executionArn'],
-                'status': execution['status'],
-                'start_date': execution['startDate'].isoformat() if 'startDate' in execution else None
-            })
+    for execution in results.get('step_functions') or []:
+        report['evidence'].append({
+            'type': 'step_function_failure',
+            'execution_arn': execution['executionArn'],
+            'status': execution['status'],
+            'start_date': execution['startDate'].isoformat() if 'startDate' in execution else None,
+            'failed_state': execution.get('failed_state'),
+            'error': execution.get('error'),
+            'cause': execution.get('cause')
+        })
+    
+    # Generate summary
+    if report['evidence']:
+        error_count = log_scan['event_count'] if log_scan else 0
+        sfn_failures = len([e for e in report['evidence'] if e['type'] == 'step_function_failure'])
+        # A scan cut short by its budget only gives a lower bound
+        at_least = "at least " if log_scan and log_scan['stopped_reason'] else ""
+        
+        report['summary'] = f"Found {at_least}{error_count} log errors and {sfn_failures} failed Step Functions executions in the last {hours_back} hours."
+        if incomplete:
+            report['summary'] += f" Incomplete evidence sources: {', '.join(incomplete)}."
+        
+        if error_count > 0:
+            report['probable_cause'].append("Application errors detected in logs")
+            if log_scan['signatures']:
+                top = log_scan['signatures'][0]
+                report['probable_cause'].append(
+                    f"Most frequent error signature ({top['count']} of {error_count} events): {top['signature'][:200]}"
+                )
+        if sfn_failures > 0:
+            report['probable_cause'].append("Step Functions executions are failing")
+            failure_points = [
+                (e['failed_state'], e['error']) for e in report['evidence']
+                if e['type'] == 'step_function_failure' and e.get('error')
+            ]
+            if failure_points:
+                (state, error), count = max(
+                    ((point, failure_points.count(point)) for point in set(failure_points)),
+                    key=lambda item: item[1]
+                )
+                report['probable_cause'].append(
+                    f"{count} of {sfn_failures} failed executions failed in state {state or 'unknown'} with {error}"
+                )
+        
+        report['recommendations'].append(f"Review CloudWatch Logs for log group: {pipeline_info.get('log_group', 'N/A')}")
+        report['recommendations'].append("Check Step Functions execution history for detailed failure reasons")
+    else:
+        if incomplete:
+            report['summary'] = f"No errors found in the last {hours_back} hours, but these evidence sources did not complete: {', '.join(incomplete)}."
+            report['recommendations'].append("Retry the analysis; the pipeline cannot be confirmed healthy until all sources respond.")
+        else:
+            report['summary'] = f"No errors found in the last {hours_back} hours."
+            report['recommendations'].append("Pipeline appears healthy. Monitor for any new issues.")
+    
+    return report
+
+
+def analyze_pipelines_batch(
+    pipeline_names: List[str],
+    hours_back: int = 24,
+    deadline: Optional[RequestDeadline] = None
+) -> List[Dict[str, Any]]:
+    """Analyze many pipelines in parallel under BATCH_MAX_CONCURRENCY.
+
+    Returns one result per pipeline, in request order, with status ok,
+    not_found, timeout or error; a failing pipeline never fails the batch.
+    """
+    infos = get_pipeline_infos(pipeline_names)
+    # Pipelines still queued when the evidence budget runs out are reported as timeouts
+    wait_until = time.monotonic() + deadline.budget('evidence') if deadline else None
+    
+    futures = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in pipeline_names:
+        if name not in infos:
+            results[name] = {'pipeline_name': name, 'status': 'error', 'error': 'Could not load catalog entry'}
+        elif infos[name] is None:
+            results[name] = {'pipeline_name': name, 'status': 'not_found', 'error': 'Pipeline not found in catalog'}
+        else:
+            futures[name] = submit_traced(batch_executor, analyze_pipeline, name, hours_back, infos[name], deadline)
+    
+    for name, future in futures.items():
+        try:
+            timeout = max(0.0, wait_until - time.monotonic()) if wait_until else None
+            results[name] = {'pipeline_name': name, 'status': 'ok', 'report': future.result(timeout=timeout)}
+        except FutureTimeoutError:
+            future.cancel()
+            results[name] = {'pipeline_name': name, 'status': 'timeout', 'error': 'Analysis did not finish in time'}
+        except Exception as e:
+            logger.error(f"Error analyzing pipeline {name}: {str(e)}", exc_info=True)
+            results[name] = {'pipeline_name': name, 'status': 'error', 'error': 'Analysis failed'}
+    
+    return [results[name] for name in pipeline_names]
+
+
+def bin_counts(timestamps: List[int], weights: List[int], origin_ms: int, bucket_ms: int, buckets: int) -> List[int]:
+    """Weighted counts of timestamps in buckets of bucket_ms starting at origin_ms.
+
+    One pass over the timestamps adds each weight to its bucket;
+    timestamps outside the buckets are ignored.
+    """
+    counts = [0] * buckets
+    for timestamp, weight in zip(timestamps, weights):
+        index = (timestamp - origin_ms) // bucket_ms
+        if 0 <= index < buckets:
+            counts[index] += weight
+    return counts
+
+
+def error_histogram(report: Dict[str, Any], now_ms: int) -> Dict[str, Any]:
+    """Error counts per SWEEP_HISTOGRAM_BUCKET_MINUTES over a report's window.
+
+    Log errors come from the scan's own histogram (when the backend keeps
+    one) and are re-binned; failed executions are binned by start date.
+    """
+    bucket_ms = SWEEP_HISTOGRAM_BUCKET_MINUTES * 60 * 1000
+    window_start_ms = now_ms - report['time_range_hours'] * 3600 * 1000
+    origin_ms = window_start_ms - window_start_ms % bucket_ms
+    buckets = (now_ms - origin_ms) // bucket_ms + 1
+    histogram: Dict[str, Any] = {
+        'bucket_minutes': SWEEP_HISTOGRAM_BUCKET_MINUTES,
+        'start': datetime.fromtimestamp(origin_ms / 1000, tz=timezone.utc).isoformat()
+    }
+    
+    log_buckets = (report.get('log_scan') or {}).get('histogram')
+    if log_buckets is not None:
+        histogram['log_errors'] = bin_counts(
+            [int(start) for start, _ in log_buckets], [int(count) for _, count in log_buckets],
+            origin_ms, bucket_ms, buckets
+        )
+    starts = [
+        int(datetime.fromisoformat(item['start_date']).timestamp() * 1000)
+        for item in report['evidence'] if item['type'] == 'step_function_failure' and item.get('start_date')
+    ]
+    histogram['failed_executions'] = bin_counts(starts, [1] * len(starts), origin_ms, bucket_ms, buckets)
+    return histogram
+
+
+def precomputed_report_key(pipeline_name: str, hours_back: int) -> str:
+    """Reports are keyed by their exact window, so only questions over the sweep's own
+    SWEEP_HOURS_BACK find one; its evidence cannot be cut down to a shorter window."""
+    return f'report#{pipeline_name}#{hours_back}'
+
+
+def load_precomputed_report(pipeline_name: str, hours_back: int, max_age: float) -> Optional[Dict[str, Any]]:
+    """Read a stored sweep report no older than max_age seconds, or None."""
+    try:
+        with trace_span('cache'):
+            item = get_table(CACHE_TABLE).get_item(Key={'cache_key': precomputed_report_key(pipeline_name, hours_back)}).get('Item')
+        if not item or float(item['generated_at']) < time.time() - max_age:
+            return None
+        # boto3 wraps binary attributes in a Binary object
+        raw = getattr(item['report'], 'value', item['report'])
+        return json.loads(zlib.decompress(bytes(raw)))
+    except Exception as e:
+        logger.error(f"Error loading precomputed report: {str(e)}", exc_info=True)
+        return None
+
+
+def save_precomputed_report(report: Dict[str, Any], generated_at: float):
+    """Write a compressed sweep report stamped with when it was generated."""
+    with trace_span('cache'):
+        get_table(CACHE_TABLE).put_item(
+            Item={
+                'cache_key': precomputed_report_key(report['pipeline_name'], report['time_range_hours']),
+                'report': zlib.compress(json.dumps(report, default=str).encode('utf-8')),
+                'generated_at': int(generated_at),
+                'ttl': int(generated_at) + PRECOMPUTED_MAX_AGE_SECONDS
+            }
+        )
+
+
+def pipeline_report(pipeline_name: str, hours_back: int, deadline: Optional[RequestDeadline] = None) -> Dict[str, Any]:
+    """The pipeline's report: a fresh one from the last sweep if stored, else a live analysis.
+
+    Only hours_back equal to SWEEP_HOURS_BACK can use a stored report, so other
+    windows skip the cache table. The lookup runs within the catalog budget;
+    a slow one is abandoned for a live analysis.
+    """
+    if PRECOMPUTED_ENABLED and CACHE_TABLE and hours_back == SWEEP_HOURS_BACK:
+        def load() -> Optional[Dict[str, Any]]:
+            return load_precomputed_report(pipeline_name, hours_back, PRECOMPUTED_MAX_AGE_SECONDS)
+        report = deadline.run('catalog', load, required=False) if deadline else load()
+        trace_count('precomputed_hit' if report else 'precomputed_miss')
+        if report:
+            return report
+    return analyze_pipeline(pipeline_name, hours_back, deadline=deadline)
+
+
+def sweep_pipeline(pipeline_info: Dict[str, Any], hours_back: int) -> str:
+    """Analyze one pipeline for the sweep and store its report.
+
+    Returns fresh (a recent report is already stored), stored, or partial
+    (evidence was incomplete, so nothing is stored and chat scans live).
+    """
+    name = pipeline_info['pipeline_name']
+    if load_precomputed_report(name, hours_back, SWEEP_REFRESH_SECONDS):
+        return 'fresh'
+    generated_at = time.time()
+    report = analyze_pipeline(name, hours_back, pipeline_info)
+    if report['partial']:
+        return 'partial'
+    report['generated_at'] = datetime.fromtimestamp(generated_at, tz=timezone.utc).isoformat()
+    report['error_histogram'] = error_histogram(report, int(generated_at * 1000))
+    save_precomputed_report(report, generated_at)
+    return 'stored'
+
+
+def is_scheduled_event(event: Dict[str, Any]) -> bool:
+    """True for EventBridge scheduled invocations (not API Gateway requests)."""
+    return event.get('source') == 'aws.events' or event.get('detail-type') == 'Scheduled Event'
+
+
+def run_scheduled_sweep(context: Any) -> Dict[str, Any]:
+    """Analyze every catalog pipeline and store the reports for chat requests.
+
+    The catalog is paged through while earlier pages are analyzed, with at
+    most SWEEP_MAX_CONCURRENCY pipelines in flight; API calls still go
+    through the governor, so a large fleet is paced to the service quotas.
+    No new pipeline starts once less than EVIDENCE_SOURCE_TIMEOUT is left.
+    The pipelines not reached are counted as skipped; the next sweep gets
+    to them sooner because it passes over reports stored in the last
+    SWEEP_REFRESH_SECONDS.
+    """
+    if not (PIPELINES_TABLE and CACHE_TABLE and PRECOMPUTED_ENABLED):
+        logger.warning("Scheduled sweep needs DDB_PIPELINES_TABLE, DDB_CACHE_TABLE and PRECOMPUTED_ENABLED")
+        return {'swept': 0}
+    
+    deadline = RequestDeadline.from_context(context)
+    started = time.monotonic()
+    counts = {'stored': 0, 'fresh': 0, 'partial': 0, 'error': 0, 'skipped': 0}
+    pending: Dict[Future, str] = {}
+    
+    def collect(done):
+        for future in done:
+            name = pending.pop(future)
+            try:
+                counts[future.result()] += 1
+            except Exception as e:
+                logger.error(f"Error sweeping pipeline {name}: {str(e)}", exc_info=True)
+                counts['error'] += 1
+    
+    try:
+        for item in iter_pipeline_catalog():
+            if deadline.remaining() < EVIDENCE_SOURCE_TIMEOUT:
+                counts['skipped'] += 1
+                continue
+            while len(pending) >= SWEEP_MAX_CONCURRENCY:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[submit_traced(sweep_executor, sweep_pipeline, item, SWEEP_HOURS_BACK)] = item['pipeline_name']
+    except Exception as e:
+        logger.error(f"Error paging pipelines catalog: {str(e)}", exc_info=True)
+    
+    done, not_done = wait(list(pending), timeout=deadline.remaining())
+    collect(done)
+    counts['skipped'] += len(not_done)
     
-    # Generate summary
-    if report['evidence']:
-        error_count = len([e for e in report['evidence'] if e['type'] == 'log_error'])
-        sfn_failures = len([e for e in report['evidence'] if e['type'] == 'step_function_failure'])
-        
-        report['summary'] = f"Found {error_count} log errors and {sfn_failures} failed Step Functions executions in the last {hours_back} hours."
-        
-        if error_count > 0:
-            report['probable_cause'].append("Application errors detected in logs")
-        if sfn_failures > 0:
-            report['probable_cause'].append("Step Functions executions are failing")
-        
-        report['recommendations'].append(f"Review CloudWatch Logs for log group: {pipeline_info.get('log_group', 'N/A')}")
-        report['recommendations'].append("Check Step Functions execution history for detailed failure reasons")
-    else:
-        report['summary'] = f"No errors found in the last {hours_back} hours."
-        report['recommendations'].append("Pipeline appears healthy. Monitor for any new issues.")
+    summary = dict(counts, swept=sum(counts.values()), duration_ms=round((time.monotonic() - started) * 1000, 2))
+    logger.info(f"Scheduled sweep finished: {json.dumps(summary)}")
+    return summary
+
+
+def format_batch_response(results: List[Dict[str, Any]]) -> str:
+    """Format batch results as one line per pipeline, problems first."""
+    def has_issues(result):
+        return result['status'] != 'ok' or bool(result['report']['evidence'])
     
-    return report
+    lines = []
+    for result in sorted(results, key=lambda result: not has_issues(result)):
+        if result['status'] == 'ok':
+            lines.append(f"- {result['pipeline_name']}: {result['report']['summary']}")
+        else:
+            lines.append(f"- {result['pipeline_name']}: {result['error']}")
+    return "\n".join(lines)
 
 
 def format_response(report: Dict[str, Any]) -> str:
@@ -204,18 +2629,30 @@ def format_response(report: Dict[str, Any]) -> str:
     # Summary
     lines.append("1) Summary")
     lines.append(f"- {report['summary']}")
+    if report.get('generated_at'):
+        lines.append(f"- From the scheduled health sweep at {report['generated_at'][:19]} UTC.")
     lines.append("")
     
     # Evidence
     lines.append("2) Evidence")
     if report.get('evidence'):
         for item in report['evidence']:
-            if item['type'] == 'log_error':
-                lines.append(f"- Log error at {item['timestamp']}: {item['message'][:200]}")
+            if item['type'] == 'log_signature':
+                lines.append(
+                    f"- {item['count']}x between {item['first_seen']} and {item['last_seen']}: {item['signature'][:200]}"
+                )
+                if item['example'] and item['count'] > 1:
+                    lines.append(f"  Example: {' '.join(item['example'].split())[:200]}")
             elif item['type'] == 'step_function_failure':
                 lines.append(f"- Step Function failure: {item['execution_arn']} (Status: {item['status']})")
+                if item.get('error'):
+                    cause = ' '.join((item.get('cause') or '').split())[:200]
+                    lines.append(f"  Failed in state {item.get('failed_state') or 'unknown'}: {item['error']} {cause}".rstrip())
     else:
         lines.append("- No evidence found in the specified time range.")
+    for source in report.get('sources', []):
+        if source['status'] != 'ok':
+            lines.append(f"- Evidence source {source['source']} did not complete ({source['status']}); results may be incomplete.")
     
     # Probable cause
     lines.append("")
@@ -238,46 +2675,297 @@ def format_response(report: Dict[str, Any]) -> str:
     return "\n".join(lines)
 
 
-def invoke_openai(prompt: str, context: str = "") -> Optional[str]:
-    """Invoke OpenAI API if configured."""
-    if not OPENAI_API_KEY:
-        return None
+llm_cache = TTLCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL)
+# Timing and per-run bookkeeping that should never make two reports hash differently
+# (the sweep stamps every stored report and recounts its histogram on each run)
+LLM_CACHE_IGNORED_KEYS = {'sources', 'log_scan', 'generated_at', 'error_histogram'}
+LLM_CACHE_TIMESTAMP_KEYS = {'timestamp', 'first_seen', 'last_seen', 'start_date'}
+TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?')
+
+
+def normalize_for_cache(value: Any, tolerant: bool) -> Any:
+    """Strip per-run noise from a report so equivalent reports hash alike."""
+    if isinstance(value, dict):
+        return {
+            key: normalize_for_cache(item, tolerant)
+            for key, item in value.items()
+            if key not in LLM_CACHE_IGNORED_KEYS and not (tolerant and key in LLM_CACHE_TIMESTAMP_KEYS)
+        }
+    if isinstance(value, list):
+        return [normalize_for_cache(item, tolerant) for item in value]
+    if tolerant and isinstance(value, str):
+        return TIMESTAMP_PATTERN.sub('<TS>', value)
+    return value
+
+
+def normalize_intent(intent: str) -> str:
+    """Reduce a user message to its wording: case, spacing and end punctuation ignored."""
+    return ' '.join(intent.lower().split()).strip('.,!?;: ')
+
+
+def llm_cache_key(report: Dict[str, Any], model_id: str, system_prompt: str, intent: str, context: str = '') -> str:
+    """Content-address an LLM call by report, model, system prompt, user intent and
+    conversation context (the history fingerprint, '' without history)."""
+    payload = json.dumps({
+        'report': normalize_for_cache(report, LLM_CACHE_TOLERANT),
+        'model_id': model_id,
+        'system_prompt': system_prompt,
+        'intent': normalize_intent(intent),
+        'context': context
+    }, sort_keys=True, default=str)
+    return 'llm#' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached_llm_response(cache_key: str) -> Tuple[Optional[str], str]:
+    """Look up a cached LLM response: memory first, then the shared DynamoDB tier.
+
+    Returns the response (or None) and the cache status: hit, shared_hit or miss.
+    """
+    hit, response_text = llm_cache.get(cache_key)
+    if hit:
+        trace_count('llm_cache_hit')
+        return response_text, 'hit'
+    if not CACHE_TABLE:
+        trace_count('llm_cache_miss')
+        return None, 'miss'
     
     try:
-        from openai import OpenAI
-        
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
-        system_prompt = """You are an AWS Operations Support Agent specialized in data platforms, SQL pipelines, and cloud workflows.
+        with trace_span('cache'):
+            item = get_table(CACHE_TABLE).get_item(Key={'cache_key': cache_key}).get('Item')
+        # DynamoDB deletes expired items lazily, so check the TTL ourselves
+        if item and int(item.get('ttl', 0)) > time.time():
+            remaining = int(item['ttl']) - time.time()
+            llm_cache.set(cache_key, item['response'], ttl=min(remaining, LLM_CACHE_TTL))
+            trace_count('llm_cache_shared_hit')
+            return item['response'], 'shared_hit'
+    except Exception as e:
+        logger.error(f"Error reading LLM cache: {str(e)}", exc_info=True)
+    trace_count('llm_cache_miss')
+    return None, 'miss'
 
-Your role is to help engineers understand operational state and troubleshoot issues.
 
-Be concise, technical, and objective. Base conclusions only on provided evidence.
-If information is missing, ask for minimum required detail (pipeline name, time range, environment).
+def put_cached_llm_response(cache_key: str, response_text: str):
+    """Store an LLM response in memory and, if configured, the shared tier."""
+    llm_cache.set(cache_key, response_text)
+    if not CACHE_TABLE:
+        return
+    
+    try:
+        with trace_span('cache'):
+            get_table(CACHE_TABLE).put_item(
+                Item={
+                    'cache_key': cache_key,
+                    'response': response_text,
+                    'ttl': int(time.time()) + LLM_CACHE_TTL
+                }
+            )
+    except Exception as e:
+        logger.error(f"Error writing LLM cache: {str(e)}", exc_info=True)
 
-Always structure your response as:
-1) Summary - One or two sentences describing the current situation
-2) Evidence - Bullet points with concrete signals (errors, timestamps, execution status)
-3) Probable cause - Hypothesis based strictly on the evidence
-4) Recommended next steps - Clear, actionable steps
 
-Write in the same language as the user."""
-        
-        messages = [
-            {"role": "system", "content": system_prompt}
+def enhance_with_cache(
+    report: Dict[str, Any],
+    model_id: str,
+    system_prompt: str,
+    intent: str,
+    invoke: Callable[[], Optional[str]],
+    context: str = ''
+) -> Tuple[Optional[str], str]:
+    """Run an LLM enhancement through the response cache.
+
+    Returns the enhanced text (None if the model gave nothing) and the cache
+    status reported to the caller: hit, shared_hit, miss or disabled.
+    """
+    if not LLM_CACHE_ENABLED:
+        return invoke(), 'disabled'
+    
+    cache_key = llm_cache_key(report, model_id, system_prompt, intent, context)
+    cached, status = get_cached_llm_response(cache_key)
+    if cached is not None:
+        return cached, status
+    
+    enhanced = invoke()
+    if enhanced:
+        put_cached_llm_response(cache_key, enhanced)
+    return enhanced, status
+
+
+class TokenEstimator:
+    """Estimates token counts from text length.
+
+    The characters-per-token ratio starts at a typical value for English and
+    is calibrated from the prompt token counts that LLM responses report.
+    """
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+        self.lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def calibrate(self, chars: int, tokens: int):
+        if chars > 0 and tokens > 0:
+            with self.lock:
+                self.chars_per_token = 0.9 * self.chars_per_token + 0.1 * (chars / tokens)
+
+
+token_estimator = TokenEstimator()
+
+
+def compact_evidence(report: Dict[str, Any]) -> List[Tuple[float, str]]:
+    """Render each evidence item as one compact line, with its rank score.
+
+    A log signature scores its share of the scanned error events. Step
+    Functions failures with the same state, error and masked cause collapse
+    into one line, scored by their share of the failures.
+    """
+    items: List[Tuple[float, str]] = []
+    error_count = max(1, (report.get('log_scan') or {}).get('event_count') or 0)
+    failures: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = {}
+    for item in report.get('evidence', []):
+        if item['type'] == 'log_signature':
+            line = f"log x{item['count']} {item['first_seen'][:19]}..{item['last_seen'][:19]}: {item['signature'][:200]}"
+            example = ' '.join((item.get('example') or '').split())[:160]
+            if example and item['count'] > 1:
+                line += f" | e.g. {example}"
+            items.append((item['count'] / error_count, line))
+        elif item['type'] == 'step_function_failure':
+            key = (item.get('failed_state'), item.get('error'), mask_log_message(item.get('cause') or ''))
+            failures.setdefault(key, []).append(item)
+    
+    sfn_total = sum(len(group) for group in failures.values())
+    for (state, error, _), group in failures.items():
+        latest = max(group, key=lambda item: item.get('start_date') or '')
+        line = f"sfn x{len(group)} {latest['status']} latest={latest['execution_arn'].rsplit(':', 1)[-1]}"
+        if latest.get('start_date'):
+            line += f" at {latest['start_date'][:19]}"
+        if error:
+            line += f" state={state or 'unknown'} error={error}"
+        cause = ' '.join((latest.get('cause') or '').split())[:200]
+        if cause:
+            line += f" cause: {cause}"
+        items.append((len(group) / sfn_total, line))
+    
+    return sorted(items, key=lambda item: -item[0])
+
+
+def build_report_prompt(report: Dict[str, Any], question: str = "") -> Tuple[str, int]:
+    """Serialize a report and question as a compact prompt within the input budget.
+
+    Evidence is ranked and the lowest-ranked items are dropped once the
+    estimated token count would pass LLM_INPUT_TOKEN_BUDGET. Returns the
+    user message and the max_tokens to request for the answer.
+    """
+    header = [
+        f"pipeline={report['pipeline_name']} window={report['time_range_hours']}h partial={'yes' if report.get('partial') else 'no'}",
+        f"summary: {report['summary']}"
+    ]
+    incomplete = [f"{source['source']}={source['status']}" for source in report.get('sources', []) if source['status'] != 'ok']
+    if incomplete:
+        header.append(f"incomplete sources: {' '.join(incomplete)}")
+    footer = [f"cause: {cause}" for cause in report.get('probable_cause', [])]
+    footer.append(f"question: {question or 'Analyze this pipeline report.'}")
+    
+    used = token_estimator.estimate("\n".join(header + footer))
+    evidence = compact_evidence(report)
+    kept: List[str] = []
+    for _, line in evidence:
+        cost = token_estimator.estimate(line) + 1
+        if used + cost > LLM_INPUT_TOKEN_BUDGET:
+            break
+        kept.append(f"E{len(kept) + 1} {line}")
+        used += cost
+    
+    dropped = len(evidence) - len(kept)
+    if dropped:
+        trace_count('llm_evidence_dropped', dropped)
+        kept.append(f"({dropped} lower-ranked evidence items omitted)")
+    lines = header + (["evidence:"] + kept if kept else ["evidence: none"]) + footer
+    return "\n".join(lines), llm_max_tokens(len(evidence) - dropped)
+
+
+def build_text_prompt(text: str, question: str) -> Tuple[str, int]:
+    """Like build_report_prompt for already formatted lines (e.g. batch summaries)."""
+    footer = f"question: {question}"
+    used = token_estimator.estimate(footer)
+    lines = text.splitlines()
+    kept: List[str] = []
+    for line in lines:
+        cost = token_estimator.estimate(line) + 1
+        if used + cost > LLM_INPUT_TOKEN_BUDGET:
+            break
+        kept.append(line)
+        used += cost
+    if len(kept) < len(lines):
+        trace_count('llm_evidence_dropped', len(lines) - len(kept))
+        kept.append(f"({len(lines) - len(kept)} more lines omitted)")
+    return "\n".join(kept + [footer]), llm_max_tokens(len(kept))
+
+
+def llm_max_tokens(items: int) -> int:
+    """Completion budget for an answer covering this many evidence items."""
+    return min(LLM_MAX_TOKENS_CAP, LLM_MAX_TOKENS_BASE + LLM_MAX_TOKENS_PER_ITEM * items)
+
+
+def build_openai_messages(prompt: str, history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+    """Build the OpenAI chat messages: the shared system prompt, earlier turns, then the prompt."""
+    return [{"role": "system", "content": AGENT_SYSTEM_PROMPT}] + (history or []) + [
+        {"role": "user", "content": prompt}
+    ]
+
+
+def build_bedrock_body(prompt: str, max_tokens: int, history: Optional[List[Dict[str, str]]] = None) -> str:
+    """Build the Bedrock (Anthropic messages API) request body for a prompt."""
+    return json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "system": AGENT_SYSTEM_PROMPT,
+        "messages": (history or []) + [
+            {
+                "role": "user",
+                "content": prompt
+            }
         ]
+    })
+
+
+def prompt_chars(prompt: str, history: Optional[List[Dict[str, str]]] = None) -> int:
+    """Characters of input sent with a prompt: system prompt, earlier turns and the prompt."""
+    return len(AGENT_SYSTEM_PROMPT) + sum(len(message['content']) for message in history or []) + len(prompt)
+
+
+def record_llm_usage(prompt_tokens: int, completion_tokens: int, input_chars: int = 0):
+    """Count LLM tokens against the active trace, calibrating estimates with the input's size."""
+    trace_count('llm_prompt_tokens', prompt_tokens or 0)
+    trace_count('llm_completion_tokens', completion_tokens or 0)
+    if input_chars:
+        token_estimator.calibrate(input_chars, prompt_tokens or 0)
+
+
+def invoke_openai(
+    prompt: str,
+    max_tokens: int = LLM_MAX_TOKENS_CAP,
+    timeout: Optional[float] = None,
+    history: Optional[List[Dict[str, str]]] = None
+) -> Optional[str]:
+    """Invoke OpenAI API if configured (timeout in seconds overrides the client's)."""
+    if not OPENAI_API_KEY:
+        return None
+    
+    try:
+        client = get_client('openai')
         
-        if context:
-            messages.append({"role": "user", "content": f"Context: {context}\n\nUser question: {prompt}"})
-        else:
-            messages.append({"role": "user", "content": prompt})
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            max_tokens=1000,
-            temperature=0.3
-        )
+        with trace_span('openai'):
+            response = client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=build_openai_messages(prompt, history),
+                max_tokens=max_tokens,
+                temperature=0.3,
+                timeout=timeout or LLM_READ_TIMEOUT
+            )
+        if response.usage:
+            record_llm_usage(response.usage.prompt_tokens, response.usage.completion_tokens, prompt_chars(prompt, history))
         
         return response.choices[0].message.content
     except Exception as e:
@@ -285,35 +2973,568 @@ Write in the same language as the user."""
         return None
 
 
-def invoke_bedrock(prompt: str) -> Optional[str]:
-    """Invoke Bedrock model if configured."""
+def invoke_bedrock(
+    prompt: str,
+    max_tokens: int = LLM_MAX_TOKENS_CAP,
+    history: Optional[List[Dict[str, str]]] = None
+) -> Optional[str]:
+    """Invoke Bedrock model if configured (callers bound the wait, see invoke_llm)."""
     if not BEDROCK_MODEL_ID:
         return None
     
     try:
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 1024,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        })
-        
-        response = bedrock_client.invoke_model(
-            modelId=BEDROCK_MODEL_ID,
-            body=body
-        )
-        
-        response_body = json.loads(response['body'].read())
+        with trace_span('bedrock'):
+            response = get_client('bedrock-runtime').invoke_model(
+                modelId=BEDROCK_MODEL_ID,
+                body=build_bedrock_body(prompt, max_tokens, history)
+            )
+            response_body = json.loads(response['body'].read())
+        usage = response_body.get('usage', {})
+        record_llm_usage(usage.get('input_tokens', 0), usage.get('output_tokens', 0), prompt_chars(prompt, history))
         return response_body.get('content', [{}])[0].get('text', '')
     except Exception as e:
         logger.error(f"Error invoking Bedrock: {str(e)}", exc_info=True)
         return None
 
 
+def stream_openai(
+    prompt: str,
+    max_tokens: int = LLM_MAX_TOKENS_CAP,
+    history: Optional[List[Dict[str, str]]] = None,
+    timeout: Optional[float] = None
+) -> Iterator[str]:
+    """Stream an OpenAI completion as text chunks (timeout in seconds bounds each read)."""
+    with trace_span('openai'):
+        response = get_client('openai').chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=build_openai_messages(prompt, history),
+            max_tokens=max_tokens,
+            temperature=0.3,
+            timeout=timeout or LLM_READ_TIMEOUT,
+            stream=True,
+            stream_options={'include_usage': True}
+        )
+        for chunk in response:
+            # The final chunk carries usage and no choices
+            if getattr(chunk, 'usage', None):
+                record_llm_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens, prompt_chars(prompt, history))
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+def stream_bedrock(
+    prompt: str,
+    max_tokens: int = LLM_MAX_TOKENS_CAP,
+    history: Optional[List[Dict[str, str]]] = None
+) -> Iterator[str]:
+    """Stream a Bedrock completion as text chunks (each read bounded by LLM_READ_TIMEOUT)."""
+    with trace_span('bedrock'):
+        response = get_client('bedrock-runtime').invoke_model_with_response_stream(
+            modelId=BEDROCK_MODEL_ID,
+            body=build_bedrock_body(prompt, max_tokens, history)
+        )
+        for event in response['body']:
+            chunk = json.loads(event.get('chunk', {}).get('bytes', b'{}'))
+            if chunk.get('type') == 'message_start':
+                input_tokens = chunk.get('message', {}).get('usage', {}).get('input_tokens', 0)
+                record_llm_usage(input_tokens, 0, prompt_chars(prompt, history))
+            elif chunk.get('type') == 'message_delta':
+                record_llm_usage(0, chunk.get('usage', {}).get('output_tokens', 0))
+            elif chunk.get('type') == 'content_block_delta':
+                text = chunk.get('delta', {}).get('text')
+                if text:
+                    yield text
+
+
+class ProviderStats:
+    """Rolling latency and error rate over an LLM provider's recent calls."""
+
+    def __init__(self, window: int):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool):
+        with self.lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency percentile of successful calls, or None with too few samples."""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < LLM_STATS_MIN_SAMPLES:
+            return None
+        return samples[max(0, math.ceil(len(samples) * pct / 100) - 1)]
+
+    def error_rate(self) -> float:
+        with self.lock:
+            if len(self.outcomes) < LLM_STATS_MIN_SAMPLES:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+
+# Per-provider stats, kept across warm invocations
+llm_stats = {'openai': ProviderStats(LLM_STATS_WINDOW), 'bedrock': ProviderStats(LLM_STATS_WINDOW)}
+
+
+def configured_llm_providers() -> List[str]:
+    """Providers with credentials or a model configured, LLM_PRIMARY first."""
+    configured = [name for name, enabled in (('openai', OPENAI_API_KEY), ('bedrock', BEDROCK_MODEL_ID)) if enabled]
+    return sorted(configured, key=lambda name: name != LLM_PRIMARY)
+
+
+def llm_providers() -> List[str]:
+    """Configured providers in the order to try them; unhealthy ones go last."""
+    return sorted(configured_llm_providers(), key=lambda name: llm_stats[name].error_rate() > LLM_MAX_ERROR_RATE)
+
+
+def llm_model_id() -> str:
+    """Identify the configured models, for LLM cache and coalescing keys."""
+    models = {'openai': OPENAI_MODEL, 'bedrock': BEDROCK_MODEL_ID}
+    return '|'.join(models[name] for name in configured_llm_providers())
+
+
+def hedge_delay(provider: str) -> float:
+    """Seconds to wait on provider before hedging to the next one."""
+    observed = llm_stats[provider].percentile(LLM_HEDGE_PERCENTILE)
+    return max(LLM_HEDGE_MIN_DELAY, LLM_HEDGE_DEFAULT_DELAY if observed is None else observed)
+
+
+def timed_llm_call(provider: str, call: Callable[[float], Optional[str]], timeout: float) -> Optional[str]:
+    """Run one provider call, recording its latency and outcome."""
+    started = time.monotonic()
+    text = None
+    try:
+        text = call(timeout)
+    except Exception as e:
+        logger.error(f"Error invoking {provider}: {str(e)}", exc_info=True)
+    llm_stats[provider].record(time.monotonic() - started, bool(text))
+    return text
+
+
+def invoke_llm(calls: Dict[str, Callable[[float], Optional[str]]], timeout: float) -> Optional[str]:
+    """Answer with the first provider to return text, hedging a slow one.
+
+    calls maps a provider name to a function of its per-call timeout in
+    seconds. The healthiest provider starts at once. The next one starts
+    when it fails, or (with hedging) once it has run past its recent p95
+    latency. The first non-empty answer wins; a losing call that has not
+    started is cancelled, and one in flight is abandoned and its answer
+    dropped. Returns None when every provider failed or timeout passed.
+    """
+    waiting = [name for name in llm_providers() if name in calls]
+    first = waiting[0] if waiting else None
+    give_up_at = time.monotonic() + timeout
+    pending: Dict[Future, str] = {}
+    next_at = time.monotonic()
+    
+    while waiting or pending:
+        now = time.monotonic()
+        if now >= give_up_at:
+            break
+        if waiting and now >= next_at:
+            if pending:
+                trace_count('llm_hedged')
+            name = waiting.pop(0)
+            pending[submit_traced(llm_executor, timed_llm_call, name, calls[name], give_up_at - now)] = name
+            next_at = now + hedge_delay(name) if LLM_HEDGE_ENABLED else give_up_at
+        wake_at = min(give_up_at, next_at) if waiting else give_up_at
+        done, _ = wait(list(pending), timeout=max(0.0, wake_at - time.monotonic()), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = pending.pop(future)
+            text = future.result()
+            if text:
+                for loser in pending:
+                    loser.cancel()
+                if name != first:
+                    trace_count('llm_secondary_answers')
+                return text
+        if not pending:
+            # Every call so far failed: fail over to the next provider now
+            next_at = time.monotonic()
+    
+    for loser in pending:
+        loser.cancel()
+    return None
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Frame one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_pipeline_chat(
+    message: str,
+    conversation_id: str,
+    pipeline_name: str,
+    hours_back: int,
+    deadline: Optional[RequestDeadline] = None,
+    memory: Optional[ConversationMemory] = None
+) -> Iterator[str]:
+    """Answer a pipeline question as a stream of server-sent events.
+
+    The deterministic summary section goes out as soon as the evidence is in
+    (event: summary); the LLM refinement follows as it is generated (event:
+    delta), falling back to the rest of the formatted report when no model is
+    configured or it fails. The conversation is saved once the stream ends
+    (event: done), or with what was produced when it is closed early (the
+    client went away). With a deadline, generation stops when the LLM budget
+    runs out and the done event is marked partial. With memory, earlier
+    turns of the conversation are sent along with the prompt.
+    """
+    report = pipeline_report(pipeline_name, hours_back, deadline)
+    formatted = format_response(report)
+    summary, _, details = formatted.partition("\n\n")
+    response_text: Optional[str] = None
+    parts: List[str] = []
+    saved = False
+    try:
+        yield sse_event('summary', {
+            'conversation_id': conversation_id,
+            'pipeline_name': pipeline_name,
+            'text': summary
+        })
+    
+        prompt, max_tokens = build_report_prompt(report, message)
+        history = memory.messages() if memory else None
+        context = memory.fingerprint() if memory else ''
+        # OpenAI reads time out with the LLM budget; Bedrock's client has a fixed read
+        # timeout, and either stream stops at the budget once chunks are flowing
+        streams = {
+            'openai': lambda timeout: stream_openai(prompt, max_tokens, history, timeout),
+            'bedrock': lambda timeout: stream_bedrock(prompt, max_tokens, history)
+        }
+        providers = llm_providers()
+    
+        llm_cache_status = None
+        if providers and LLM_CACHE_ENABLED:
+            cache_key = llm_cache_key(report, llm_model_id(), AGENT_SYSTEM_PROMPT, message, context)
+            response_text, llm_cache_status = get_cached_llm_response(cache_key)
+            if response_text is not None:
+                yield sse_event('delta', {'text': response_text})
+    
+        if providers and response_text is None and deadline and deadline.budget('llm') < LLM_MIN_BUDGET_SECONDS:
+            deadline.overrun.append('llm')
+            providers = []
+    
+        if providers and response_text is None:
+            # Streams are not hedged (chunks already sent cannot be taken back), but
+            # a provider that fails before its first chunk falls over to the next
+            llm_deadline = time.monotonic() + deadline.budget('llm') if deadline else None
+            for provider in providers:
+                started = time.monotonic()
+                try:
+                    read_timeout = max(0.1, llm_deadline - time.monotonic()) if llm_deadline else None
+                    for text in streams[provider](read_timeout):
+                        parts.append(text)
+                        yield sse_event('delta', {'text': text})
+                        if llm_deadline and time.monotonic() > llm_deadline:
+                            deadline.overrun.append('llm')
+                            break
+                except Exception as e:
+                    logger.error(f"Error streaming {provider} response: {str(e)}", exc_info=True)
+                    llm_stats[provider].record(time.monotonic() - started, False)
+                    if parts:
+                        break
+                    continue
+                llm_stats[provider].record(time.monotonic() - started, bool(parts))
+                response_text = ''.join(parts)
+                if response_text and LLM_CACHE_ENABLED and not (deadline and 'llm' in deadline.overrun):
+                    put_cached_llm_response(cache_key, response_text)
+                break
+            # After a failure mid-stream, keep what reached the client
+            response_text = response_text or ''.join(parts) or None
+    
+        if not response_text:
+            response_text = formatted
+            yield sse_event('delta', {'text': "\n\n" + details})
+    
+        save_conversation(conversation_id, message, response_text, pipeline_name, memory)
+        saved = True
+        done = {
+            'conversation_id': conversation_id,
+            'partial': report['partial'] or bool(deadline and deadline.overrun)
+        }
+        if llm_cache_status:
+            done['llm_cache'] = llm_cache_status
+        if report.get('generated_at'):
+            done['report_generated_at'] = report['generated_at']
+        yield sse_event('done', done)
+    finally:
+        if not saved:
+            # The stream was closed early (client gone) or failed: keep what it produced
+            save_conversation(conversation_id, message, response_text or ''.join(parts) or formatted, pipeline_name, memory)
+
+
+def answer_pipeline_question(
+    pipeline_name: str,
+    hours_back: int,
+    message: str,
+    deadline: RequestDeadline,
+    memory: Optional[ConversationMemory] = None
+) -> Dict[str, Any]:
+    """Analyze a pipeline and answer message about it, refined by the LLM if configured.
+
+    Returns the response text, whether it is partial, the LLM cache status,
+    the stages that overran and, for a report from the scheduled sweep,
+    when it was generated. The result is JSON-serializable so it can
+    be shared with coalesced duplicates. With memory, the LLM also sees the
+    conversation's earlier turns.
+    """
+    report = pipeline_report(pipeline_name, hours_back, deadline)
+    response_text = format_response(report)
+    llm_cache_status = None
+    
+    # Enhance with AI if available (routed and hedged across providers); without
+    # enough time left the deterministic report is returned as is
+    llm_budget = deadline.budget('llm')
+    if (OPENAI_API_KEY or BEDROCK_MODEL_ID) and llm_budget < LLM_MIN_BUDGET_SECONDS:
+        deadline.overrun.append('llm')
+    elif OPENAI_API_KEY or BEDROCK_MODEL_ID:
+        prompt, max_tokens = build_report_prompt(report, message)
+        history = memory.messages() if memory else None
+        calls = {
+            'openai': lambda timeout: invoke_openai(prompt, max_tokens, timeout=timeout, history=history),
+            'bedrock': lambda timeout: invoke_bedrock(prompt, max_tokens, history)
+        }
+        enhanced, llm_cache_status = enhance_with_cache(
+            report, llm_model_id(), AGENT_SYSTEM_PROMPT, message,
+            lambda: deadline.run('llm', lambda: invoke_llm(calls, llm_budget)),
+            memory.fingerprint() if memory else ''
+        )
+        if enhanced:
+            response_text = enhanced
+    
+    return {
+        'response': response_text,
+        'partial': report['partial'] or bool(deadline.overrun),
+        'llm_cache': llm_cache_status,
+        'overrun_stages': list(deadline.overrun),
+        'report_generated_at': report.get('generated_at')
+    }
+
+
+# In-flight answers by coalescing key, shared by concurrent requests in this container
+answer_flight = SingleFlight()
+
+
+def coalesce_key(pipeline_name: str, hours_back: int, intent: str, context: str = '') -> str:
+    """Key identical questions: same pipeline, window, normalized intent, model and
+    conversation context (the conversation id, '' for a new conversation).
+
+    The id stands in for the history so the key is known without waiting
+    for the history to load.
+    """
+    payload = json.dumps([pipeline_name, hours_back, normalize_intent(intent), llm_model_id(), context])
+    return 'flight#' + hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def acquire_flight_lease(key: str, owner: str, lease_seconds: float) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """Try to become the one container answering key.
+
+    Returns (True, None) once the lease item is written, or (False, item)
+    with the current holder's item: a running lease or a recent result.
+    Errors count as acquired, so the request simply does the work.
+
+    The holder's item is re-read with a consistent get_item rather than
+    taken from ReturnValuesOnConditionCheckFailure: the resource API
+    leaves that copy in raw AttributeValue form.
+    """
+    now_ms = int(time.time() * 1000)
+    try:
+        with trace_span('cache'):
+            get_table(CACHE_TABLE).put_item(
+                Item={
+                    'cache_key': key,
+                    'lease_owner': owner,
+                    'lease_expires': now_ms + int(lease_seconds * 1000),
+                    'ttl': int(time.time() + lease_seconds) + 60
+                },
+                ConditionExpression='attribute_not_exists(cache_key) OR lease_expires < :now',
+                ExpressionAttributeValues={':now': now_ms}
+            )
+        return True, None
+    except Exception as e:
+        error = getattr(e, 'response', {}) or {}
+        if error.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            try:
+                with trace_span('cache'):
+                    item = get_table(CACHE_TABLE).get_item(Key={'cache_key': key}, ConsistentRead=True).get('Item')
+                return False, item or {}
+            except Exception as read_error:
+                logger.error(f"Error reading coalescing lease: {str(read_error)}", exc_info=True)
+                return True, None
+        logger.error(f"Error acquiring coalescing lease: {str(e)}", exc_info=True)
+        return True, None
+
+
+def wait_for_flight(key: str, item: Dict[str, Any], timeout: float) -> Optional[Dict[str, Any]]:
+    """Poll another container's lease until its result is stored.
+
+    Returns None if the lease expires or is released without a result, or
+    timeout seconds pass.
+    """
+    give_up_at = time.monotonic() + timeout
+    delay = 0.1
+    try:
+        while 'result' not in item:
+            if int(item.get('lease_expires', 0)) < time.time() * 1000 or time.monotonic() >= give_up_at:
+                return None
+            time.sleep(min(delay, max(0.0, give_up_at - time.monotonic())))
+            delay = min(delay * 2, 1.0)
+            with trace_span('cache'):
+                item = get_table(CACHE_TABLE).get_item(Key={'cache_key': key}, ConsistentRead=True).get('Item') or {}
+        return json.loads(item['result'])
+    except Exception as e:
+        logger.error(f"Error waiting for coalesced answer: {str(e)}", exc_info=True)
+        return None
+
+
+def publish_flight_result(key: str, owner: str, result: Dict[str, Any]):
+    """Store the leader's answer for duplicates polling the lease, briefly."""
+    try:
+        with trace_span('cache'):
+            get_table(CACHE_TABLE).put_item(
+                Item={
+                    'cache_key': key,
+                    'lease_owner': owner,
+                    'lease_expires': int((time.time() + COALESCE_RESULT_SECONDS) * 1000),
+                    'result': json.dumps(result),
+                    'ttl': int(time.time()) + COALESCE_RESULT_SECONDS + 60
+                }
+            )
+    except Exception as e:
+        logger.error(f"Error publishing coalesced answer: {str(e)}", exc_info=True)
+
+
+def release_flight_lease(key: str, owner: str):
+    """Expire our lease early so waiting containers stop polling."""
+    try:
+        with trace_span('cache'):
+            get_table(CACHE_TABLE).update_item(
+                Key={'cache_key': key},
+                UpdateExpression='SET lease_expires = :zero',
+                ConditionExpression='lease_owner = :owner',
+                ExpressionAttributeValues={':zero': 0, ':owner': owner}
+            )
+    except Exception as e:
+        logger.error(f"Error releasing coalescing lease: {str(e)}", exc_info=True)
+
+
+def answer_across_containers(
+    key: str,
+    pipeline_name: str,
+    hours_back: int,
+    message: str,
+    deadline: RequestDeadline,
+    memory: Optional[ConversationMemory] = None
+) -> Dict[str, Any]:
+    """answer_pipeline_question behind a lease item in the cache table.
+
+    A duplicate that finds a running lease polls for the leader's result
+    and only does the work itself if the leader disappears or runs out
+    of time.
+    """
+    if not CACHE_TABLE:
+        return answer_pipeline_question(pipeline_name, hours_back, message, deadline, memory)
+    
+    owner = str(uuid.uuid4())
+    acquired, item = acquire_flight_lease(key, owner, deadline.remaining() + 1)
+    if not acquired:
+        result = wait_for_flight(key, item, deadline.remaining())
+        if result is not None:
+            trace_count('coalesce_shared')
+            return dict(result, coalesced='shared')
+        return answer_pipeline_question(pipeline_name, hours_back, message, deadline, memory)
+    
+    try:
+        result = answer_pipeline_question(pipeline_name, hours_back, message, deadline, memory)
+    except Exception:
+        release_flight_lease(key, owner)
+        raise
+    publish_flight_result(key, owner, result)
+    return result
+
+
+def coalesced_answer(
+    pipeline_name: str,
+    hours_back: int,
+    message: str,
+    deadline: RequestDeadline,
+    memory: Optional[ConversationMemory] = None
+) -> Dict[str, Any]:
+    """Answer a pipeline question once for all identical concurrent requests.
+
+    Duplicates in this container wait on the leader's thread; duplicates in
+    other containers find its lease item (see answer_across_containers).
+    Shared answers are marked with coalesced: local or shared.
+    """
+    if not COALESCE_ENABLED:
+        return answer_pipeline_question(pipeline_name, hours_back, message, deadline, memory)
+    
+    key = coalesce_key(pipeline_name, hours_back, message, memory.conversation_id if memory else '')
+    result, shared = answer_flight.do(
+        key,
+        lambda: answer_across_containers(key, pipeline_name, hours_back, message, deadline, memory),
+        timeout=deadline.remaining()
+    )
+    if shared:
+        trace_count('coalesce_local')
+        result = dict(result, coalesced='local')
+    return result
+
+
+def handle_batch_request(
+    body: Dict[str, Any],
+    conversation_id: str,
+    deadline: Optional[RequestDeadline] = None
+) -> Dict[str, Any]:
+    """Analyze body['pipeline_names'] and build the batch response body.
+
+    With summarize, one LLM call summarizes the whole batch instead of one
+    call per pipeline; the deterministic per-pipeline lines are the fallback.
+    """
+    message = body.get('message', '')
+    hours_back = int(body.get('hours_back', 24))
+    deadline = deadline or RequestDeadline(DEFAULT_REQUEST_TIMEOUT_MS)
+    results = analyze_pipelines_batch(body['pipeline_names'], hours_back, deadline)
+    summary = format_batch_response(results)
+    
+    response_body: Dict[str, Any] = {
+        'conversation_id': conversation_id,
+        'results': results
+    }
+    
+    if body.get('summarize') and deadline.budget('llm') < LLM_MIN_BUDGET_SECONDS:
+        deadline.overrun.append('llm')
+    elif body.get('summarize'):
+        batch_report = {'batch': [result.get('report') or result for result in results]}
+        question = message or "Summarize the health of these pipelines and say which need attention first."
+        enhanced, llm_cache_status = None, None
+        if OPENAI_API_KEY or BEDROCK_MODEL_ID:
+            llm_budget = deadline.budget('llm')
+            prompt, max_tokens = build_text_prompt(summary, question)
+            calls = {
+                'openai': lambda timeout: invoke_openai(prompt, max_tokens, timeout=timeout),
+                'bedrock': lambda timeout: invoke_bedrock(prompt, max_tokens)
+            }
+            enhanced, llm_cache_status = enhance_with_cache(
+                batch_report, llm_model_id(), AGENT_SYSTEM_PROMPT, question,
+                lambda: deadline.run('llm', lambda: invoke_llm(calls, llm_budget))
+            )
+        response_body['summary'] = enhanced or summary
+        if llm_cache_status:
+            response_body['llm_cache'] = llm_cache_status
+    
+    save_conversation(conversation_id, message, response_body.get('summary', summary))
+    response_body['partial'] = bool(deadline.overrun) or any(
+        result['status'] == 'timeout' or result.get('report', {}).get('partial') for result in results
+    )
+    return response_body
+
+
 def validate_request_body(body: Dict[str, Any]) -> tuple[bool, Optional[str]]:
     """Validate request body parameters."""
     # Validate hours_back if present
@@ -322,6 +3543,25 @@ def validate_request_body(body: Dict[str, Any]) -> tuple[bool, Optional[str]]:
         if not isinstance(hours_back, (int, float)) or hours_back < 1 or hours_back > 168:
             return False, "hours_back must be between 1 and 168 (7 days)"
 
+    if 'stream' in body and not isinstance(body['stream'], bool):
+        return False, "stream must be a boolean"
+
+    # Validate batch pipeline names if present
+    if 'pipeline_names' in body:
+        pipeline_names = body['pipeline_names']
+        if not isinstance(pipeline_names, list) or not pipeline_names:
+            return False, "pipeline_names must be a non-empty list"
+        if len(pipeline_names) > BATCH_MAX_PIPELINES:
+            return False, f"pipeline_names exceeds maximum of {BATCH_MAX_PIPELINES} pipelines"
+        cleaned = []
+        for name in pipeline_names:
+            sanitized = sanitize_pipeline_name(name) if isinstance(name, str) else None
+            if not sanitized:
+                return False, f"pipeline_names contains an invalid pipeline name: '{name}'"
+            if sanitized not in cleaned:
+                cleaned.append(sanitized)
+        body['pipeline_names'] = cleaned
+
     # Validate message length if present
     if 'message' in body:
         message = body['message']
@@ -348,10 +3588,9 @@ def validate_request_body(body: Dict[str, Any]) -> tuple[bool, Optional[str]]:
             return False, "pipeline_name exceeds maximum length of 100 characters"
 
         # Validate - allow alphanumeric, hyphens, underscores, dots, slashes, and colons (common in AWS resource names)
-        import re
-        if not re.match(r'^[a-zA-Z0-9_\-./:]+$', pipeline_name):
+        if not PIPELINE_NAME_PATTERN.match(pipeline_name):
             # Find invalid characters for better error message
-            invalid_chars = [c for c in pipeline_name if not re.match(r'[a-zA-Z0-9_\-./:]', c)]
+            invalid_chars = PIPELINE_NAME_INVALID_CHAR.findall(pipeline_name)
             invalid_str = ', '.join(set(invalid_chars)) if invalid_chars else 'unknown'
             return False, f"pipeline_name contains invalid characters: '{invalid_str}'. Only alphanumeric, hyphens (-), underscores (_), dots (.), slashes (/), and colons (:) are allowed. Received: '{pipeline_name}'"
 
@@ -375,14 +3614,56 @@ def sanitize_pipeline_name(name: str) -> Optional[str]:
         return None
 
     # Validate characters - allow alphanumeric, hyphens, underscores, dots, slashes, colons
-    import re
-    if not re.match(r'^[a-zA-Z0-9_\-./:]+$', name):
+    if not PIPELINE_NAME_PATTERN.match(name):
         logger.warning(f"Invalid characters in extracted pipeline name: {name}")
         return None
 
     return name
 
 
+# Phrasings that name a pipeline, most specific first; each captures one name-like token
+PIPELINE_MENTION_PATTERNS = [
+    re.compile(r'(?:analyze|check|show|get|find|what|how).*?pipeline\s+([a-zA-Z0-9_\-./:]+)'),
+    re.compile(r'pipeline\s+([a-zA-Z0-9_\-./:]+)'),
+    re.compile(r'(?:logs|errors|status).*?(?:for|in|of)\s+([a-zA-Z0-9_\-./:]+)'),
+    re.compile(r'(?:analyze|check|show|get|find|what|how|explain)\s+([a-zA-Z0-9_\-./:]+)'),
+]
+
+
+def extract_pipeline_mention(message: str) -> Optional[str]:
+    """The name-like token a message's phrasing points at, if any."""
+    message_lower = message.lower()
+    for pattern in PIPELINE_MENTION_PATTERNS:
+        match = pattern.search(message_lower)
+        if match:
+            return sanitize_pipeline_name(match.group(1).strip('.,!?;:'))
+    return None
+
+
+def resolve_pipeline_name(message: str) -> Tuple[Optional[str], List[str]]:
+    """Find the pipeline a chat message is about.
+
+    Returns (name, suggestions). Catalog names anywhere in the message win;
+    otherwise the name its phrasing points at is used if the catalog has it.
+    An unknown name resolves to None, with the catalog names closest to it
+    as suggestions, so a typo costs no log scan. Without a catalog index
+    the extracted name is used unchecked.
+    """
+    index = get_pipeline_index()
+    if index:
+        found = index.find(message)
+        if found:
+            return found[0], []
+    
+    mention = extract_pipeline_mention(message)
+    if not mention or index is None or mention in index:
+        return mention, []
+    # The index may predate the pipeline; the catalog lookup is cached either way
+    if get_pipeline_info(mention):
+        return mention, []
+    return None, index.suggest(mention)
+
+
 def get_security_headers() -> Dict[str, str]:
     """Get security headers for responses."""
     return {
@@ -398,8 +3679,73 @@ def get_security_headers() -> Dict[str, str]:
     }
 
 
+def emit_request_metrics(trace: RequestTrace, cold_start: bool, context: Any, response: Dict[str, Any]):
+    """Add the Server-Timing header to response and log the trace as an EMF record."""
+    try:
+        headers = response.setdefault('headers', {})
+        headers['Server-Timing'] = trace.server_timing()
+        headers['Timing-Allow-Origin'] = '*'
+        trace.properties['StatusCode'] = response.get('statusCode')
+        request_id = getattr(context, 'aws_request_id', None)
+        if request_id:
+            trace.properties['RequestId'] = request_id
+        # CloudWatch extracts metrics from EMF records written to stdout
+        print(json.dumps(trace.emf_record(cold_start), default=str), flush=True)
+    except Exception as e:
+        logger.error(f"Error emitting request metrics: {str(e)}", exc_info=True)
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Main Lambda handler."""
+    cold_start = container_state['cold_start']
+    container_state['cold_start'] = False
+    if is_scheduled_event(event):
+        return run_scheduled_sweep(context)
+    if not TRACING_ENABLED:
+        response = handle_request(event, context, cold_start)
+        flush_on_lambda(context)
+        return response
+    
+    trace = RequestTrace()
+    token = current_trace.set(trace)
+    try:
+        response = handle_request(event, context, cold_start)
+    finally:
+        current_trace.reset(token)
+    emit_request_metrics(trace, cold_start, context, response)
+    flush_on_lambda(context)
+    return response
+
+
+def flush_on_lambda(context: Any):
+    """On Lambda, give queued conversation writes a bounded chance to finish.
+
+    A frozen execution environment runs no background threads, so writes
+    still queued when the handler returns would wait for the next
+    invocation. Long-running servers leave the queue to drain by itself.
+    """
+    if not os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
+        return
+    get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    timeout = PERSIST_FLUSH_SECONDS
+    if get_remaining:
+        timeout = min(timeout, max(0.0, (get_remaining() - DEADLINE_SAFETY_MS) / 1000))
+    if not persist_queue.flush(timeout):
+        logger.warning("Conversation writes still queued at the end of the invocation")
+
+
+def handle_request(
+    event: Dict[str, Any],
+    context: Any,
+    cold_start: bool,
+    stream_frames: bool = False
+) -> Dict[str, Any]:
+    """Route one API Gateway request and build its response.
+
+    With stream_frames, a streaming response's body is the iterator of
+    server-sent events instead of the joined frames, for front ends that
+    can forward them as they are produced.
+    """
     # Log request info
     logger.info(f"Received request: {event.get('requestContext', {}).get('http', {}).get('method', 'UNKNOWN')}")
 
@@ -424,6 +3770,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': ''
         }
     
+    deadline = RequestDeadline.from_context(context)
+    
     try:
         # Parse request - handle empty body for OPTIONS
         body_str = event.get('body') or '{}'
@@ -456,85 +3804,74 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
         message = body.get('message', '')
         conversation_id = body.get('conversation_id', str(uuid.uuid4()))
+        
+        if 'pipeline_names' in body:
+            return {
+                'statusCode': 200,
+                'headers': get_security_headers(),
+                'body': json.dumps(handle_batch_request(body, conversation_id, deadline), default=str)
+            }
         pipeline_name = body.get('pipeline_name', '')
         hours_back = int(body.get('hours_back', 24))
+        # Only a continued conversation has history; loading it overlaps the analysis
+        memory = None
+        if MEMORY_ENABLED and CONVERSATIONS_TABLE and body.get('conversation_id'):
+            memory = ConversationMemory(conversation_id)
         
         # Extract pipeline name from message if not provided
+        suggestions: List[str] = []
         if not pipeline_name and message:
-            logger.info(f"Attempting to extract pipeline name from message: {message}")
-            message_lower = message.lower()
-            # Try different patterns
-            import re
-
-            extracted_name = None
-
-            # Pattern 1: "analyze pipeline <name>" or "check pipeline <name>" - capture everything after "pipeline"
-            match = re.search(r'(?:analyze|check|show|get|find|what|how).*?pipeline\s+([^\s]+(?:\s+[^\s]+)*)', message_lower)
-            if match:
-                extracted_name = match.group(1).strip()
+            pipeline_name, suggestions = resolve_pipeline_name(message)
+            if pipeline_name:
+                logger.info(f"Resolved pipeline name: {pipeline_name}")
             else:
-                # Pattern 2: "pipeline <name>" - capture everything after "pipeline"
-                match = re.search(r'pipeline\s+([^\s]+(?:\s+[^\s]+)*)', message_lower)
-                if match:
-                    extracted_name = match.group(1).strip()
-                else:
-                    # Pattern 3: "logs for <name>" or "errors in <name>"
-                    match = re.search(r'(?:logs|errors|status).*?(?:for|in|of)\s+([^\s]+(?:\s+[^\s]+)*)', message_lower)
-                    if match:
-                        extracted_name = match.group(1).strip()
-                    else:
-                        # Pattern 4: Just look for any word that might be a pipeline name after common verbs
-                        match = re.search(r'(?:analyze|check|show|get|find|what|how|explain)\s+([a-zA-Z0-9_\-./:]+)', message_lower)
-                        if match:
-                            extracted_name = match.group(1).strip()
-
-            # Clean and sanitize extracted name
-            if extracted_name:
-                # Remove trailing punctuation
-                extracted_name = extracted_name.strip('.,!?;:')
-                # Take only the first word if multiple words (or allow hyphenated names)
-                words = extracted_name.split()
-                if len(words) > 1:
-                    # If it's a hyphenated name, keep it together
-                    if '-' in extracted_name:
-                        extracted_name = extracted_name.split()[0]
-                    else:
-                        extracted_name = words[0]
-                
-                pipeline_name = sanitize_pipeline_name(extracted_name)
-                if pipeline_name:
-                    logger.info(f"Extracted pipeline name: {pipeline_name}")
-                else:
-                    logger.warning(f"Failed to sanitize extracted pipeline name: {extracted_name}")
-            else:
-                logger.warning(f"Could not extract pipeline name from message: {message}")
+                logger.info(f"No known pipeline name in message (suggestions: {suggestions})")
+        # A follow-up that names no pipeline continues with the conversation's last one;
+        # only this case waits for the history before the analysis (there is nothing to analyze yet)
+        if not pipeline_name and not suggestions and memory:
+            pipeline_name = memory.last_pipeline()
+            if pipeline_name:
+                logger.info(f"Continuing with pipeline from conversation: {pipeline_name}")
+        
+        # Streaming: summary first, then the LLM refinement as server-sent events.
+        # Lambda buffers the frames; a streaming front end forwards them as produced.
+        if pipeline_name and body.get('stream'):
+            headers = get_security_headers()
+            headers['Content-Type'] = 'text/event-stream'
+            frames = stream_pipeline_chat(message, conversation_id, pipeline_name, hours_back, deadline, memory)
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': frames if stream_frames else ''.join(frames)
+            }
         
         response_text = ""
+        llm_cache_status = None
+        coalesced = None
+        report_generated_at = None
         
-        # If pipeline name is provided, analyze it
+        # If pipeline name is provided, analyze it (once for identical concurrent requests)
+        partial = False
         if pipeline_name:
-            report = analyze_pipeline(pipeline_name, hours_back)
-            response_text = format_response(report)
-            
-            # Enhance with AI if available (OpenAI first, then Bedrock)
-            if OPENAI_API_KEY:
-                enhanced = invoke_openai(
-                    prompt=message if message else f"Analyze this pipeline report: {response_text}",
-                    context=response_text
-                )
-                if enhanced:
-                    response_text = enhanced
-            elif BEDROCK_MODEL_ID:
-                enhanced = invoke_bedrock(f"Enhance this technical analysis: {response_text}")
-                if enhanced:
-                    response_text = enhanced
+            answer = coalesced_answer(pipeline_name, hours_back, message, deadline, memory)
+            response_text = answer['response']
+            partial = answer['partial']
+            llm_cache_status = answer['llm_cache']
+            coalesced = answer.get('coalesced')
+            report_generated_at = answer.get('report_generated_at')
+            # A shared answer carries the leader's overruns
+            deadline.overrun.extend(stage for stage in answer['overrun_stages'] if stage not in deadline.overrun)
+        elif suggestions:
+            response_text = f"No pipeline by that name is in the catalog. Did you mean: {', '.join(suggestions)}?"
         else:
             # If no pipeline specified, try to answer with AI if available
-            if OPENAI_API_KEY and message:
-                ai_response = invoke_openai(
-                    prompt=message,
-                    context="You are an AWS Operations Agent. Help the user analyze pipelines, check logs, and troubleshoot issues."
-                )
+            if (OPENAI_API_KEY or BEDROCK_MODEL_ID) and message:
+                llm_budget = deadline.budget('llm')
+                history = memory.messages() if memory else None
+                ai_response = deadline.run('llm', lambda: invoke_llm({
+                    'openai': lambda timeout: invoke_openai(message, timeout=timeout, history=history),
+                    'bedrock': lambda timeout: invoke_bedrock(message, history=history)
+                }, llm_budget))
                 if ai_response:
                     response_text = ai_response
                 else:
@@ -542,21 +3879,40 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             else:
                 response_text = "Please provide a pipeline name to analyze. Usage: {\"message\": \"analyze pipeline <name>\", \"pipeline_name\": \"<name>\"}"
         
-        # Save conversation
-        save_conversation(conversation_id, message, response_text)
+        # Save conversation (queued; written in the background)
+        save_conversation(conversation_id, message, response_text, pipeline_name, memory)
 
         # Log successful response
         logger.info(f"Successfully processed request for conversation_id: {conversation_id}")
 
+        response_body = {
+            'conversation_id': conversation_id,
+            'response': response_text,
+            'pipeline_name': pipeline_name,
+            'partial': partial or bool(deadline.overrun)
+        }
+        if deadline.overrun:
+            response_body['overrun_stages'] = deadline.overrun
+        trace = current_trace.get()
+        if trace is not None:
+            trace.properties.update({'PipelineName': pipeline_name, 'Partial': response_body['partial']})
+        if llm_cache_status:
+            response_body['llm_cache'] = llm_cache_status
+        if coalesced:
+            response_body['coalesced'] = coalesced
+        if report_generated_at:
+            response_body['report_generated_at'] = report_generated_at
+        if suggestions:
+            response_body['suggestions'] = suggestions
+        if COLD_START_PROFILE:
+            response_body['cold_start'] = cold_start_report(cold_start)
+            logger.info(f"Cold start profile: {json.dumps(response_body['cold_start'])}")
+
         # Return response
         return {
             'statusCode': 200,
             'headers': get_security_headers(),
-            'body': json.dumps({
-                'conversation_id': conversation_id,
-                'response': response_text,
-                'pipeline_name': pipeline_name
-            })
+            'body': json.dumps(response_body)
         }
 
     except Exception as e:
@@ -568,3 +3924,6 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'error': 'Internal server error. Please try again later.'
             })
         }
+
+
+container_state['module_init_ms'] = round((time.perf_counter() - MODULE_IMPORT_STARTED) * 1000, 2)
@@ -0,0 +1,278 @@
+"""
+Operations Agent ASGI Server
+Serves the Lambda handler from a long-running process (containers, VMs).
+
+Requests are translated into API Gateway v2 events and handled by the same
+code as in Lambda, so the request/response contract and security headers
+are identical. Handler calls run on a bounded thread pool, so one process
+serves many requests at once and shares SDK connection pools and caches
+across them. Streaming requests ("stream": true) are sent chunk by chunk
+instead of buffered.
+
+    pip install -r requirements-server.txt
+    uvicorn server:app --host 0.0.0.0 --port 8080 --workers 4
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Handler calls run at once per process; requests beyond this wait for a free thread
+SERVER_MAX_CONCURRENCY = int(os.getenv('SERVER_MAX_CONCURRENCY', '32'))
+# Threads (or connections) one in-flight request can keep busy in each handler pool.
+# The handler's defaults assume Lambda's one request per process, so unless a pool
+# is configured explicitly it is sized for SERVER_MAX_CONCURRENCY requests.
+HANDLER_POOL_DEMAND = {
+    'STAGE_MAX_WORKERS': 2,         # history load alongside the catalog or LLM stage
+    'EVIDENCE_MAX_WORKERS': 2,      # log scan and Step Functions
+    'SFN_HISTORY_MAX_WORKERS': 1,
+    'LLM_MAX_WORKERS': 2,           # primary and hedged call
+    'AWS_MAX_POOL_CONNECTIONS': 3,
+}
+for setting, demand in HANDLER_POOL_DEMAND.items():
+    os.environ.setdefault(setting, str(SERVER_MAX_CONCURRENCY * demand))
+
+# Imported after the pool sizes are set: the handler creates its pools at import
+import handler  # noqa: E402
+
+for setting, demand in HANDLER_POOL_DEMAND.items():
+    if getattr(handler, setting) < SERVER_MAX_CONCURRENCY * demand:
+        logger.warning(
+            f"{setting}={getattr(handler, setting)} is below the {SERVER_MAX_CONCURRENCY * demand} "
+            f"that SERVER_MAX_CONCURRENCY={SERVER_MAX_CONCURRENCY} requests can use; "
+            "requests may queue for threads and return partial answers"
+        )
+# Time budget per request (the Lambda timeout's counterpart) and maximum body size
+SERVER_REQUEST_TIMEOUT_MS = int(os.getenv('SERVER_REQUEST_TIMEOUT_MS', '30000'))
+SERVER_MAX_BODY_BYTES = int(os.getenv('SERVER_MAX_BODY_BYTES', str(1024 * 1024)))
+# Paths routed to the handler (API Gateway's POST /chat)
+SERVER_CHAT_PATHS = ('/', '/chat')
+
+request_executor = ThreadPoolExecutor(max_workers=SERVER_MAX_CONCURRENCY, thread_name_prefix='request')
+
+
+class ServerContext:
+    """Lambda-style context: request id and time remaining in the request budget."""
+
+    def __init__(self, timeout_ms: int = SERVER_REQUEST_TIMEOUT_MS):
+        self.aws_request_id = str(uuid.uuid4())
+        self.deadline = asyncio.get_running_loop().time() + timeout_ms / 1000
+        self.loop = asyncio.get_running_loop()
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self.deadline - self.loop.time()) * 1000))
+
+
+def build_event(scope: Dict[str, Any], body: bytes, request_id: str) -> Dict[str, Any]:
+    """Build the API Gateway HTTP API (payload v2.0) event for an ASGI request."""
+    headers: Dict[str, str] = {}
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin-1').lower()
+        headers[key] = f"{headers[key]},{value.decode('latin-1')}" if key in headers else value.decode('latin-1')
+    method = scope['method']
+    client = scope.get('client') or ('', 0)
+    return {
+        'version': '2.0',
+        'routeKey': f"{method} {scope['path']}",
+        'rawPath': scope['path'],
+        'rawQueryString': scope.get('query_string', b'').decode('latin-1'),
+        'headers': headers,
+        'requestContext': {
+            'http': {
+                'method': method,
+                'path': scope['path'],
+                'protocol': f"HTTP/{scope.get('http_version', '1.1')}",
+                'sourceIp': client[0],
+                'userAgent': headers.get('user-agent', '')
+            },
+            'requestId': request_id,
+            'stage': '$default'
+        },
+        'body': body.decode('utf-8', errors='replace'),
+        'isBase64Encoded': False
+    }
+
+
+def wants_stream(body: bytes) -> bool:
+    """Whether the request body asks for a streaming response."""
+    try:
+        parsed = json.loads(body or b'{}')
+    except ValueError:
+        return False
+    return isinstance(parsed, dict) and bool(parsed.get('stream'))
+
+
+def encode_headers(headers: Dict[str, str]) -> List[Tuple[bytes, bytes]]:
+    return [(name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in headers.items()]
+
+
+async def send_response(send, status: int, headers: Dict[str, str], body: str):
+    await send({'type': 'http.response.start', 'status': status, 'headers': encode_headers(headers)})
+    await send({'type': 'http.response.body', 'body': body.encode('utf-8')})
+
+
+async def send_error(send, status: int, message: str):
+    await send_response(send, status, handler.get_security_headers(), json.dumps({'error': message}))
+
+
+async def read_body(receive) -> Optional[bytes]:
+    """Read the request body, or None once it exceeds SERVER_MAX_BODY_BYTES."""
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return b''.join(chunks)
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > SERVER_MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+class StreamingRequest:
+    """A streaming request's handler response plus the trace context it runs in.
+
+    The body iterator is advanced inside run_context so spans recorded while
+    the stream is produced land on this request's trace.
+    """
+
+    def __init__(self, event: Dict[str, Any], context: ServerContext):
+        self.context = context
+        self.cold_start = handler.container_state['cold_start']
+        handler.container_state['cold_start'] = False
+        self.trace = handler.RequestTrace() if handler.TRACING_ENABLED else None
+        self.run_context = contextvars.copy_context()
+        self.run_context.run(handler.current_trace.set, self.trace)
+        self.response = self.run_context.run(handler.handle_request, event, context, self.cold_start, True)
+
+    def next_frame(self) -> Optional[str]:
+        """Produce the next server-sent event, or None when the stream is done."""
+        try:
+            return self.run_context.run(next, self.response['body'], None)
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}", exc_info=True)
+            return handler.sse_event('error', {'error': 'Internal server error. Please try again later.'})
+
+    def close(self):
+        """Close the body iterator so the handler saves what it produced."""
+        try:
+            self.run_context.run(self.response['body'].close)
+        except Exception as e:
+            logger.error(f"Error closing response stream: {str(e)}", exc_info=True)
+
+    def finish(self):
+        if self.trace is not None:
+            handler.emit_request_metrics(self.trace, self.cold_start, self.context, self.response)
+
+
+async def stream_response(send, request: StreamingRequest):
+    """Send a streaming response's frames as the handler produces them."""
+    loop = asyncio.get_running_loop()
+    await send({
+        'type': 'http.response.start',
+        'status': request.response['statusCode'],
+        'headers': encode_headers(request.response['headers'])
+    })
+    connected = True
+    try:
+        while True:
+            frame = await loop.run_in_executor(request_executor, request.next_frame)
+            if frame is None:
+                break
+            try:
+                await send({'type': 'http.response.body', 'body': frame.encode('utf-8'), 'more_body': True})
+            except Exception as e:
+                # The client went away; stop generating for it
+                logger.warning(f"Client disconnected mid-stream: {str(e)}")
+                connected = False
+                break
+            if frame.startswith('event: error'):
+                break
+    finally:
+        # A stream left unfinished still saves the conversation turn
+        await loop.run_in_executor(request_executor, request.close)
+    if connected:
+        await send({'type': 'http.response.body', 'body': b''})
+    # Headers are already sent, so only the EMF record covers the whole stream
+    request.finish()
+
+
+async def handle_http(scope: Dict[str, Any], receive, send):
+    method, path = scope['method'], scope['path'].rstrip('/') or '/'
+    if path == '/health' and method in ('GET', 'HEAD'):
+        await send_response(send, 200, handler.get_security_headers(), json.dumps({'status': 'ok'}))
+        return
+    if path not in SERVER_CHAT_PATHS:
+        await send_error(send, 404, 'Not found')
+        return
+    if method not in ('POST', 'OPTIONS'):
+        await send_error(send, 405, 'Method not allowed')
+        return
+
+    body = await read_body(receive)
+    if body is None:
+        await send_error(send, 413, 'Request body too large')
+        return
+
+    loop = asyncio.get_running_loop()
+    context = ServerContext()
+    event = build_event(scope, body, context.aws_request_id)
+    try:
+        if method == 'POST' and wants_stream(body):
+            request = await loop.run_in_executor(request_executor, StreamingRequest, event, context)
+            if not isinstance(request.response['body'], str):
+                await stream_response(send, request)
+                return
+            # Not streamable (e.g. no pipeline name): an ordinary response
+            request.finish()
+            response = request.response
+        else:
+            response = await loop.run_in_executor(request_executor, handler.lambda_handler, event, context)
+    except Exception as e:
+        logger.error(f"Error in server: {str(e)}", exc_info=True)
+        await send_error(send, 500, 'Internal server error. Please try again later.')
+        return
+
+    await send_response(send, response['statusCode'], response.get('headers', {}), response.get('body') or '')
+
+
+async def handle_lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if handler.CATALOG_PRELOAD:
+                await asyncio.get_running_loop().run_in_executor(request_executor, handler.preload_pipeline_catalog)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            request_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope: Dict[str, Any], receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'http':
+        await handle_http(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await handle_lifespan(receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run(
+        'server:app',
+        host=os.getenv('SERVER_HOST', '0.0.0.0'),
+        port=int(os.getenv('SERVER_PORT', '8080')),
+        workers=int(os.getenv('SERVER_WORKERS', '1'))
+    )